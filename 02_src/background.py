@@ -0,0 +1,126 @@
+"""
+滑动背景模型与背景扣除
+- median: 前 N 帧的逐像素中值；环形缓冲区只保存 N 帧，内存与序列长度无关
+- ema: 指数滑动平均，alpha = 2 / (N + 1)，只保存一帧 float32 状态
+- 每帧减去由它之前的帧得到的背景（第一帧本身作为初始背景），运动的液滴不会混入自己的背景
+- 状态随帧顺序推进，必须按帧顺序逐批调用 apply()
+"""
+
+import numpy as np
+
+
+BACKGROUND_MODES = ('median', 'ema')
+
+# abs: |帧 - 背景|；dark: 比背景暗的部分 (背景 - 帧)；bright: 比背景亮的部分 (帧 - 背景)
+POLARITIES = ('abs', 'dark', 'bright')
+
+DEFAULT_WINDOW = 50
+
+
+class BackgroundSubtractor:
+    """
+    滑动背景扣除
+
+        subtractor = BackgroundSubtractor('median', window=50, polarity='dark')
+        for _, frames in reader.iter_chunks():
+            foreground = subtractor.apply(frames)
+    """
+
+    def __init__(self, mode='median', window=DEFAULT_WINDOW, polarity='abs', refresh=1, max_value=None):
+        """
+        Args:
+            mode: 'median' 或 'ema'
+            window: 背景窗口帧数 N（ema 方式换算为 alpha = 2 / (N + 1)）
+            polarity: 'abs'、'dark' 或 'bright'，决定差值中保留的部分
+            refresh: median 方式每隔多少帧重新计算一次中值（1 为每帧；背景变化缓慢时可加大以节省时间）
+            max_value: 输出上限（None 为输出数据类型的最大值）
+        """
+        if mode not in BACKGROUND_MODES:
+            raise ValueError(f"不支持的背景模型: {mode}，可选 {', '.join(BACKGROUND_MODES)}")
+        if polarity not in POLARITIES:
+            raise ValueError(f"不支持的极性: {polarity}，可选 {', '.join(POLARITIES)}")
+        if window < 1 or refresh < 1:
+            raise ValueError("背景窗口和刷新间隔必须为正整数")
+        self.mode = mode
+        self.window = int(window)
+        self.polarity = polarity
+        self.refresh = int(refresh)
+        self.max_value = max_value
+        self.alpha = 2.0 / (self.window + 1)
+        self.reset()
+
+    def clone(self):
+        """参数相同、状态为空的新实例（如每个 ROI 各用一个）"""
+        return BackgroundSubtractor(self.mode, self.window, self.polarity, self.refresh, self.max_value)
+
+    def reset(self):
+        """清空背景模型"""
+        # median: 按像素排列的环形缓冲区 (像素数, N)，每个像素的 N 个历史值连续存放，中值沿最后一轴计算
+        self._ring = None
+        self._filled = 0
+        self._next = 0
+        self._median = None
+        self._since_refresh = 0
+        # ema: float32 背景
+        self._ema = None
+
+    def describe(self):
+        if self.mode == 'median':
+            refresh = f", 每 {self.refresh} 帧更新" if self.refresh > 1 else ''
+            return f"前 {self.window} 帧中值{refresh}, 极性 {self.polarity}"
+        return f"指数滑动平均 (alpha={self.alpha:.4f}), 极性 {self.polarity}"
+
+    def apply(self, frames):
+        """
+        扣除一批按顺序排列的帧的背景，并用这些帧更新背景模型
+
+        Args:
+            frames: (T, H, W[, 3]) 的 uint8 / uint16 数组
+
+        Returns:
+            ndarray: 与输入形状、数据类型相同的前景帧
+        """
+        frames = np.asarray(frames)
+        out = np.empty_like(frames)
+        limit = self.max_value if self.max_value is not None else np.iinfo(frames.dtype).max
+        for k, frame in enumerate(frames):
+            diff = self._difference(frame)
+            if self.polarity == 'abs':
+                np.abs(diff, out=diff)
+            elif self.polarity == 'dark':
+                np.negative(diff, out=diff)
+            np.clip(diff, 0, limit, out=diff)
+            np.rint(diff, out=diff)
+            out[k] = diff
+        return out
+
+    def _difference(self, frame):
+        """返回 帧 - 背景 (float32)，背景只由之前的帧得到；随后把本帧加入背景模型"""
+        work = frame.astype(np.float32)
+
+        if self.mode == 'ema':
+            if self._ema is None:
+                self._ema = work.copy()
+            work -= self._ema
+            self._ema += self.alpha * work
+            return work
+
+        pixels = frame.reshape(-1)
+        if self._ring is None:
+            self._ring = np.empty((pixels.size, self.window), dtype=frame.dtype)
+        elif self._ring.shape[0] != pixels.size:
+            raise ValueError(f"帧尺寸 {frame.shape} 与背景模型不符")
+
+        if self._filled == 0:
+            work[...] = 0
+        else:
+            if self._median is None or self._since_refresh >= self.refresh:
+                self._median = np.median(self._ring[:, :self._filled], axis=1).astype(np.float32)
+                self._since_refresh = 0
+            work -= self._median.reshape(frame.shape)
+
+        self._ring[:, self._next] = pixels
+        self._next = (self._next + 1) % self.window
+        self._filled = min(self._filled + 1, self.window)
+        self._since_refresh += 1
+        return work
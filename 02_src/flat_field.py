@@ -0,0 +1,132 @@
+"""
+暗场 / 平场校正
+- 暗场、平场主帧由校准 SEQ 的全部帧求平均得到，逐块以 float32 求和，不把整段数据读入内存
+- 校正: (raw - dark) / (flat - dark)，再乘以 (flat - dark) 的均值，使校正后的亮度与原始数据相当
+- 整批帧 (T, H, W[, 3]) 一次向量化计算，输出与输入相同的整数类型，可直接写入 SEQ 或送入导出/视频流程
+- 校正在去马赛克之前进行，Bayer 原始数据按像素各自校正
+"""
+
+import numpy as np
+
+
+def average_frames(reader, start_frame=0, end_frame=None, max_bytes=64 * 1024 * 1024):
+    """
+    求 [start_frame, end_frame) 各帧的平均帧
+
+    每批帧先以 float32 求和，再累加到 float64 的总和中，长序列不损失精度。
+
+    Args:
+        reader: 已读取文件头的 SeqReader
+        start_frame, end_frame: 帧范围（end_frame 为 None 表示到末尾）
+        max_bytes: 每批读取的内存上限
+
+    Returns:
+        ndarray: float32 平均帧，形状与读出的单帧相同
+    """
+    total = None
+    count = 0
+    for _, frames in reader.iter_chunks(start=start_frame, end=end_frame, max_bytes=max_bytes):
+        chunk_sum = frames.sum(axis=0, dtype=np.float32)
+        if total is None:
+            total = chunk_sum.astype(np.float64)
+        else:
+            total += chunk_sum
+        count += len(frames)
+
+    if count == 0:
+        raise ValueError(f"校准文件中没有帧: {reader.seq_file_path}")
+    return (total / count).astype(np.float32)
+
+
+class FlatFieldCorrector:
+    """
+    暗场 / 平场校正器
+
+        corrector = FlatFieldCorrector.from_readers(dark_reader, flat_reader)
+        corrected = corrector.apply(frames)
+    """
+
+    def __init__(self, dark=None, flat=None, max_value=None):
+        """
+        Args:
+            dark: 暗场主帧 (H, W[, 3])；None 为不减暗场
+            flat: 平场主帧；None 为只减暗场
+            max_value: 输出上限（None 为输出数据类型的最大值；10/12 位数据为有效位的最大值）
+        """
+        if dark is None and flat is None:
+            raise ValueError("至少需要暗场或平场主帧之一")
+        self.dark = None if dark is None else np.asarray(dark, dtype=np.float32)
+        self.flat = None if flat is None else np.asarray(flat, dtype=np.float32)
+        if self.dark is not None and self.flat is not None and self.dark.shape != self.flat.shape:
+            raise ValueError(f"暗场 {self.dark.shape} 与平场 {self.flat.shape} 的尺寸不符")
+        self.max_value = max_value
+
+        # 平场增益 mean(flat - dark) / (flat - dark)；响应为 0 或负的坏像素增益为 0
+        self.gain = None
+        self.scale = None
+        if self.flat is not None:
+            response = self.flat - self.dark if self.dark is not None else self.flat
+            valid = response > 0
+            if not valid.any():
+                raise ValueError("平场主帧减去暗场后没有正值")
+            self.scale = float(response[valid].mean())
+            self.gain = np.zeros_like(response)
+            np.divide(self.scale, response, out=self.gain, where=valid)
+
+    @classmethod
+    def from_readers(cls, dark_reader=None, flat_reader=None, max_bytes=64 * 1024 * 1024):
+        """
+        由校准 SEQ 的平均帧建立校正器
+
+        Args:
+            dark_reader: 暗场 SEQ 的 SeqReader（已读取文件头），None 为不减暗场
+            flat_reader: 平场 SEQ 的 SeqReader（已读取文件头），None 为只减暗场
+            max_bytes: 求平均时每批读取的内存上限
+        """
+        dark = average_frames(dark_reader, max_bytes=max_bytes) if dark_reader is not None else None
+        flat = average_frames(flat_reader, max_bytes=max_bytes) if flat_reader is not None else None
+
+        max_value = None
+        reference = flat_reader if flat_reader is not None else dark_reader
+        if reference.bit_depth == 16 and reference.significant_bits < 16:
+            max_value = (1 << reference.significant_bits) - 1
+        return cls(dark, flat, max_value)
+
+    @property
+    def shape(self):
+        """校准主帧的形状"""
+        return (self.dark if self.dark is not None else self.flat).shape
+
+    def describe(self):
+        parts = []
+        if self.dark is not None:
+            parts.append(f"暗场均值 {float(self.dark.mean()):.2f}")
+        if self.flat is not None:
+            parts.append(f"平场响应均值 {self.scale:.2f}")
+        return ', '.join(parts)
+
+    def apply(self, frames):
+        """
+        校正一帧或一批帧
+
+        Args:
+            frames: (H, W[, 3]) 或 (T, H, W[, 3]) 的 uint8 / uint16 数组
+
+        Returns:
+            ndarray: 与输入形状、数据类型相同的校正结果
+        """
+        frames = np.asarray(frames)
+        shape = self.shape
+        if frames.shape[frames.ndim - len(shape):] != shape:
+            raise ValueError(f"帧尺寸 {frames.shape} 与校准主帧 {shape} 不符")
+
+        # 一个 float32 工作数组，全部原地运算
+        work = frames.astype(np.float32)
+        if self.dark is not None:
+            work -= self.dark
+        if self.gain is not None:
+            work *= self.gain
+        limit = self.max_value if self.max_value is not None else np.iinfo(frames.dtype).max
+        np.clip(work, 0, limit, out=work)
+        np.rint(work, out=work)
+        return work.astype(frames.dtype)
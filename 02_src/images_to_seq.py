@@ -4,17 +4,110 @@
 """
 
 import os
+import time
 import struct
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from PIL import Image
 import numpy as np
 from datetime import datetime
 import argparse
+from demosaic import IMAGE_FORMAT_BAYER, is_bayer_format
+from seq_compression import (COMPRESSION_NONE, COMPRESSION_CODECS, ZLIB_DEFAULT_LEVEL, FRAME_SIZE_FIELD,
+                             compress_frame, save_frame_index)
+
+
+# 并行解码时每个线程的预读帧数
+READ_AHEAD_PER_WORKER = 4
+
+# 帧块对齐: StreamPix 默认按 8192 字节对齐；紧凑模式按 8 字节对齐，小尺寸帧不再大半是填充
+DEFAULT_FRAME_ALIGNMENT = 8192
+COMPACT_FRAME_ALIGNMENT = 8
+
+# 没有 os.pwrite 的平台 (Windows) 上 seek + write 需要互斥
+_pwrite_lock = threading.Lock()
+
+
+def _pwrite(f, data, offset):
+    """
+    在指定偏移写入，不依赖也不移动共享的文件指针，可多线程并发调用。
+    没有 os.pwrite 的平台 (Windows) 上退化为加锁的 seek + write。
+    """
+    if hasattr(os, 'pwrite'):
+        view = memoryview(data).cast('B')
+        fd = f.fileno()
+        while view:
+            written = os.pwrite(fd, view, offset)
+            view = view[written:]
+            offset += written
+        return
+    with _pwrite_lock:
+        f.seek(offset)
+        f.write(data)
+        f.flush()
+
+
+def load_image_array(img_path, width, height, bit_depth):
+    """
+    读取一张图像并转换为 SEQ 帧数据（24 位为 BGR 顺序）
+
+    Args:
+        img_path: 图像文件路径
+        width, height: 目标尺寸，不符时缩放
+        bit_depth: 位深度 (8, 16, 24)
+
+    Returns:
+        ndarray: (H, W) 或 (H, W, 3)
+    """
+    with Image.open(img_path) as img:
+        # 确保图像尺寸正确
+        if img.size != (width, height):
+            print(f"警告: 图像 {img_path} 尺寸 {img.size} 与预期 ({width}, {height}) 不符，将调整大小")
+            img = img.resize((width, height), Image.LANCZOS)
+
+        # 根据位深度转换图像
+        if bit_depth == 8:
+            # 灰度图
+            if img.mode != 'L':
+                img = img.convert('L')
+            return np.array(img, dtype=np.uint8)
+        elif bit_depth == 16:
+            # 16 位灰度图
+            if img.mode != 'I;16':
+                img = img.convert('L')
+                img_array = np.array(img, dtype=np.uint8)
+                return img_array.astype(np.uint16) * 256
+            return np.array(img, dtype=np.uint16)
+        elif bit_depth == 24:
+            # RGB 彩色图 -> BGR (SEQ 使用 BGR 顺序)
+            if img.mode != 'RGB':
+                img = img.convert('RGB')
+            img_array = np.array(img, dtype=np.uint8)
+            # 转换 RGB -> BGR
+            return img_array[:, :, ::-1]
+        else:
+            raise ValueError(f"不支持的位深度 {bit_depth}")
 
 
 class SeqWriter:
-    """SEQ 文件写入器，支持 Norpix StreamPix 格式"""
+    """
+    SEQ 文件写入器，支持 Norpix StreamPix 格式
+
+    可由图像文件列表驱动 (write_images)，也可直接写入内存中的帧:
 
-    def __init__(self, output_path, width=None, height=None, bit_depth=8, frame_rate=30.0):
+        with SeqWriter('out.seq', frame_rate=100.0).open(640, 480, 16) as writer:
+            for frame in frames:
+                writer.append(frame)
+
+    compression='zlib' 时每帧独立无损压缩，写成变长帧
+    [uint32 字节数][压缩数据][8 字节时间戳]，关闭时同时写出 .idx 帧偏移索引；
+    这种输出只能用 append() 按顺序写入。
+    """
+
+    def __init__(self, output_path, width=None, height=None, bit_depth=8, frame_rate=30.0,
+                 alignment=DEFAULT_FRAME_ALIGNMENT, compression=None, compression_level=ZLIB_DEFAULT_LEVEL,
+                 workers=1):
         """
         初始化 SEQ 写入器
 
@@ -24,21 +117,48 @@ class SeqWriter:
             height: 图像高度（如果为 None，从第一张图片自动检测）
             bit_depth: 位深度 (8, 16, 24)
             frame_rate: 帧率 (fps)
+            alignment: 帧块对齐字节数（8 的倍数）；默认 8192 与 StreamPix 相同，
+                更小的值（如 COMPACT_FRAME_ALIGNMENT）得到紧凑文件，对齐后的大小记录在头部偏移 580
+            compression: None 为不压缩；'zlib' 为逐帧无损压缩（此时 alignment 不起作用）
+            compression_level: zlib 压缩级别 1-9
+            workers: 压缩线程数；> 1 时 append() 把压缩交给线程池，写入仍按顺序进行
         """
+        if alignment < 8 or alignment % 8:
+            raise ValueError(f"帧块对齐必须是 8 的正整数倍: {alignment}")
+        if compression is not None and compression not in COMPRESSION_CODECS:
+            raise ValueError(f"不支持的压缩方式: {compression}，可选 {', '.join(COMPRESSION_CODECS)}")
         self.output_path = output_path
         self.width = width
         self.height = height
         self.bit_depth = bit_depth
         self.frame_rate = frame_rate
+        self.alignment = alignment
+        self.compression = compression
+        self.compression_level = compression_level
+        self.workers = max(1, workers)
         self.frame_count = 0
         self.header_size = 8192  # SEQ 文件头固定大小
         self.file_handle = None
+        self.image_size = 0  # 每帧像素数据的字节数
         self.true_image_size = 0  # 每帧的实际大小（包括时间戳和填充）
+        self._frame_buffer = None
+
+        # 压缩输出: 下一帧的写入位置、已写帧的偏移/长度字段，以及等待写入的压缩任务
+        self._write_offset = 0
+        self._frame_offsets = []
+        self._frame_sizes = []
+        self._pending = deque()
+        self._executor = None
+
+    @property
+    def compression_code(self):
+        """头部偏移 624 的压缩格式代码"""
+        return COMPRESSION_CODECS[self.compression] if self.compression else COMPRESSION_NONE
 
     def _calculate_true_image_size(self, image_size_bytes):
         """
         计算 TrueImageSize，按照 NorPix C++ 实现的逻辑
-        TrueImageSize = ImageSizeBytes + 8 字节时间戳，然后对齐到 8192 的倍数
+        TrueImageSize = ImageSizeBytes + 8 字节时间戳，然后对齐到 alignment（默认 8192）的倍数
 
         Args:
             image_size_bytes: 原始图像数据大小
@@ -49,24 +169,20 @@ class SeqWriter:
         # 添加 8 字节时间戳
         size_with_timestamp = image_size_bytes + 8
 
-        # 对齐到 8192 的倍数
-        alignment = 8192
+        # 对齐到 alignment 的倍数
+        alignment = self.alignment
         if size_with_timestamp % alignment == 0:
             return size_with_timestamp
         else:
             return ((size_with_timestamp // alignment) + 1) * alignment
 
-    def _create_header(self, first_image_path):
+    def _detect_from_image(self, first_image_path):
         """
-        创建 SEQ 文件头（8192 字节）
+        从第一张图片检测未指定的尺寸和位深度
 
         Args:
-            first_image_path: 第一张图片的路径，用于检测图像尺寸
-
-        Returns:
-            bytes: 8192 字节的文件头数据
+            first_image_path: 第一张图片的路径
         """
-        # 从第一张图片获取尺寸信息
         with Image.open(first_image_path) as img:
             if self.width is None or self.height is None:
                 self.width, self.height = img.size
@@ -88,6 +204,13 @@ class SeqWriter:
                         self.bit_depth = 8   # 默认 8 位
                 print(f"从图像模式 '{img.mode}' 检测到位深度: {self.bit_depth}")
 
+    def _create_header(self):
+        """
+        根据 width / height / bit_depth / frame_rate 创建 SEQ 文件头（8192 字节）
+
+        Returns:
+            bytes: 8192 字节的文件头数据
+        """
         # 创建 8192 字节的空头部
         header = bytearray(self.header_size)
 
@@ -120,15 +243,7 @@ class SeqWriter:
         # 位深度 - 实际 (偏移 560-563)
         struct.pack_into('<I', header, 560, self.bit_depth)
 
-        # 计算图像大小
-        bytes_per_pixel = self.bit_depth // 8
-        image_size = self.width * self.height * bytes_per_pixel
-
-        # 计算 TrueImageSize（对齐后的大小，包括时间戳和填充）
-        self.true_image_size = self._calculate_true_image_size(image_size)
-
-        print(f"图像数据大小: {image_size} 字节")
-        print(f"TrueImageSize (对齐后): {self.true_image_size} 字节")
+        image_size = self.image_size
 
         # 图像大小 (偏移 564-567)
         struct.pack_into('<I', header, 564, image_size)
@@ -172,7 +287,7 @@ class SeqWriter:
         struct.pack_into('<HHHH', header, 616, 0, 0, 0, 0)
 
         # Compression format (偏移 624-627)
-        struct.pack_into('<I', header, 624, 0)  # 0 = 无压缩
+        struct.pack_into('<I', header, 624, self.compression_code)  # 0 = 无压缩
 
         # GPS 数据 (偏移 628-635)
         struct.pack_into('<II', header, 628, 0, 0)
@@ -184,13 +299,257 @@ class SeqWriter:
 
         return bytes(header)
 
-    def write_images(self, image_paths, progress_callback=None):
+    def _patch_header(self, template):
+        """
+        以已有 SEQ 文件头为模板（保留描述、版本等字段），只改写与帧布局相关的字段
+
+        Args:
+            template: 原始文件头字节
+
+        Returns:
+            bytes: 修改后的文件头
+        """
+        header = bytearray(template)
+        image_format = 200 if self.bit_depth == 24 else 100
+        if self.bit_depth != 24 and is_bayer_format(struct.unpack_from('<I', header, 568)[0]):
+            # 原始 Bayer 数据保持 Bayer 格式代码（输出不打包），读取时仍可去马赛克
+            image_format = IMAGE_FORMAT_BAYER
+        struct.pack_into('<I', header, 548, self.width)
+        struct.pack_into('<I', header, 552, self.height)
+        struct.pack_into('<I', header, 556, self.bit_depth)
+        struct.pack_into('<I', header, 560, self.bit_depth)
+        struct.pack_into('<I', header, 564, self.image_size)
+        # 输出为未压缩的定长帧，或按 self.compression 逐帧压缩（解压后的排列与未压缩帧相同）
+        struct.pack_into('<I', header, 568, image_format)
+        struct.pack_into('<I', header, 572, 0)
+        struct.pack_into('<I', header, 580, self.true_image_size)
+        struct.pack_into('<I', header, 600, self.image_size)
+        struct.pack_into('<I', header, 624, self.compression_code)
+        return bytes(header)
+
+    def frame_offset(self, index):
+        """第 index 帧在输出文件中的偏移"""
+        return self.header_size + index * self.true_image_size
+
+    def new_frame_buffer(self):
+        """
+        分配一个可重复使用的帧块缓冲区（像素数据 + 8 字节时间戳）
+
+        多线程写入时每个线程各用一个。填充部分不在缓冲区中，由文件空洞提供。
+
+        Returns:
+            (bytearray, ndarray): 缓冲区及其像素部分的数组视图
+        """
+        buffer = bytearray(self.image_size + 8)
+        dtype = np.dtype('<u2') if self.bit_depth == 16 else np.dtype(np.uint8)
+        shape = (self.height, self.width, 3) if self.bit_depth == 24 else (self.height, self.width)
+        pixels = np.frombuffer(buffer, dtype=dtype, count=self.image_size // dtype.itemsize).reshape(shape)
+        return buffer, pixels
+
+    def open(self, width=None, height=None, bit_depth=None, frame_count=None, header=None):
+        """
+        创建输出文件并写入文件头，之后用 append() 逐帧写入，close() 结束
+
+        Args:
+            width, height: 图像尺寸（None 为使用构造时的值）
+            bit_depth: 位深度 8, 16, 24（None 为使用构造时的值）
+            frame_count: 预计帧数，给出时预先把文件扩展到最终大小
+            header: 作为模板的原始 SEQ 文件头（None 为新建文件头）
+        """
+        if width is not None:
+            self.width = width
+        if height is not None:
+            self.height = height
+        if bit_depth is not None:
+            self.bit_depth = bit_depth
+
+        if self.width is None or self.height is None:
+            raise ValueError("必须指定图像宽度和高度")
+        if self.bit_depth not in (8, 16, 24):
+            raise ValueError(f"不支持的位深度 {self.bit_depth}")
+
+        # 计算图像大小和 TrueImageSize（对齐后的大小，包括时间戳和填充）
+        self.image_size = self.width * self.height * (self.bit_depth // 8)
+        self.true_image_size = self._calculate_true_image_size(self.image_size)
+        print(f"图像数据大小: {self.image_size} 字节")
+        print(f"TrueImageSize (对齐后): {self.true_image_size} 字节")
+
+        if header is not None:
+            header = self._patch_header(header)
+        else:
+            header = self._create_header()
+        self.header_size = len(header)
+
+        self.frame_count = 0
+        self.file_handle = open(self.output_path, 'wb')
+        _pwrite(self.file_handle, header, 0)
+        if self.compression:
+            # 变长帧不预分配，按顺序追加
+            self._write_offset = self.header_size
+            self._frame_offsets = []
+            self._frame_sizes = []
+            self._pending = deque()
+            if self.workers > 1:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers)
+        elif frame_count:
+            # 预分配：文件直接扩展到最终大小，未写入的填充部分为文件空洞
+            self.file_handle.truncate(self.frame_offset(frame_count))
+        self._frame_buffer = self.new_frame_buffer()
+        return self
+
+    def append(self, frame, timestamp=None):
+        """
+        追加一帧
+
+        Args:
+            frame: ndarray，8/16 位为 (H, W)，24 位为 (H, W, 3)，通道顺序为 BGR（与 SeqReader 读出的一致）
+            timestamp: 帧时间戳，None 为当前时间；可为 Unix 秒数 (float)、datetime，
+                或 8 字节 NorPix 时间戳记录（bytes / SeqReader.timestamp_records() 的元素）
+        """
+        if self.compression:
+            self._append_compressed(frame, timestamp)
+        else:
+            self.write_frame_at(self.frame_count, frame, timestamp)
+        self.frame_count += 1
+
+    def write_frame_at(self, index, frame, timestamp=None, buffer=None):
+        """
+        把一帧写到第 index 帧的位置：像素和时间戳拼入缓冲区后一次定位写入
+
+        不修改 frame_count，也不移动文件指针；不同线程使用各自的 buffer
+        （new_frame_buffer()）时可并发写入不同的帧。
+
+        Args:
+            index: 帧号
+            frame: 同 append()
+            timestamp: 同 append()
+            buffer: new_frame_buffer() 的返回值，None 为使用写入器自带的缓冲区
+        """
+        if self.file_handle is None:
+            raise ValueError("SEQ 文件未打开，请先调用 open()")
+        if self.compression:
+            raise ValueError("压缩输出的帧大小不定，只能用 append() 按顺序写入")
+
+        block, pixels = buffer if buffer is not None else self._frame_buffer
+        self._copy_frame(pixels, frame)
+        block[self.image_size:] = self._pack_timestamp(timestamp)
+        _pwrite(self.file_handle, block, self.frame_offset(index))
+
+    def _copy_frame(self, pixels, frame):
+        """检查帧的尺寸和数据类型，并按存储排列复制到 pixels"""
+        frame = np.asarray(frame)
+        if frame.shape != pixels.shape:
+            raise ValueError(f"帧尺寸 {frame.shape} 与预期 {pixels.shape} 不符")
+        if not np.can_cast(frame.dtype, pixels.dtype, casting='same_kind'):
+            raise ValueError(f"帧数据类型 {frame.dtype} 无法写入 {self.bit_depth} 位 SEQ")
+        np.copyto(pixels, frame, casting='unsafe')
+
+    def _append_compressed(self, frame, timestamp):
+        """
+        压缩并追加一帧。有线程池时先提交压缩任务，最多 workers * READ_AHEAD_PER_WORKER
+        帧在压缩或等待写入，完成的帧严格按追加顺序写出。
+        """
+        if self.file_handle is None:
+            raise ValueError("SEQ 文件未打开，请先调用 open()")
+
+        # 每帧一份独立的像素副本，压缩任务进行时调用方可以继续修改 frame
+        pixels = np.empty_like(self._frame_buffer[1])
+        self._copy_frame(pixels, frame)
+        record = self._pack_timestamp(timestamp)
+
+        if self._executor is None:
+            self._write_compressed(compress_frame(pixels, self.compression_level), record)
+            return
+
+        self._pending.append((self._executor.submit(compress_frame, pixels, self.compression_level), record))
+        while len(self._pending) >= self.workers * READ_AHEAD_PER_WORKER:
+            self._write_pending()
+
+    def _write_pending(self):
+        """写出最早提交的一帧压缩结果"""
+        future, record = self._pending.popleft()
+        self._write_compressed(future.result(), record)
+
+    def _write_compressed(self, data, record):
+        """在文件末尾写入一个变长帧: [uint32 字节数(含这 4 字节)][压缩数据][8 字节时间戳]"""
+        nbytes = FRAME_SIZE_FIELD + len(data)
+        _pwrite(self.file_handle, struct.pack('<I', nbytes) + data + record, self._write_offset)
+        self._frame_offsets.append(self._write_offset)
+        self._frame_sizes.append(nbytes)
+        self._write_offset += nbytes + len(record)
+
+    def close(self):
+        """把文件截到最终大小，写入最终帧数（偏移 572）并关闭文件；压缩输出同时写出 .idx 帧索引"""
+        if self.file_handle is None:
+            return
+        compressed_count = None
+        try:
+            if self.compression:
+                try:
+                    while self._pending:
+                        self._write_pending()
+                finally:
+                    if self._executor is not None:
+                        self._executor.shutdown(wait=True, cancel_futures=True)
+                        self._executor = None
+                    self._pending.clear()
+                # frame_count 可能被调用方改小（如源文件被截断），多出的帧截掉
+                compressed_count = min(self.frame_count, len(self._frame_offsets))
+                end = (self._frame_offsets[compressed_count] if compressed_count < len(self._frame_offsets)
+                       else self._write_offset)
+                self.file_handle.truncate(end)
+                self.frame_count = compressed_count
+            else:
+                # 末帧的填充（以及预分配但未写入的帧）由截断处理
+                self.file_handle.truncate(self.frame_offset(self.frame_count))
+            _pwrite(self.file_handle, struct.pack('<I', self.frame_count), 572)  # 偏移 572: 分配的帧数
+        finally:
+            self.file_handle.close()
+            self.file_handle = None
+            self._frame_buffer = None
+
+        if compressed_count is not None:
+            # 索引以 SEQ 文件的大小和修改时间为键，必须在文件关闭后写入
+            save_frame_index(self.output_path, self._frame_offsets[:compressed_count],
+                             self._frame_sizes[:compressed_count])
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def _pack_timestamp(self, timestamp):
+        """将时间戳转换为 8 字节 NorPix 格式：4字节时间 + 2字节毫秒 + 2字节微秒"""
+        if timestamp is None:
+            timestamp = time.time()
+        elif isinstance(timestamp, datetime):
+            timestamp = timestamp.timestamp()
+        elif isinstance(timestamp, np.void):
+            timestamp = timestamp.tobytes()
+
+        if isinstance(timestamp, (bytes, bytearray, memoryview)):
+            if len(timestamp) != 8:
+                raise ValueError("时间戳记录必须为 8 字节")
+            return bytes(timestamp)
+
+        timestamp_us_total = int(round(float(timestamp) * 1_000_000))
+        timestamp_time_t, rest_us = divmod(timestamp_us_total, 1_000_000)
+        timestamp_ms, timestamp_us = divmod(rest_us, 1000)
+        return struct.pack('<IHH', timestamp_time_t, timestamp_ms, timestamp_us)
+
+    def write_images(self, image_paths, progress_callback=None, workers=1, should_stop=None):
         """
         将图像序列写入 SEQ 文件
 
+        workers > 1 时由线程池提前解码后续图像（PIL 解码时释放 GIL），
+        预读帧数有上限，写入仍严格按 image_paths 的顺序进行。
+
         Args:
             image_paths: 图像文件路径列表（已排序）
             progress_callback: 进度回调函数 callback(current, total)
+            workers: 并行解码线程数
+            should_stop: 返回 True 时中止写入
 
         Returns:
             bool: 是否成功
@@ -199,93 +558,37 @@ class SeqWriter:
             print("错误: 没有提供图像文件")
             return False
 
+        if self.bit_depth is not None and self.bit_depth not in (8, 16, 24):
+            print(f"错误: 不支持的位深度 {self.bit_depth}")
+            return False
+
         try:
             # 创建文件头
             print(f"正在创建 SEQ 文件头...")
-            header = self._create_header(image_paths[0])
-
-            # 打开输出文件
-            with open(self.output_path, 'wb') as f:
-                # 写入文件头
-                f.write(header)
+            self._detect_from_image(image_paths[0])
 
+            with self.open(frame_count=len(image_paths)):
                 # 写入每一帧
                 total_frames = len(image_paths)
                 print(f"开始写入 {total_frames} 帧图像数据...")
 
-                for i, img_path in enumerate(image_paths):
-                    try:
-                        # 读取图像
-                        with Image.open(img_path) as img:
-                            # 确保图像尺寸正确
-                            if img.size != (self.width, self.height):
-                                print(f"警告: 图像 {img_path} 尺寸 {img.size} 与预期 ({self.width}, {self.height}) 不符，将调整大小")
-                                img = img.resize((self.width, self.height), Image.LANCZOS)
-
-                            # 根据位深度转换图像
-                            if self.bit_depth == 8:
-                                # 灰度图
-                                if img.mode != 'L':
-                                    img = img.convert('L')
-                                img_array = np.array(img, dtype=np.uint8)
-                            elif self.bit_depth == 16:
-                                # 16 位灰度图
-                                if img.mode != 'I;16':
-                                    img = img.convert('L')
-                                    img_array = np.array(img, dtype=np.uint8)
-                                    img_array = img_array.astype(np.uint16) * 256
-                                else:
-                                    img_array = np.array(img, dtype=np.uint16)
-                            elif self.bit_depth == 24:
-                                # RGB 彩色图 -> BGR (SEQ 使用 BGR 顺序)
-                                if img.mode == 'RGBA':
-                                    img = img.convert('RGB')
-                                elif img.mode != 'RGB':
-                                    img = img.convert('RGB')
-                                img_array = np.array(img, dtype=np.uint8)
-                                # 转换 RGB -> BGR
-                                img_array = img_array[:, :, ::-1]
-                            else:
-                                print(f"错误: 不支持的位深度 {self.bit_depth}")
-                                return False
-
-                            # 写入图像数据
-                            img_bytes = img_array.tobytes()
-                            f.write(img_bytes)
-
-                            # 写入 8 字节时间戳（按照 NorPix 格式）
-                            # 时间戳格式：4字节时间 + 2字节毫秒 + 2字节微秒
-                            import time
-                            timestamp_time_t = int(time.time())
-                            timestamp_ms = int((time.time() - timestamp_time_t) * 1000)
-                            timestamp_us = 0  # 微秒部分设为 0
-
-                            f.write(struct.pack('<I', timestamp_time_t))  # 4 字节时间
-                            f.write(struct.pack('<H', timestamp_ms))      # 2 字节毫秒
-                            f.write(struct.pack('<H', timestamp_us))      # 2 字节微秒
-
-                            # 填充到 TrueImageSize
-                            bytes_written = len(img_bytes) + 8  # 图像数据 + 时间戳
-                            padding_size = self.true_image_size - bytes_written
-                            if padding_size > 0:
-                                f.write(b'\x00' * padding_size)
-
-                            self.frame_count += 1
-
-                            # 进度回调
-                            if progress_callback:
-                                progress_callback(i + 1, total_frames)
-
-                            if (i + 1) % 100 == 0 or (i + 1) == total_frames:
-                                print(f"已写入 {i + 1}/{total_frames} 帧")
-
-                    except Exception as e:
-                        print(f"错误: 处理图像 {img_path} 时出错: {e}")
+                for i, img_path, img_array, error in self._iter_decoded(image_paths, workers):
+                    if should_stop and should_stop():
+                        print("写入已取消")
+                        return False
+
+                    if error is not None:
+                        print(f"错误: 处理图像 {img_path} 时出错: {error}")
                         return False
 
-                # 更新文件头中的帧数
-                f.seek(572)  # 偏移 572: 分配的帧数
-                f.write(struct.pack('<I', self.frame_count))
+                    self.append(img_array)
+
+                    # 进度回调
+                    if progress_callback:
+                        progress_callback(i + 1, total_frames)
+
+                    if (i + 1) % 100 == 0 or (i + 1) == total_frames:
+                        print(f"已写入 {i + 1}/{total_frames} 帧")
 
             print(f"\n成功创建 SEQ 文件: {self.output_path}")
             print(f"总帧数: {self.frame_count}")
@@ -299,6 +602,43 @@ class SeqWriter:
             print(f"错误: 写入 SEQ 文件时出错: {e}")
             return False
 
+    def _iter_decoded(self, image_paths, workers=1):
+        """
+        按顺序产出 (序号, 路径, 图像数组, 错误)
+
+        workers > 1 时最多有 workers * READ_AHEAD_PER_WORKER 张图像在解码或等待写入，
+        内存占用与总帧数无关。
+        """
+        args = (self.width, self.height, self.bit_depth)
+
+        if workers <= 1:
+            for i, img_path in enumerate(image_paths):
+                try:
+                    yield i, img_path, load_image_array(img_path, *args), None
+                except Exception as e:
+                    yield i, img_path, None, e
+            return
+
+        max_pending = workers * READ_AHEAD_PER_WORKER
+        executor = ThreadPoolExecutor(max_workers=workers)
+        pending = deque()
+        next_index = 0
+        try:
+            for i, img_path in enumerate(image_paths):
+                # 补满预读队列
+                while next_index < len(image_paths) and len(pending) < max_pending:
+                    pending.append(executor.submit(load_image_array, image_paths[next_index], *args))
+                    next_index += 1
+
+                future = pending.popleft()
+                try:
+                    yield i, img_path, future.result(), None
+                except Exception as e:
+                    yield i, img_path, None, e
+        finally:
+            # 中途退出（出错或取消）时丢弃尚未开始的解码任务
+            executor.shutdown(wait=True, cancel_futures=True)
+
 
 def get_sequence_number(filename):
     """
@@ -327,7 +667,8 @@ def get_sequence_number(filename):
 
 def images_to_seq(input_directory, output_seq_file, image_format='png',
                   width=None, height=None, bit_depth=8, frame_rate=30.0,
-                  start_frame=None, end_frame=None):
+                  start_frame=None, end_frame=None, workers=1, alignment=DEFAULT_FRAME_ALIGNMENT,
+                  compression=None):
     """
     将图像序列转换为 SEQ 文件
 
@@ -341,6 +682,9 @@ def images_to_seq(input_directory, output_seq_file, image_format='png',
         frame_rate: 帧率
         start_frame: 起始帧号（None 为从头开始）
         end_frame: 结束帧号（None 为到末尾）
+        workers: 并行解码（以及压缩）线程数
+        alignment: 帧块对齐字节数（见 SeqWriter）
+        compression: None 为不压缩，'zlib' 为逐帧无损压缩（见 SeqWriter）
 
     Returns:
         bool: 是否成功
@@ -380,13 +724,14 @@ def images_to_seq(input_directory, output_seq_file, image_format='png',
     image_paths = [os.path.join(input_directory, f) for f in image_files]
 
     # 创建 SeqWriter 并写入
-    writer = SeqWriter(output_seq_file, width, height, bit_depth, frame_rate)
+    writer = SeqWriter(output_seq_file, width, height, bit_depth, frame_rate, alignment,
+                       compression=compression, workers=workers)
 
     def progress_callback(current, total):
         percent = (current / total) * 100
         print(f"\r进度: {current}/{total} ({percent:.1f}%)", end='', flush=True)
 
-    success = writer.write_images(image_paths, progress_callback)
+    success = writer.write_images(image_paths, progress_callback, workers=workers)
     print()  # 换行
 
     return success
@@ -409,6 +754,12 @@ def main():
                        help='帧率 (默认: 30.0)')
     parser.add_argument('-s', '--start', type=int, help='起始帧号')
     parser.add_argument('-e', '--end', type=int, help='结束帧号')
+    parser.add_argument('-j', '--workers', type=int, default=os.cpu_count() or 1,
+                       help='并行解码线程数 (默认: CPU 核数)')
+    parser.add_argument('--compact', action='store_true',
+                       help=f'紧凑输出: 帧块按 {COMPACT_FRAME_ALIGNMENT} 字节而不是 {DEFAULT_FRAME_ALIGNMENT} 字节对齐')
+    parser.add_argument('--compress', action='store_true',
+                       help='逐帧 zlib 无损压缩，并写出 .idx 帧索引（仅本工具可读取）')
 
     args = parser.parse_args()
 
@@ -421,7 +772,10 @@ def main():
         args.bitdepth,
         args.framerate,
         args.start,
-        args.end
+        args.end,
+        args.workers,
+        COMPACT_FRAME_ALIGNMENT if args.compact else DEFAULT_FRAME_ALIGNMENT,
+        'zlib' if args.compress else None
     )
 
     return 0 if success else 1
@@ -38,6 +38,51 @@ def get_sequence_number(filename):
     return float('inf')
 
 
+def resolve_video_codec(video_codec, output_video_file):
+    """
+    'auto' 时根据输出文件扩展名选择编码器
+
+    Returns:
+        str: 编码器名称
+    """
+    if video_codec != 'auto':
+        return video_codec
+
+    output_ext = os.path.splitext(output_video_file)[1].lower()
+    if output_ext == '.avi':
+        return 'libxvid'
+    if output_ext not in ['.mp4', '.mov']:
+        print(f"警告: 未识别的输出格式 '{output_ext}'，使用默认编码器 libx264")
+    return 'libx264'
+
+
+def video_output_options(video_codec, quality):
+    """
+    返回 ffmpeg.output 的编码参数
+
+    Args:
+        video_codec: 编码器名称（已解析，不能为 'auto'）
+        quality: 视频质量 ('low', 'medium', 'high', 'best')
+    """
+    # 根据质量设置确定 CRF 值（仅对 libx264/libx265 有效）
+    crf_values = {
+        'low': 28,
+        'medium': 23,
+        'high': 18,
+        'best': 15
+    }
+    crf = crf_values.get(quality, 23)
+
+    if video_codec == 'libxvid':
+        # MPEG-4 (XVID) for AVI
+        return dict(vcodec='libxvid', pix_fmt='yuv420p', qscale=5)  # qscale: 1-31, lower = better
+    if video_codec in ['libx264', 'libx265']:
+        # H.264 or H.265 for MP4/MOV
+        return dict(vcodec=video_codec, pix_fmt='yuv420p', crf=crf, preset='medium')
+    # 通用编码器
+    return dict(vcodec=video_codec, pix_fmt='yuv420p')
+
+
 def convert_images_to_video(input_directory, output_video_file,
                            image_format='all', frame_rate=30,
                            video_codec='auto', quality='high',
@@ -149,27 +194,9 @@ def convert_images_to_video(input_directory, output_video_file,
     print(f"FFmpeg 输入模式: {input_pattern}")
 
     # 确定视频编码器
-    if video_codec == 'auto':
-        output_ext = os.path.splitext(output_video_file)[1].lower()
-        if output_ext == '.avi':
-            video_codec = 'libxvid'
-        elif output_ext in ['.mp4', '.mov']:
-            video_codec = 'libx264'
-        else:
-            video_codec = 'libx264'  # 默认
-            print(f"警告: 未识别的输出格式 '{output_ext}'，使用默认编码器 libx264")
-
+    video_codec = resolve_video_codec(video_codec, output_video_file)
     print(f"使用编码器: {video_codec}")
 
-    # 根据质量设置确定 CRF 值（仅对 libx264/libx265 有效）
-    crf_values = {
-        'low': 28,
-        'medium': 23,
-        'high': 18,
-        'best': 15
-    }
-    crf = crf_values.get(quality, 23)
-
     try:
         print(f"开始转换为视频 (帧率: {frame_rate} fps, 质量: {quality})...")
 
@@ -177,24 +204,7 @@ def convert_images_to_video(input_directory, output_video_file,
         stream = ffmpeg.input(input_pattern, framerate=frame_rate)
 
         # 根据编码器选择输出参数
-        if video_codec == 'libxvid':
-            # MPEG-4 (XVID) for AVI
-            stream = ffmpeg.output(stream, output_video_file,
-                                 vcodec='libxvid',
-                                 pix_fmt='yuv420p',
-                                 qscale=5)  # qscale: 1-31, lower = better
-        elif video_codec in ['libx264', 'libx265']:
-            # H.264 or H.265 for MP4/MOV
-            stream = ffmpeg.output(stream, output_video_file,
-                                 vcodec=video_codec,
-                                 pix_fmt='yuv420p',
-                                 crf=crf,
-                                 preset='medium')
-        else:
-            # 通用编码器
-            stream = ffmpeg.output(stream, output_video_file,
-                                 vcodec=video_codec,
-                                 pix_fmt='yuv420p')
+        stream = ffmpeg.output(stream, output_video_file, **video_output_options(video_codec, quality))
 
         # 执行转换
         ffmpeg.run(stream, overwrite_output=True, capture_stdout=True, capture_stderr=True)
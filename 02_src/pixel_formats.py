@@ -0,0 +1,103 @@
+"""
+打包的 10/12 位单色像素格式
+- Mono12Packed / Mono10Packed (GigE Vision): 每 3 字节 2 个像素，高位在独立字节中
+- Mono12p / Mono10p (GenICam PFNC): 低位在前的连续位流，12 位每 3 字节 2 像素，10 位每 5 字节 4 像素
+- 整批帧一次向量化解包为 uint16，不逐像素循环
+"""
+
+import numpy as np
+
+
+# 格式名 -> (有效位数, 每组像素数, 每组字节数)
+PACKED_FORMATS = {
+    'Mono12Packed': (12, 2, 3),
+    'Mono12p': (12, 2, 3),
+    'Mono10Packed': (10, 2, 3),
+    'Mono10p': (10, 4, 5),
+}
+
+# 头部只给出位深度时默认采用的格式
+DEFAULT_PACKED_FORMATS = {
+    12: 'Mono12Packed',
+    10: 'Mono10Packed',
+}
+
+# 以 16 位容器存放时可识别的有效位深度
+CONTAINER_BIT_DEPTHS = (10, 12, 14)
+
+
+def packed_size(pixel_format, pixel_count):
+    """pixel_count 个像素按 pixel_format 打包后的字节数"""
+    _, group_pixels, group_bytes = PACKED_FORMATS[pixel_format]
+    return -(-pixel_count // group_pixels) * group_bytes
+
+
+def resolve_pixel_format(bit_depth, width, height, image_size_bytes, pixel_format=None):
+    """
+    由文件头的位深度与单帧字节数判断 10/12/14 位数据的存放方式
+
+    Args:
+        bit_depth: 头部的有效位深度
+        width, height: 帧尺寸
+        image_size_bytes: 头部的单帧字节数
+        pixel_format: 指定的打包格式（None 为按位深度取默认格式）
+
+    Returns:
+        (packed_format, significant_bits): 打包格式（16 位容器存放时为 None）与有效位数；
+        无法识别时返回 (None, None)
+    """
+    pixel_count = width * height
+    if bit_depth in CONTAINER_BIT_DEPTHS and image_size_bytes == pixel_count * 2:
+        return None, bit_depth
+
+    candidates = [pixel_format] if pixel_format else [DEFAULT_PACKED_FORMATS.get(bit_depth)]
+    for name in candidates:
+        if name not in PACKED_FORMATS:
+            continue
+        bits = PACKED_FORMATS[name][0]
+        if bits == bit_depth and image_size_bytes == packed_size(name, pixel_count):
+            return name, bits
+    return None, None
+
+
+def unpack_frames(raw, pixel_format, height, width):
+    """
+    解包一帧或一批帧
+
+    Args:
+        raw: 形状为 (..., 单帧字节数) 的 uint8 数组（可以是跨帧块的跨步视图）
+        pixel_format: PACKED_FORMATS 中的格式名
+        height, width: 帧尺寸
+
+    Returns:
+        ndarray: 形状为 (..., height, width) 的 uint16 数组
+    """
+    _, group_pixels, group_bytes = PACKED_FORMATS[pixel_format]
+    pixel_count = height * width
+    groups = -(-pixel_count // group_pixels)
+
+    raw = np.asarray(raw, dtype=np.uint8)
+    lead_shape = raw.shape[:-1]
+    packed = raw[..., :groups * group_bytes].reshape(lead_shape + (groups, group_bytes))
+    b = [packed[..., k].astype(np.uint16) for k in range(group_bytes)]
+
+    out = np.empty(lead_shape + (groups, group_pixels), dtype=np.uint16)
+    if pixel_format == 'Mono12Packed':
+        out[..., 0] = (b[0] << 4) | (b[1] & 0x0F)
+        out[..., 1] = (b[2] << 4) | (b[1] >> 4)
+    elif pixel_format == 'Mono12p':
+        out[..., 0] = b[0] | ((b[1] & 0x0F) << 8)
+        out[..., 1] = (b[1] >> 4) | (b[2] << 4)
+    elif pixel_format == 'Mono10Packed':
+        out[..., 0] = (b[0] << 2) | (b[1] & 0x03)
+        out[..., 1] = (b[2] << 2) | ((b[1] >> 4) & 0x03)
+    else:  # Mono10p
+        out[..., 0] = b[0] | ((b[1] & 0x03) << 8)
+        out[..., 1] = (b[1] >> 2) | ((b[2] & 0x0F) << 6)
+        out[..., 2] = (b[2] >> 4) | ((b[3] & 0x3F) << 4)
+        out[..., 3] = (b[3] >> 6) | (b[4] << 2)
+
+    pixels = out.reshape(lead_shape + (groups * group_pixels,))
+    if groups * group_pixels != pixel_count:
+        pixels = pixels[..., :pixel_count]
+    return pixels.reshape(lead_shape + (height, width))
@@ -0,0 +1,184 @@
+"""
+压缩 / 变长帧 SEQ 支持
+- 头部压缩字段（偏移 624）与图像格式代码的识别
+- 变长帧的帧偏移索引：一次扫描建立，并以 .idx 旁路文件持久化
+- 单帧解码
+- 本工具写出的逐帧 zlib 无损压缩（每帧独立压缩，配合帧偏移索引随机访问）
+"""
+
+import io
+import os
+import zlib
+import struct
+import numpy as np
+from PIL import Image
+
+
+# 压缩格式 (头部偏移 624)
+COMPRESSION_NONE = 0
+COMPRESSION_JPEG = 1
+COMPRESSION_RLE = 2
+# 本工具自定义的代码（StreamPix 不使用）: 每帧的像素数据按未压缩帧的排列（24 位为 BGR）整体 zlib 压缩
+COMPRESSION_ZLIB = 1000
+
+# 写入时可选的压缩方式 -> 头部代码
+COMPRESSION_CODECS = {'zlib': COMPRESSION_ZLIB}
+
+# zlib 压缩级别: 1 最快，大片平坦背景的帧已能压缩数倍
+ZLIB_DEFAULT_LEVEL = 1
+
+# 图像格式 (头部偏移 568) 中表示压缩帧的代码
+JPEG_IMAGE_FORMATS = (102, 201)
+PNG_IMAGE_FORMATS = (1, 2)
+
+# 变长帧布局: [uint32 字节数(含这 4 字节)] [压缩数据] [8 字节时间戳]
+FRAME_SIZE_FIELD = 4
+TIMESTAMP_SIZE = 8
+
+# .idx 旁路文件
+INDEX_MAGIC = b'SEQIDX01'
+INDEX_HEADER = struct.Struct('<8sQQQ')  # magic, 文件大小, mtime_ns, 帧数
+
+
+def is_variable_size(compression, image_format):
+    """帧大小是否逐帧不同（需要帧偏移索引）"""
+    return compression != COMPRESSION_NONE or image_format in JPEG_IMAGE_FORMATS + PNG_IMAGE_FORMATS
+
+
+def index_path_for(seq_file_path):
+    return seq_file_path + '.idx'
+
+
+def _file_key(seq_file_path):
+    st = os.stat(seq_file_path)
+    return st.st_size, st.st_mtime_ns
+
+
+def load_frame_index(seq_file_path):
+    """
+    读取 .idx 旁路文件
+
+    Returns:
+        (offsets, sizes) 或 None（不存在、损坏或与 SEQ 文件的大小/修改时间不匹配）
+    """
+    idx_path = index_path_for(seq_file_path)
+    if not os.path.exists(idx_path):
+        return None
+
+    try:
+        with open(idx_path, 'rb') as f:
+            magic, file_size, mtime_ns, count = INDEX_HEADER.unpack(f.read(INDEX_HEADER.size))
+            if magic != INDEX_MAGIC or (file_size, mtime_ns) != _file_key(seq_file_path):
+                return None
+            offsets = np.fromfile(f, dtype='<u8', count=count)
+            sizes = np.fromfile(f, dtype='<u4', count=count)
+        if len(offsets) != count or len(sizes) != count:
+            return None
+        return offsets, sizes
+    except (OSError, struct.error, ValueError):
+        return None
+
+
+def save_frame_index(seq_file_path, offsets, sizes):
+    """写入 .idx 旁路文件，目录不可写时静默跳过"""
+    file_size, mtime_ns = _file_key(seq_file_path)
+    try:
+        with open(index_path_for(seq_file_path), 'wb') as f:
+            f.write(INDEX_HEADER.pack(INDEX_MAGIC, file_size, mtime_ns, len(offsets)))
+            np.asarray(offsets, dtype='<u8').tofile(f)
+            np.asarray(sizes, dtype='<u4').tofile(f)
+        return True
+    except OSError as e:
+        print(f"警告: 无法写入帧索引文件: {e}")
+        return False
+
+
+def compress_frame(pixels, level=ZLIB_DEFAULT_LEVEL):
+    """
+    压缩一帧的像素数据（按存储顺序排列的连续数组或字节串）
+
+    zlib 压缩时释放 GIL，可在多个线程中并发调用。
+    """
+    return zlib.compress(memoryview(pixels).cast('B'), level)
+
+
+def _looks_like_frame(f, offset, file_size, image_format):
+    """检查 offset 处是否像一个合法的变长帧起点"""
+    if offset + FRAME_SIZE_FIELD > file_size:
+        return False
+    f.seek(offset)
+    head = f.read(FRAME_SIZE_FIELD + 2)
+    if len(head) < FRAME_SIZE_FIELD:
+        return False
+    nbytes = struct.unpack('<I', head[:FRAME_SIZE_FIELD])[0]
+    if nbytes <= FRAME_SIZE_FIELD or offset + nbytes + TIMESTAMP_SIZE > file_size:
+        return False
+    if image_format in JPEG_IMAGE_FORMATS:
+        return head[FRAME_SIZE_FIELD:] == b'\xff\xd8'
+    return True
+
+
+def build_frame_index(seq_file_path, header_size, image_format, max_frames=None):
+    """
+    一次顺序扫描建立变长帧的偏移索引
+
+    每帧只读取 4 字节长度字段，然后跳过数据。帧后除 8 字节时间戳外，
+    部分版本还有额外的填充字节，由前两帧自动探测。
+
+    Returns:
+        (offsets, sizes): 每帧起点偏移 (uint64) 与长度字段值 (uint32，含长度字段本身)
+    """
+    file_size = os.path.getsize(seq_file_path)
+    offsets = []
+    sizes = []
+
+    with open(seq_file_path, 'rb') as f:
+        offset = header_size
+        extra = None
+        while offset + FRAME_SIZE_FIELD <= file_size:
+            if max_frames is not None and len(offsets) >= max_frames:
+                break
+            f.seek(offset)
+            nbytes = struct.unpack('<I', f.read(FRAME_SIZE_FIELD))[0]
+            if nbytes <= FRAME_SIZE_FIELD or offset + nbytes + TIMESTAMP_SIZE > file_size:
+                break
+
+            if extra is None:
+                # 探测时间戳之后的额外字节数
+                for candidate in (0, 4, 8):
+                    next_offset = offset + nbytes + TIMESTAMP_SIZE + candidate
+                    if next_offset >= file_size or _looks_like_frame(f, next_offset, file_size, image_format):
+                        extra = candidate
+                        break
+                else:
+                    extra = 0
+
+            offsets.append(offset)
+            sizes.append(nbytes)
+            offset += nbytes + TIMESTAMP_SIZE + extra
+
+    return np.array(offsets, dtype=np.uint64), np.array(sizes, dtype=np.uint32)
+
+
+def decode_frame(data, compression, image_format, shape, dtype):
+    """
+    解码一个变长帧的数据部分（不含长度字段和时间戳）
+
+    Returns:
+        ndarray，形状为 shape
+    """
+    if image_format in JPEG_IMAGE_FORMATS + PNG_IMAGE_FORMATS or compression == COMPRESSION_JPEG:
+        with Image.open(io.BytesIO(data)) as img:
+            img_array = np.asarray(img, dtype=dtype)
+        if img_array.shape != shape:
+            if len(shape) == 3 and img_array.ndim == 2:
+                img_array = np.repeat(img_array[:, :, None], 3, axis=2)
+            else:
+                img_array = img_array.reshape(shape)
+        return img_array
+
+    if compression == COMPRESSION_ZLIB:
+        nbytes = int(np.prod(shape)) * np.dtype(dtype).itemsize
+        return np.frombuffer(zlib.decompress(data, bufsize=nbytes), dtype=dtype).reshape(shape)
+
+    raise ValueError(f"不支持的压缩格式: {compression}")
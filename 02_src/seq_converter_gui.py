@@ -4,19 +4,21 @@
 - SEQ → PNG/BMP/TIFF
 - PNG/BMP/TIFF → SEQ
 - PNG/BMP/TIFF → AVI/MP4/MOV
+- SEQ ROI 裁剪、帧段截取与分割
 """
 
 import sys
 import os
+import multiprocessing
 from pathlib import Path
 from PyQt5.QtWidgets import QApplication, QWidget, QFileDialog, QTextEdit
 from PyQt5.QtCore import Qt, QThread, pyqtSignal
-from PyQt5.QtGui import QIcon, QPixmap, QColor
+from PyQt5.QtGui import QIcon, QPixmap, QColor, QImage
 from qfluentwidgets import (
     PushButton, LineEdit, SpinBox, ComboBox, ProgressBar, DoubleSpinBox,
     setTheme, Theme, FluentIcon, InfoBar, InfoBarPosition,
     CardWidget, BodyLabel, StrongBodyLabel, TransparentPushButton,
-    Pivot, qrouter, SegmentedWidget
+    Pivot, qrouter, SegmentedWidget, ListWidget, CheckBox
 )
 from PyQt5.QtWidgets import QVBoxLayout, QHBoxLayout, QGridLayout, QStackedWidget, QLabel
 from PyQt5.QtGui import QPainter, QPen, QFont
@@ -24,9 +26,22 @@ from PyQt5.QtCore import QRect, QPoint
 
 # 导入转换模块
 from seq_to_png import SeqReader
-from images_to_seq import SeqWriter, get_sequence_number as get_seq_number
+from images_to_seq import (SeqWriter, get_sequence_number as get_seq_number,
+                           DEFAULT_FRAME_ALIGNMENT, COMPACT_FRAME_ALIGNMENT)
 from images_to_video import convert_images_to_video
-from seq_to_seq import SeqCropper
+from seq_to_video import seq_to_video
+from seq_to_seq import SeqCropper, extract_seq_frames, split_seq_file
+
+
+# “图像 → SEQ/视频”界面中直接读取 SEQ 编码视频的输出类型
+SEQ_TO_VIDEO_TYPE = 'SEQ → 视频'
+
+# 16 位转 8 位映射方式（界面文字 → seq_tone_mapping 中的方式）
+TONE_MAPPING_OPTIONS = {
+    '取高 8 位': 'shift',
+    '最小/最大值窗口': 'minmax',
+    '百分位窗口': 'percentile',
+}
 
 
 def resource_path(relative_path):
@@ -223,7 +238,8 @@ class SeqToImagesThread(QThread):
     finished = pyqtSignal(bool, str)
     log = pyqtSignal(str)
 
-    def __init__(self, seq_file, output_dir, start_frame, end_frame, prefix, format='PNG'):
+    def __init__(self, seq_file, output_dir, start_frame, end_frame, prefix, format='PNG', workers=1,
+                 tone_mapping='shift'):
         super().__init__()
         self.seq_file = seq_file
         self.output_dir = output_dir
@@ -231,6 +247,8 @@ class SeqToImagesThread(QThread):
         self.end_frame = end_frame
         self.prefix = prefix
         self.format = format
+        self.workers = workers
+        self.tone_mapping = tone_mapping
         self._is_running = True
 
     def run(self):
@@ -251,75 +269,43 @@ class SeqToImagesThread(QThread):
                 return
 
             self.format = self.format.upper()
-            if self.format not in ["PNG", "TIFF", "BMP"]:
+            if self.format not in ["PNG", "TIFF", "BMP", "BIGTIFF", "NPY", "HDF5"]:
                 self.finished.emit(False, f"不支持的图像格式 '{self.format}'")
                 return
 
-            ext = self.format.lower()
-            if self.format == "TIFF":
-                ext = "tif"
+            if reader.bit_depth not in (8, 16, 24):
+                self.finished.emit(False, f"不支持的位深度 ({reader.bit_depth})")
+                return
 
             self.log.emit(f"开始转换: 帧 {self.start_frame} 到 {self.end_frame-1} (共 {self.end_frame - self.start_frame} 帧)")
 
             if not os.path.exists(self.output_dir):
                 os.makedirs(self.output_dir)
 
-            bytes_per_pixel = reader.bit_depth // 8
-            if reader.bit_depth % 8 != 0:
-                bytes_per_pixel += 1
-
-            expected_image_size = reader.width * reader.height * bytes_per_pixel
-            frame_size = reader.true_image_size if reader.true_image_size > 0 else expected_image_size
-
-            import numpy as np
-            from PIL import Image
-
-            with open(self.seq_file, 'rb') as f:
-                for frame_num in range(self.start_frame, self.end_frame):
-                    if not self._is_running:
-                        self.finished.emit(False, "转换已取消")
-                        return
-
-                    # 使用修正后的逻辑：跳转到帧位置，只读取图像数据部分
-                    offset = reader.header_size + frame_num * frame_size
-                    f.seek(offset)
-
-                    # 只读取精确的图像数据，忽略时间戳和填充
-                    frame_data = f.read(reader.image_size_bytes)
-
-                    if len(frame_data) < reader.image_size_bytes:
-                        self.log.emit(f"警告: 帧 {frame_num} 数据不完整，跳过")
-                        continue
-
-                    # 处理不同位深度（现在 frame_data 只包含图像数据，不含时间戳和填充）
-                    try:
-                        if reader.bit_depth == 8:
-                            img_array = np.frombuffer(frame_data, dtype=np.uint8).reshape((reader.height, reader.width))
-                            img = Image.fromarray(img_array, mode='L')
-                        elif reader.bit_depth == 16:
-                            img_array = np.frombuffer(frame_data, dtype=np.uint16).reshape((reader.height, reader.width))
-                            if self.format == 'TIFF':
-                                img = Image.fromarray(img_array, mode='I;16')
-                            else:
-                                img_array_8bit = (img_array / 256).astype(np.uint8)
-                                img = Image.fromarray(img_array_8bit, mode='L')
-                        elif reader.bit_depth == 24:
-                            img_array = np.frombuffer(frame_data, dtype=np.uint8).reshape((reader.height, reader.width, 3))
-                            img = Image.fromarray(img_array, mode='RGB')
-                        else:
-                            self.log.emit(f"警告: 帧 {frame_num} 的位深度不受支持 ({reader.bit_depth})，已跳过")
-                            continue
-                    except ValueError as ve:
-                        self.log.emit(f"错误: 处理帧 {frame_num} 时发生数据错误 (可能尺寸不匹配): {ve}")
-                        continue
-
-                    output_filename = f"{self.prefix}_{frame_num:06d}.{ext}"
-                    output_path = os.path.join(self.output_dir, output_filename)
-                    img.save(output_path, format=self.format)
-
-                    self.progress.emit(frame_num - self.start_frame + 1, self.end_frame - self.start_frame)
-
-            self.finished.emit(True, f"成功转换 {self.end_frame - self.start_frame} 帧!")
+            if self.workers > 1:
+                self.log.emit(f"使用 {self.workers} 个进程并行编码")
+
+            def progress_callback(current, total):
+                self.progress.emit(current, total)
+
+            saved = reader.extract_frames(
+                self.output_dir,
+                start_frame=self.start_frame,
+                end_frame=self.end_frame,
+                prefix=self.prefix,
+                format=self.format,
+                workers=self.workers,
+                tone_mapping=self.tone_mapping,
+                progress_callback=progress_callback,
+                should_stop=lambda: not self._is_running
+            )
+            reader.close()
+
+            if not self._is_running:
+                self.finished.emit(False, "转换已取消")
+                return
+
+            self.finished.emit(True, f"成功转换 {saved} 帧!")
 
         except Exception as e:
             import traceback
@@ -387,7 +373,9 @@ class ImagesToSeqThread(QThread):
                     self.progress.emit(current, total)
 
             self.log.emit("开始写入 SEQ 文件...")
-            success = writer.write_images(image_paths, progress_callback)
+            success = writer.write_images(image_paths, progress_callback,
+                                          workers=os.cpu_count() or 1,
+                                          should_stop=lambda: not self._is_running)
 
             if success:
                 self.finished.emit(True, f"成功创建 SEQ 文件，共 {len(image_files)} 帧")
@@ -452,20 +440,81 @@ class ImagesToVideoThread(QThread):
         self._is_running = False
 
 
+class SeqToVideoThread(QThread):
+    """SEQ → 视频直接转换线程（经 ffmpeg 管道，无中间文件）"""
+    progress = pyqtSignal(int, int)
+    finished = pyqtSignal(bool, str)
+    log = pyqtSignal(str)
+
+    def __init__(self, seq_file, output_file, frame_rate, video_codec, quality, start_frame, end_frame,
+                 tone_mapping='shift'):
+        super().__init__()
+        self.tone_mapping = tone_mapping
+        self.seq_file = seq_file
+        self.output_file = output_file
+        self.frame_rate = frame_rate
+        self.video_codec = video_codec
+        self.quality = quality
+        self.start_frame = start_frame
+        self.end_frame = end_frame
+        self._is_running = True
+
+    def run(self):
+        try:
+            self.log.emit("开始将 SEQ 直接编码为视频...")
+
+            def progress_callback(current, total):
+                self.progress.emit(current, total)
+
+            success = seq_to_video(
+                self.seq_file,
+                self.output_file,
+                self.frame_rate,
+                self.video_codec,
+                self.quality,
+                self.start_frame,
+                self.end_frame,
+                progress_callback=progress_callback,
+                should_stop=lambda: not self._is_running,
+                tone_mapping=self.tone_mapping
+            )
+
+            if success:
+                self.finished.emit(True, "成功创建视频文件")
+            elif not self._is_running:
+                self.finished.emit(False, "转换已取消")
+            else:
+                self.finished.emit(False, "视频转换失败")
+
+        except Exception as e:
+            import traceback
+            error_msg = f"转换失败: {str(e)}\n{traceback.format_exc()}"
+            self.log.emit(error_msg)
+            self.finished.emit(False, str(e))
+
+    def stop(self):
+        self._is_running = False
+
+
 class SeqRoiCropThread(QThread):
-    """SEQ ROI 裁剪线程"""
+    """SEQ ROI 裁剪线程（多个 ROI 一次读取源文件完成）"""
     progress = pyqtSignal(int, int)
     finished = pyqtSignal(bool, str)
     log = pyqtSignal(str)
 
-    def __init__(self, input_seq, output_seq, roi_center_x, roi_center_y, roi_width, roi_height):
+    def __init__(self, input_seq, rois, alignment=DEFAULT_FRAME_ALIGNMENT, compression=None):
+        """
+        Args:
+            input_seq: 输入 SEQ 文件
+            rois: [(output_seq, roi_center_x, roi_center_y, roi_width, roi_height), ...]
+            alignment: 输出帧块的对齐字节数
+            compression: None 为不压缩，'zlib' 为逐帧无损压缩
+        """
         super().__init__()
         self.input_seq = input_seq
-        self.output_seq = output_seq
-        self.roi_center_x = roi_center_x
-        self.roi_center_y = roi_center_y
-        self.roi_width = roi_width
-        self.roi_height = roi_height
+        self.rois = rois
+        self.alignment = alignment
+        self.compression = compression
         self._is_running = True
 
     def run(self):
@@ -480,27 +529,42 @@ class SeqRoiCropThread(QThread):
 
             self.log.emit(f"原始图像尺寸: {cropper.reader.width} x {cropper.reader.height}")
             self.log.emit(f"总帧数: {cropper.reader.frame_count}")
-            self.log.emit(f"ROI 中心: ({self.roi_center_x}, {self.roi_center_y})")
-            self.log.emit(f"ROI 尺寸: {self.roi_width} x {self.roi_height}")
+            for i, (output_seq, roi_center_x, roi_center_y, roi_width, roi_height) in enumerate(self.rois):
+                self.log.emit(f"ROI {i + 1}: 中心 ({roi_center_x}, {roi_center_y}), 尺寸 {roi_width} x {roi_height}"
+                              f" -> {os.path.basename(output_seq)}")
 
             def progress_callback(current, total):
                 if self._is_running:
                     self.progress.emit(current, total)
 
             self.log.emit("开始裁剪...")
-            success, roi_x, roi_y, message = cropper.crop_to_new_seq(
-                self.output_seq,
-                self.roi_center_x,
-                self.roi_center_y,
-                self.roi_width,
-                self.roi_height,
-                progress_callback
+            results = cropper.crop_to_multiple_seqs(
+                self.rois,
+                progress_callback,
+                workers=os.cpu_count() or 1,
+                alignment=self.alignment,
+                compression=self.compression
             )
 
-            if success:
-                self.finished.emit(True, f"裁剪成功!\nROI 左上角坐标: ({roi_x}, {roi_y})\n{message}")
+            # 逐个 ROI 汇报结果
+            failed = 0
+            for i, (success, roi_x, roi_y, message) in enumerate(results):
+                if success:
+                    self.log.emit(f"ROI {i + 1} 裁剪成功: {self.rois[i][0]}\nROI 左上角坐标: ({roi_x}, {roi_y})")
+                else:
+                    failed += 1
+                    self.log.emit(f"ROI {i + 1} 裁剪失败: {message}")
+
+            if len(results) == 1:
+                success, roi_x, roi_y, message = results[0]
+                if success:
+                    self.finished.emit(True, f"裁剪成功!\nROI 左上角坐标: ({roi_x}, {roi_y})\n{message}")
+                else:
+                    self.finished.emit(False, message)
+            elif failed == 0:
+                self.finished.emit(True, f"裁剪成功! 共 {len(results)} 个 ROI")
             else:
-                self.finished.emit(False, message)
+                self.finished.emit(False, f"{failed}/{len(results)} 个 ROI 裁剪失败，详见日志")
 
         except Exception as e:
             import traceback
@@ -512,6 +576,65 @@ class SeqRoiCropThread(QThread):
         self._is_running = False
 
 
+class SeqBlockCopyThread(QThread):
+    """SEQ 帧段截取 / 分割线程（帧块原样复制，不解码）"""
+    progress = pyqtSignal(int, int)
+    finished = pyqtSignal(bool, str)
+    log = pyqtSignal(str)
+
+    def __init__(self, input_seq, output, split, start_frame, end_frame, part_bytes):
+        """
+        Args:
+            input_seq: 输入 SEQ 文件
+            output: 截取时为输出 SEQ 文件，分割时为输出目录
+            split: True 为按大小分割，False 为截取帧段
+            start_frame / end_frame: 截取的帧范围（结束帧不含，None 为到末尾）
+            part_bytes: 分割时每个分段的大小上限（字节）
+        """
+        super().__init__()
+        self.input_seq = input_seq
+        self.output = output
+        self.split = split
+        self.start_frame = start_frame
+        self.end_frame = end_frame
+        self.part_bytes = part_bytes
+        self._is_running = True
+
+    def run(self):
+        try:
+            def progress_callback(current, total):
+                if self._is_running:
+                    self.progress.emit(current, total)
+
+            if self.split:
+                self.log.emit(f"开始分割，每段不超过 {self.part_bytes / 1024 ** 3:.2f} GB...")
+                parts = split_seq_file(self.input_seq, self.output, self.part_bytes,
+                                       progress_callback=progress_callback)
+                for part in parts:
+                    self.log.emit(f"输出: {part}")
+                if parts:
+                    self.finished.emit(True, f"分割完成，共 {len(parts)} 个分段")
+                else:
+                    self.finished.emit(False, "分割失败")
+            else:
+                self.log.emit("开始截取帧段...")
+                success = extract_seq_frames(self.input_seq, self.output, self.start_frame, self.end_frame,
+                                             progress_callback=progress_callback)
+                if success:
+                    self.finished.emit(True, f"截取完成: {self.output}")
+                else:
+                    self.finished.emit(False, "截取失败")
+
+        except Exception as e:
+            import traceback
+            error_msg = f"处理失败: {str(e)}\n{traceback.format_exc()}"
+            self.log.emit(error_msg)
+            self.finished.emit(False, str(e))
+
+    def stop(self):
+        self._is_running = False
+
+
 class ConverterGUI(QWidget):
     def __init__(self):
         super().__init__()
@@ -563,6 +686,7 @@ class ConverterGUI(QWidget):
         self.mode_pivot.addItem(routeKey='seq_to_images', text='SEQ → 图像', onClick=lambda: self.switch_mode(0))
         self.mode_pivot.addItem(routeKey='images_to_output', text='图像 → SEQ/视频', onClick=lambda: self.switch_mode(1))
         self.mode_pivot.addItem(routeKey='seq_roi_crop', text='SEQ ROI 裁剪', onClick=lambda: self.switch_mode(2))
+        self.mode_pivot.addItem(routeKey='seq_block_copy', text='SEQ 截取/分割', onClick=lambda: self.switch_mode(3))
         self.mode_pivot.setCurrentItem('seq_to_images')
         main_layout.addWidget(self.mode_pivot)
 
@@ -579,14 +703,16 @@ class ConverterGUI(QWidget):
         # 堆叠窗口：用于切换不同模式的界面
         self.stacked_widget = QStackedWidget(self)
 
-        # 创建三个模式的界面
+        # 创建各模式的界面
         self.seq_to_images_widget = self.create_seq_to_images_ui()
         self.images_to_output_widget = self.create_images_to_output_ui()
         self.seq_roi_crop_widget = self.create_seq_roi_crop_ui()
+        self.seq_block_copy_widget = self.create_seq_block_copy_ui()
 
         self.stacked_widget.addWidget(self.seq_to_images_widget)
         self.stacked_widget.addWidget(self.images_to_output_widget)
         self.stacked_widget.addWidget(self.seq_roi_crop_widget)
+        self.stacked_widget.addWidget(self.seq_block_copy_widget)
 
         left_content_layout.addWidget(self.stacked_widget)
 
@@ -704,12 +830,30 @@ class ConverterGUI(QWidget):
         row3_layout = QHBoxLayout()
         row3_layout.addWidget(BodyLabel('输出格式:', param_card))
         self.s2i_format_combo = ComboBox(param_card)
-        self.s2i_format_combo.addItems(['PNG', 'TIFF', 'BMP'])
+        self.s2i_format_combo.addItems(['PNG', 'TIFF', 'BMP', 'BigTIFF', 'NPY', 'HDF5'])
         self.s2i_format_combo.setFixedWidth(120)
         row3_layout.addWidget(self.s2i_format_combo)
+
+        row3_layout.addSpacing(20)
+        row3_layout.addWidget(BodyLabel('并行进程数:', param_card))
+        self.s2i_workers_spin = SpinBox(param_card)
+        self.s2i_workers_spin.setRange(1, max(1, os.cpu_count() or 1))
+        self.s2i_workers_spin.setValue(max(1, os.cpu_count() or 1))
+        self.s2i_workers_spin.setFixedWidth(120)
+        row3_layout.addWidget(self.s2i_workers_spin)
         row3_layout.addStretch()
         param_layout.addLayout(row3_layout)
 
+        # 第四行：16 位转 8 位映射（仅 PNG/BMP 输出 16 位数据时使用）
+        row4_layout = QHBoxLayout()
+        row4_layout.addWidget(BodyLabel('16 位转 8 位:', param_card))
+        self.s2i_tone_combo = ComboBox(param_card)
+        self.s2i_tone_combo.addItems(list(TONE_MAPPING_OPTIONS))
+        self.s2i_tone_combo.setFixedWidth(160)
+        row4_layout.addWidget(self.s2i_tone_combo)
+        row4_layout.addStretch()
+        param_layout.addLayout(row4_layout)
+
         layout.addWidget(param_card)
 
         return widget
@@ -728,10 +872,10 @@ class ConverterGUI(QWidget):
         file_layout.setContentsMargins(20, 20, 20, 20)
         file_layout.setSpacing(12)
 
-        # 输入目录
-        input_label = BodyLabel('输入图像目录:', file_card)
-        input_label.setStyleSheet('color: #1a1a1a; font-size: 14px; font-weight: 500;')
-        file_layout.addWidget(input_label)
+        # 输入目录（输出类型为“SEQ → 视频”时为输入 SEQ 文件）
+        self.i2o_input_label = BodyLabel('输入图像目录:', file_card)
+        self.i2o_input_label.setStyleSheet('color: #1a1a1a; font-size: 14px; font-weight: 500;')
+        file_layout.addWidget(self.i2o_input_label)
 
         input_h_layout = QHBoxLayout()
         self.input_dir_edit = LineEdit(file_card)
@@ -773,13 +917,14 @@ class ConverterGUI(QWidget):
         row1_layout = QHBoxLayout()
         row1_layout.addWidget(BodyLabel('输出类型:', param_card))
         self.i2o_output_type_combo = ComboBox(param_card)
-        self.i2o_output_type_combo.addItems(['SEQ', 'AVI', 'MP4', 'MOV'])
+        self.i2o_output_type_combo.addItems(['SEQ', 'AVI', 'MP4', 'MOV', SEQ_TO_VIDEO_TYPE])
         self.i2o_output_type_combo.currentIndexChanged.connect(self.on_output_type_changed)
         self.i2o_output_type_combo.setFixedWidth(120)
         row1_layout.addWidget(self.i2o_output_type_combo)
 
         row1_layout.addSpacing(20)
-        row1_layout.addWidget(BodyLabel('输入图像格式:', param_card))
+        self.i2o_image_format_label = BodyLabel('输入图像格式:', param_card)
+        row1_layout.addWidget(self.i2o_image_format_label)
         self.i2o_image_format_combo = ComboBox(param_card)
         self.i2o_image_format_combo.addItems(['全部', 'PNG', 'BMP', 'TIFF'])
         self.i2o_image_format_combo.setFixedWidth(120)
@@ -826,6 +971,14 @@ class ConverterGUI(QWidget):
         self.i2o_quality_combo.setCurrentIndex(2)
         self.i2o_quality_combo.setFixedWidth(120)
         row3_layout.addWidget(self.i2o_quality_combo)
+
+        # SEQ → 视频: 16 位（含 10/12 位）数据转 8 位的映射方式
+        self.i2o_tone_label = BodyLabel('16 位转 8 位:', param_card)
+        row3_layout.addWidget(self.i2o_tone_label)
+        self.i2o_tone_combo = ComboBox(param_card)
+        self.i2o_tone_combo.addItems(list(TONE_MAPPING_OPTIONS))
+        self.i2o_tone_combo.setFixedWidth(160)
+        row3_layout.addWidget(self.i2o_tone_combo)
         row3_layout.addStretch()
         param_layout.addLayout(row3_layout)
 
@@ -927,6 +1080,8 @@ class ConverterGUI(QWidget):
         self.roi_preview_frame_spin.setRange(0, 0)
         self.roi_preview_frame_spin.setValue(0)
         self.roi_preview_frame_spin.setEnabled(False)
+        # 切换帧号即刷新预览（解码帧有缓存和预取）
+        self.roi_preview_frame_spin.valueChanged.connect(self.preview_roi_frame)
         frame_h_layout.addWidget(self.roi_preview_frame_spin)
 
         self.roi_preview_btn = PushButton('刷新预览', preview_card, FluentIcon.VIEW)
@@ -984,8 +1139,33 @@ class ConverterGUI(QWidget):
         row2_layout.addStretch()
         roi_param_layout.addLayout(row2_layout)
 
+        # 第三行：ROI 列表（多个 ROI 一次读取源文件完成裁剪）
+        row3_layout = QHBoxLayout()
+        self.roi_add_btn = PushButton('添加到 ROI 列表', roi_param_card, FluentIcon.ADD)
+        self.roi_add_btn.clicked.connect(self.add_roi_to_list)
+        row3_layout.addWidget(self.roi_add_btn)
+
+        self.roi_clear_btn = PushButton('清空列表', roi_param_card, FluentIcon.DELETE)
+        self.roi_clear_btn.clicked.connect(self.clear_roi_list)
+        row3_layout.addWidget(self.roi_clear_btn)
+
+        # 小 ROI 的帧块按 8 字节对齐，省去 8192 对齐的大量填充
+        self.roi_compact_check = CheckBox('紧凑输出（8 字节对齐）', roi_param_card)
+        row3_layout.addWidget(self.roi_compact_check)
+
+        # 背景大多平坦的帧逐帧 zlib 压缩后可小数倍
+        self.roi_compress_check = CheckBox('无损压缩（zlib）', roi_param_card)
+        row3_layout.addWidget(self.roi_compress_check)
+        row3_layout.addStretch()
+        roi_param_layout.addLayout(row3_layout)
+
+        self.roi_list_widget = ListWidget(roi_param_card)
+        self.roi_list_widget.setFixedHeight(90)
+        roi_param_layout.addWidget(self.roi_list_widget)
+        self.roi_list = []
+
         # 添加提示信息
-        info_label = BodyLabel('提示: 输出文件名将自动添加 ROI 左上角坐标后缀', roi_param_card)
+        info_label = BodyLabel('提示: 输出文件名将自动添加 ROI 左上角坐标后缀；列表为空时裁剪当前 ROI', roi_param_card)
         info_label.setStyleSheet('color: #666666; font-size: 12px; font-style: italic;')
         roi_param_layout.addWidget(info_label)
 
@@ -1006,6 +1186,18 @@ class ConverterGUI(QWidget):
         """输出类型改变时更新界面"""
         output_type = self.i2o_output_type_combo.currentText()
         is_seq = (output_type == 'SEQ')
+        is_seq_input = (output_type == SEQ_TO_VIDEO_TYPE)
+
+        # 输入: 图像目录或 SEQ 文件
+        self.i2o_input_label.setText('输入 SEQ 文件:' if is_seq_input else '输入图像目录:')
+        self.input_dir_edit.setPlaceholderText('选择 .seq 文件...' if is_seq_input else '选择包含图像的目录...')
+        self.i2o_image_format_label.setVisible(not is_seq_input)
+        self.i2o_image_format_combo.setVisible(not is_seq_input)
+        if hasattr(self, 'i2o_output_type'):
+            # 输入类型改变，清空旧的输入路径
+            if (self.i2o_output_type == SEQ_TO_VIDEO_TYPE) != is_seq_input:
+                self.input_dir_edit.clear()
+        self.i2o_output_type = output_type
 
         # SEQ 特有参数
         self.seq_bitdepth_label.setVisible(is_seq)
@@ -1016,6 +1208,128 @@ class ConverterGUI(QWidget):
         self.i2o_codec_combo.setVisible(not is_seq)
         self.video_quality_label.setVisible(not is_seq)
         self.i2o_quality_combo.setVisible(not is_seq)
+        self.i2o_tone_label.setVisible(is_seq_input)
+        self.i2o_tone_combo.setVisible(is_seq_input)
+
+    def create_seq_block_copy_ui(self):
+        """创建 SEQ 截取/分割界面"""
+        widget = QWidget()
+        layout = QVBoxLayout(widget)
+        layout.setContentsMargins(0, 10, 0, 0)
+        layout.setSpacing(15)
+
+        # 文件选择卡片
+        file_card = CardWidget(widget)
+        file_card.setStyleSheet("CardWidget { background-color: white; border-radius: 10px; }")
+        file_layout = QVBoxLayout(file_card)
+        file_layout.setContentsMargins(20, 20, 20, 20)
+        file_layout.setSpacing(12)
+
+        # 输入 SEQ 文件
+        input_label = BodyLabel('输入 SEQ 文件:', file_card)
+        input_label.setStyleSheet('color: #1a1a1a; font-size: 14px; font-weight: 500;')
+        file_layout.addWidget(input_label)
+
+        input_h_layout = QHBoxLayout()
+        self.blk_input_seq_edit = LineEdit(file_card)
+        self.blk_input_seq_edit.setPlaceholderText('选择 .seq 文件...')
+        self.blk_input_seq_edit.setReadOnly(True)
+        input_h_layout.addWidget(self.blk_input_seq_edit)
+
+        self.blk_input_browse_btn = PushButton('浏览', file_card, FluentIcon.FOLDER)
+        self.blk_input_browse_btn.clicked.connect(self.browse_blk_input_seq)
+        input_h_layout.addWidget(self.blk_input_browse_btn)
+        file_layout.addLayout(input_h_layout)
+
+        # 输出（截取: SEQ 文件；分割: 目录）
+        self.blk_output_label = BodyLabel('输出 SEQ 文件:', file_card)
+        self.blk_output_label.setStyleSheet('color: #1a1a1a; font-size: 14px; font-weight: 500;')
+        file_layout.addWidget(self.blk_output_label)
+
+        output_h_layout = QHBoxLayout()
+        self.blk_output_edit = LineEdit(file_card)
+        self.blk_output_edit.setPlaceholderText('选择输出文件路径...')
+        self.blk_output_edit.setReadOnly(True)
+        output_h_layout.addWidget(self.blk_output_edit)
+
+        self.blk_output_browse_btn = PushButton('浏览', file_card, FluentIcon.SAVE)
+        self.blk_output_browse_btn.clicked.connect(self.browse_blk_output)
+        output_h_layout.addWidget(self.blk_output_browse_btn)
+        file_layout.addLayout(output_h_layout)
+
+        layout.addWidget(file_card)
+
+        # 参数设置卡片
+        param_card = CardWidget(widget)
+        param_card.setStyleSheet("CardWidget { background-color: white; border-radius: 10px; }")
+        param_layout = QVBoxLayout(param_card)
+        param_layout.setContentsMargins(20, 20, 20, 20)
+        param_layout.setSpacing(12)
+
+        # 第一行：操作
+        row1_layout = QHBoxLayout()
+        row1_layout.addWidget(BodyLabel('操作:', param_card))
+        self.blk_mode_combo = ComboBox(param_card)
+        self.blk_mode_combo.addItems(['截取帧段', '按大小分割'])
+        self.blk_mode_combo.setFixedWidth(160)
+        self.blk_mode_combo.currentIndexChanged.connect(self.on_blk_mode_changed)
+        row1_layout.addWidget(self.blk_mode_combo)
+        row1_layout.addStretch()
+        param_layout.addLayout(row1_layout)
+
+        # 第二行：帧范围（截取）
+        row2_layout = QHBoxLayout()
+        self.blk_start_label = BodyLabel('起始帧号:', param_card)
+        row2_layout.addWidget(self.blk_start_label)
+        self.blk_start_spin = SpinBox(param_card)
+        self.blk_start_spin.setRange(0, 9999999)
+        self.blk_start_spin.setValue(0)
+        self.blk_start_spin.setFixedWidth(120)
+        row2_layout.addWidget(self.blk_start_spin)
+
+        row2_layout.addSpacing(20)
+        self.blk_end_label = BodyLabel('结束帧号 (不含):', param_card)
+        row2_layout.addWidget(self.blk_end_label)
+        self.blk_end_spin = SpinBox(param_card)
+        self.blk_end_spin.setRange(0, 9999999)
+        self.blk_end_spin.setValue(0)
+        self.blk_end_spin.setSpecialValueText('全部')
+        self.blk_end_spin.setFixedWidth(120)
+        row2_layout.addWidget(self.blk_end_spin)
+
+        # 分段大小（分割）
+        self.blk_part_size_label = BodyLabel('每段大小 (GB):', param_card)
+        row2_layout.addWidget(self.blk_part_size_label)
+        self.blk_part_size_spin = DoubleSpinBox(param_card)
+        self.blk_part_size_spin.setRange(0.01, 1024.0)
+        self.blk_part_size_spin.setValue(4.0)
+        self.blk_part_size_spin.setFixedWidth(120)
+        row2_layout.addWidget(self.blk_part_size_spin)
+        row2_layout.addStretch()
+        param_layout.addLayout(row2_layout)
+
+        # 添加提示信息
+        info_label = BodyLabel('提示: 帧数据按字节原样复制，不解码，速度取决于磁盘', param_card)
+        info_label.setStyleSheet('color: #666666; font-size: 12px; font-style: italic;')
+        param_layout.addWidget(info_label)
+
+        layout.addWidget(param_card)
+        layout.addStretch()
+
+        self.on_blk_mode_changed(0)
+
+        return widget
+
+    def on_blk_mode_changed(self, index):
+        """截取/分割切换时更新界面"""
+        is_split = (self.blk_mode_combo.currentIndex() == 1)
+        self.blk_output_label.setText('输出目录:' if is_split else '输出 SEQ 文件:')
+        self.blk_output_edit.setPlaceholderText('选择输出目录...' if is_split else '选择输出文件路径...')
+        self.blk_output_edit.clear()
+        for w in (self.blk_start_label, self.blk_start_spin, self.blk_end_label, self.blk_end_spin):
+            w.setVisible(not is_split)
+        self.blk_part_size_label.setVisible(is_split)
+        self.blk_part_size_spin.setVisible(is_split)
 
     def create_shared_ui(self, h_layout):
         """创建共享的进度和日志区域（右侧竖向布局）"""
@@ -1120,6 +1434,13 @@ class ConverterGUI(QWidget):
 
     def browse_input_dir(self):
         """浏览输入目录"""
+        if self.i2o_output_type_combo.currentText() == SEQ_TO_VIDEO_TYPE:
+            file_path, _ = QFileDialog.getOpenFileName(self, '选择 SEQ 文件', '', 'SEQ Files (*.seq);;All Files (*.*)')
+            if file_path:
+                self.input_dir_edit.setText(file_path)
+                self.add_log(f'输入文件: {file_path}')
+            return
+
         dir_path = QFileDialog.getExistingDirectory(self, '选择输入图像目录', '')
         if dir_path:
             self.input_dir_edit.setText(dir_path)
@@ -1132,14 +1453,18 @@ class ConverterGUI(QWidget):
             'seq': 'SEQ Files (*.seq)',
             'avi': 'AVI Files (*.avi)',
             'mp4': 'MP4 Files (*.mp4)',
-            'mov': 'MOV Files (*.mov)'
+            'mov': 'MOV Files (*.mov)',
+            SEQ_TO_VIDEO_TYPE.lower(): 'Video Files (*.mp4 *.avi *.mov)'
         }
         file_filter = filters.get(output_type, 'All Files (*.*)')
 
         file_path, _ = QFileDialog.getSaveFileName(self, '保存输出文件', '', file_filter)
         if file_path:
             # 确保文件扩展名正确
-            if not file_path.lower().endswith(f'.{output_type}'):
+            if output_type == SEQ_TO_VIDEO_TYPE.lower():
+                if os.path.splitext(file_path)[1].lower() not in ('.mp4', '.avi', '.mov'):
+                    file_path += '.mp4'
+            elif not file_path.lower().endswith(f'.{output_type}'):
                 file_path += f'.{output_type}'
             self.output_file_edit.setText(file_path)
             self.add_log(f'输出文件: {file_path}')
@@ -1158,6 +1483,8 @@ class ConverterGUI(QWidget):
                 self.roi_output_seq_edit.setText(output_path)
 
             # 加载 SEQ 文件头信息
+            if self.seq_cropper is not None:
+                self.seq_cropper.close()
             self.seq_cropper = SeqCropper(file_path)
             if self.seq_cropper.load_header():
                 # 启用预览功能
@@ -1191,6 +1518,29 @@ class ConverterGUI(QWidget):
             self.roi_output_seq_edit.setText(file_path)
             self.add_log(f'输出文件: {file_path}')
 
+    def browse_blk_input_seq(self):
+        """浏览截取/分割的输入 SEQ 文件"""
+        file_path, _ = QFileDialog.getOpenFileName(self, '选择 SEQ 文件', '', 'SEQ Files (*.seq);;All Files (*.*)')
+        if file_path:
+            self.blk_input_seq_edit.setText(file_path)
+            self.add_log(f'输入文件: {file_path}')
+
+    def browse_blk_output(self):
+        """浏览截取的输出 SEQ 文件或分割的输出目录"""
+        if self.blk_mode_combo.currentIndex() == 1:
+            dir_path = QFileDialog.getExistingDirectory(self, '选择输出目录', '')
+            if dir_path:
+                self.blk_output_edit.setText(dir_path)
+                self.add_log(f'输出目录: {dir_path}')
+            return
+
+        file_path, _ = QFileDialog.getSaveFileName(self, '保存输出 SEQ 文件', '', 'SEQ Files (*.seq)')
+        if file_path:
+            if not file_path.lower().endswith('.seq'):
+                file_path += '.seq'
+            self.blk_output_edit.setText(file_path)
+            self.add_log(f'输出文件: {file_path}')
+
     def preview_roi_frame(self):
         """预览指定帧"""
         if not self.seq_cropper or not self.seq_cropper.header_loaded:
@@ -1198,17 +1548,17 @@ class ConverterGUI(QWidget):
             return
 
         frame_num = self.roi_preview_frame_spin.value()
-        img = self.seq_cropper.get_frame_image(frame_num)
-
-        if img:
-            # 转换为 QPixmap
-            import io
-            img_byte_arr = io.BytesIO()
-            img.save(img_byte_arr, format='PNG')
-            img_byte_arr.seek(0)
+        img_array = self.seq_cropper.get_frame_array(frame_num)
 
-            pixmap = QPixmap()
-            pixmap.loadFromData(img_byte_arr.read())
+        if img_array is not None:
+            # 直接由缓存中的数组构造 QImage，无需再编码为 PNG
+            height, width = img_array.shape[:2]
+            if img_array.ndim == 3:
+                qimage = QImage(img_array.data, width, height, img_array.strides[0], QImage.Format_RGB888)
+            else:
+                qimage = QImage(img_array.data, width, height, img_array.strides[0], QImage.Format_Grayscale8)
+            # fromImage 会拷贝像素数据，不依赖 img_array 的生命周期
+            pixmap = QPixmap.fromImage(qimage)
 
             # 设置图像到预览控件
             self.roi_preview_widget.set_image(
@@ -1224,6 +1574,25 @@ class ConverterGUI(QWidget):
         else:
             InfoBar.error(title='错误', content=f'无法读取帧 {frame_num}', parent=self, position=InfoBarPosition.TOP, duration=3000)
 
+    def add_roi_to_list(self):
+        """把当前 ROI 参数加入待裁剪列表"""
+        roi = (
+            self.roi_center_x_spin.value(),
+            self.roi_center_y_spin.value(),
+            self.roi_width_spin.value(),
+            self.roi_height_spin.value()
+        )
+        if roi in self.roi_list:
+            return
+        self.roi_list.append(roi)
+        self.roi_list_widget.addItem(f"ROI {len(self.roi_list)}: 中心 ({roi[0]}, {roi[1]}), 尺寸 {roi[2]} x {roi[3]}")
+        self.add_log(f'添加 ROI: 中心 ({roi[0]}, {roi[1]}), 尺寸 {roi[2]} x {roi[3]}')
+
+    def clear_roi_list(self):
+        """清空待裁剪 ROI 列表"""
+        self.roi_list = []
+        self.roi_list_widget.clear()
+
     def update_roi_preview(self):
         """更新ROI预览显示"""
         if hasattr(self, 'roi_preview_widget') and self.roi_preview_widget.pixmap is not None:
@@ -1255,9 +1624,12 @@ class ConverterGUI(QWidget):
         elif mode_index == 1:
             # 图像 → SEQ/视频
             self.start_images_to_output()
-        else:
+        elif mode_index == 2:
             # SEQ ROI 裁剪
             self.start_seq_roi_crop()
+        else:
+            # SEQ 截取/分割
+            self.start_seq_block_copy()
 
     def start_seq_to_images(self):
         """SEQ → 图像转换"""
@@ -1276,9 +1648,12 @@ class ConverterGUI(QWidget):
         end_frame = self.s2i_end_spin.value() if self.s2i_end_spin.value() > 0 else None
         prefix = self.s2i_prefix_edit.text() or self.get_timestamp()
         format = self.s2i_format_combo.currentText()
+        workers = self.s2i_workers_spin.value()
+        tone_mapping = TONE_MAPPING_OPTIONS[self.s2i_tone_combo.currentText()]
 
         self.reset_ui()
-        self.convert_thread = SeqToImagesThread(seq_file, output_dir, start_frame, end_frame, prefix, format)
+        self.convert_thread = SeqToImagesThread(seq_file, output_dir, start_frame, end_frame, prefix, format, workers,
+                                                tone_mapping)
         self.connect_thread_signals()
         self.convert_thread.start()
 
@@ -1287,6 +1662,10 @@ class ConverterGUI(QWidget):
         input_dir = self.input_dir_edit.text()
         output_file = self.output_file_edit.text()
 
+        if self.i2o_output_type_combo.currentText() == SEQ_TO_VIDEO_TYPE:
+            self.start_seq_to_video(input_dir, output_file)
+            return
+
         if not input_dir or not os.path.isdir(input_dir):
             InfoBar.error(title='错误', content='请选择有效的输入目录', parent=self, position=InfoBarPosition.TOP, duration=3000)
             return
@@ -1317,6 +1696,30 @@ class ConverterGUI(QWidget):
         self.connect_thread_signals()
         self.convert_thread.start()
 
+    def start_seq_to_video(self, seq_file, output_file):
+        """SEQ → 视频直接转换"""
+        if not seq_file or not os.path.isfile(seq_file):
+            InfoBar.error(title='错误', content='请选择有效的 SEQ 文件', parent=self, position=InfoBarPosition.TOP, duration=3000)
+            return
+
+        if not output_file:
+            InfoBar.error(title='错误', content='请指定输出文件', parent=self, position=InfoBarPosition.TOP, duration=3000)
+            return
+
+        frame_rate = self.i2o_framerate_spin.value()
+        # SEQ 帧号从 0 开始，结束帧不含
+        start_frame = self.i2o_start_spin.value()
+        end_frame = self.i2o_end_spin.value() if self.i2o_end_spin.value() > 0 else None
+        codec = self.i2o_codec_combo.currentText()
+        quality = self.i2o_quality_combo.currentText()
+        tone_mapping = TONE_MAPPING_OPTIONS[self.i2o_tone_combo.currentText()]
+
+        self.reset_ui()
+        self.convert_thread = SeqToVideoThread(seq_file, output_file, frame_rate, codec, quality, start_frame, end_frame,
+                                               tone_mapping)
+        self.connect_thread_signals()
+        self.convert_thread.start()
+
     def start_seq_roi_crop(self):
         """SEQ ROI 裁剪"""
         input_seq = self.roi_input_seq_edit.text()
@@ -1330,15 +1733,13 @@ class ConverterGUI(QWidget):
             InfoBar.error(title='错误', content='请指定输出 SEQ 文件', parent=self, position=InfoBarPosition.TOP, duration=3000)
             return
 
-        # 获取 ROI 参数
-        roi_center_x = self.roi_center_x_spin.value()
-        roi_center_y = self.roi_center_y_spin.value()
-        roi_width = self.roi_width_spin.value()
-        roi_height = self.roi_height_spin.value()
-
-        # 计算 ROI 左上角坐标用于文件名
-        roi_x = roi_center_x - roi_width // 2
-        roi_y = roi_center_y - roi_height // 2
+        # 获取 ROI 参数：列表为空时使用当前 ROI
+        roi_params = self.roi_list or [(
+            self.roi_center_x_spin.value(),
+            self.roi_center_y_spin.value(),
+            self.roi_width_spin.value(),
+            self.roi_height_spin.value()
+        )]
 
         # 自动修改输出文件名，添加 ROI 坐标后缀
         output_dir = os.path.dirname(output_seq)
@@ -1348,13 +1749,48 @@ class ConverterGUI(QWidget):
         if '_ROI_' in output_basename:
             output_basename = output_basename.split('_ROI_')[0]
 
-        # 添加新的 ROI 坐标后缀
-        output_basename_with_roi = f"{output_basename}_ROI_{roi_x}_{roi_y}"
-        output_seq = os.path.join(output_dir, f"{output_basename_with_roi}.seq")
-        self.roi_output_seq_edit.setText(output_seq)
+        rois = []
+        for roi_center_x, roi_center_y, roi_width, roi_height in roi_params:
+            # 计算 ROI 左上角坐标用于文件名
+            roi_x = roi_center_x - roi_width // 2
+            roi_y = roi_center_y - roi_height // 2
+
+            # 添加新的 ROI 坐标后缀
+            output_basename_with_roi = f"{output_basename}_ROI_{roi_x}_{roi_y}"
+            if any(output == os.path.join(output_dir, f"{output_basename_with_roi}.seq") for output, *_ in rois):
+                # 左上角相同的 ROI 用尺寸区分文件名
+                output_basename_with_roi += f"_{roi_width}x{roi_height}"
+            roi_output_seq = os.path.join(output_dir, f"{output_basename_with_roi}.seq")
+            rois.append((roi_output_seq, roi_center_x, roi_center_y, roi_width, roi_height))
+        self.roi_output_seq_edit.setText(rois[0][0])
+
+        self.reset_ui()
+        alignment = COMPACT_FRAME_ALIGNMENT if self.roi_compact_check.isChecked() else DEFAULT_FRAME_ALIGNMENT
+        compression = 'zlib' if self.roi_compress_check.isChecked() else None
+        self.convert_thread = SeqRoiCropThread(input_seq, rois, alignment, compression)
+        self.connect_thread_signals()
+        self.convert_thread.start()
+
+    def start_seq_block_copy(self):
+        """SEQ 帧段截取 / 分割"""
+        input_seq = self.blk_input_seq_edit.text()
+        output = self.blk_output_edit.text()
+        is_split = (self.blk_mode_combo.currentIndex() == 1)
+
+        if not input_seq or not os.path.exists(input_seq):
+            InfoBar.error(title='错误', content='请选择有效的输入 SEQ 文件', parent=self, position=InfoBarPosition.TOP, duration=3000)
+            return
+
+        if not output and not is_split:
+            InfoBar.error(title='错误', content='请指定输出 SEQ 文件', parent=self, position=InfoBarPosition.TOP, duration=3000)
+            return
+
+        start_frame = self.blk_start_spin.value()
+        end_frame = self.blk_end_spin.value() if self.blk_end_spin.value() > 0 else None
+        part_bytes = int(self.blk_part_size_spin.value() * 1024 ** 3)
 
         self.reset_ui()
-        self.convert_thread = SeqRoiCropThread(input_seq, output_seq, roi_center_x, roi_center_y, roi_width, roi_height)
+        self.convert_thread = SeqBlockCopyThread(input_seq, output or None, is_split, start_frame, end_frame, part_bytes)
         self.connect_thread_signals()
         self.convert_thread.start()
 
@@ -1411,6 +1847,8 @@ class ConverterGUI(QWidget):
 
 
 def main():
+    # 打包后的 exe 中使用进程池需要此调用
+    multiprocessing.freeze_support()
     app = QApplication(sys.argv)
     app.setStyle('Fusion')
     window = ConverterGUI()
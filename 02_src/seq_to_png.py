@@ -1,8 +1,156 @@
 import os
+import mmap
 import struct
+import threading
 import numpy as np
 from PIL import Image
 import argparse
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from seq_tone_mapping import ToneMapper, TONE_MODES, resolve_tone_mapper
+from seq_compression import (
+    COMPRESSION_NONE, COMPRESSION_ZLIB, FRAME_SIZE_FIELD, is_variable_size, build_frame_index,
+    load_frame_index, save_frame_index, decode_frame
+)
+from pixel_formats import PACKED_FORMATS, resolve_pixel_format, unpack_frames
+from demosaic import IMAGE_FORMAT_RGB, BAYER_PATTERNS, DEMOSAIC_METHODS, is_bayer_format, demosaic
+from tiff_stack import TiffStackWriter
+from flat_field import FlatFieldCorrector
+
+
+# Per-frame timestamp stored right after the pixel data of every frame block
+TIMESTAMP_DTYPE = np.dtype([('time_t', '<u4'), ('ms', '<u2'), ('us', '<u2')])
+
+# Threads that decode the frames of one compressed batch (zlib and PIL release the GIL)
+DECODE_WORKERS = min(8, os.cpu_count() or 1)
+
+# HDF5 export: chunk shape along time and image axes, and the memory budget of one write batch
+HDF5_CHUNK_FRAMES = 32
+HDF5_CHUNK_TILE = 64
+HDF5_MAX_MEMORY_BYTES = 256 * 1024 * 1024
+
+# Parsed header fields stored as HDF5 attributes
+HDF5_HEADER_ATTRS = ('width', 'height', 'bit_depth', 'significant_bits', 'image_format', 'image_size_bytes',
+                     'true_image_size', 'header_size', 'frame_rate', 'compression')
+
+
+def _pread(f, size, offset):
+    """
+    Positional read that does not depend on (or move) a shared file position.
+    Falls back to seek + read on platforms without os.pread (Windows).
+    """
+    if hasattr(os, 'pread'):
+        return os.pread(f.fileno(), size, offset)
+    f.seek(offset)
+    return f.read(size)
+
+
+def parse_time_spec(value, reference_us):
+    """
+    Converts a time-window bound into integer microseconds since the epoch.
+
+    Accepted forms:
+        - number or numeric string ("2.5"): seconds after the reference (first frame)
+        - "HH:MM:SS[.ffffff]": local wall-clock time on the reference's date
+        - "YYYY-MM-DD HH:MM:SS[.ffffff]" (or with 'T'): absolute local time
+        - datetime / numpy.datetime64 objects
+    """
+    if value is None:
+        return None
+    if isinstance(value, np.datetime64):
+        return int(value.astype('datetime64[us]').astype(np.int64))
+    if isinstance(value, datetime):
+        return int(round(value.timestamp() * 1e6))
+    if isinstance(value, (int, float)):
+        return reference_us + int(round(value * 1e6))
+
+    text = str(value).strip()
+    try:
+        return reference_us + int(round(float(text) * 1e6))
+    except ValueError:
+        pass
+
+    if len(text) <= 15 and text.count(':') == 2 and '-' not in text:
+        reference_date = datetime.fromtimestamp(reference_us / 1e6).date()
+        time_of_day = datetime.strptime(text, '%H:%M:%S.%f' if '.' in text else '%H:%M:%S').time()
+        return int(round(datetime.combine(reference_date, time_of_day).timestamp() * 1e6))
+
+    return int(round(datetime.fromisoformat(text).timestamp() * 1e6))
+
+
+# Default 16 -> 8 bit mapping: the high byte, as a lookup table
+_DEFAULT_TONE_MAPPER = ToneMapper('shift')
+
+
+def _frame_to_image(img_array, bit_depth, format, tone_mapper=None):
+    """
+    Builds the PIL image that gets saved for one decoded frame.
+    16-bit frames keep their depth in TIFF; other formats go through the
+    8-bit lookup table of tone_mapper (default: keep the high byte).
+    Colour frames must already be in RGB order (see SeqReader.to_rgb); PIL has
+    no 16-bit RGB mode, so demosaiced 16-bit frames are always tone mapped.
+    """
+    if img_array.ndim == 3:
+        if img_array.dtype != np.uint8:
+            img_array = (tone_mapper or _DEFAULT_TONE_MAPPER).apply(img_array)
+        return Image.fromarray(img_array, mode='RGB')
+    if bit_depth == 8:
+        return Image.fromarray(img_array, mode='L')
+    if bit_depth == 16:
+        if format == 'TIFF':
+            return Image.fromarray(img_array, mode='I;16')
+        img_array_8bit = (tone_mapper or _DEFAULT_TONE_MAPPER).apply(img_array)
+        return Image.fromarray(img_array_8bit, mode='L')
+    raise ValueError(f"Unsupported bit depth: {bit_depth}")
+
+
+# Reader and tone mapper shared by the extraction pool, sent once per worker process
+_worker_reader = None
+_worker_tone_mapper = None
+
+
+def _init_extract_worker(reader, tone_mapper=None):
+    global _worker_reader, _worker_tone_mapper
+    _worker_reader = reader
+    _worker_tone_mapper = tone_mapper
+
+
+def _extract_frame_range(start_frame, end_frame, output_dir, prefix, format, ext):
+    """
+    Process-pool worker: reads frames [start_frame, end_frame) with its own file
+    handle and positional reads, encodes and saves them.
+    Returns the list of (frame, error message) pairs that failed.
+    """
+    reader = _worker_reader
+    errors = []
+    with open(reader.seq_file_path, 'rb') as f:
+        for i in range(start_frame, end_frame):
+            try:
+                img_array = reader._read_frame(f, i)
+                if img_array is None:
+                    errors.append((i, "frame is incomplete"))
+                    continue
+                img = _frame_to_image(reader.to_rgb(img_array), reader.bit_depth, format, _worker_tone_mapper)
+                img.save(os.path.join(output_dir, f"{prefix}_{i:06d}.{ext}"), format=format)
+            except Exception as e:
+                errors.append((i, str(e)))
+    return errors
+
+
+class _PackedFrames:
+    """Raw packed frame blocks that unpack to uint16 when indexed."""
+
+    def __init__(self, raw, packed_format, height, width):
+        self.raw = raw
+        self.packed_format = packed_format
+        self.height = height
+        self.width = width
+
+    def __len__(self):
+        return len(self.raw)
+
+    def __getitem__(self, key):
+        return unpack_frames(self.raw[key], self.packed_format, self.height, self.width)
 
 
 class SeqReader:
@@ -11,11 +159,12 @@ class SeqReader:
     with logic corrected according to the provided C++ source code.
     """
 
-    def __init__(self, seq_file_path):
+    def __init__(self, seq_file_path, pixel_format=None):
         self.seq_file_path = seq_file_path
         self.width = 0
         self.height = 0
         self.bit_depth = 0
+        self.significant_bits = 0  # bits actually used per sample (e.g. 12 for Mono12 data)
         self.image_format = 0
         self.image_size_bytes = 0
         self.true_image_size = 0  # This will be the calculated, padded size of a full frame block
@@ -23,6 +172,521 @@ class SeqReader:
         self.frame_rate = 0.0
         self.header_size = 8192  # The first image frame starts at this offset
         self.frame_header_size = 0 # Kept for GUI compatibility
+        self.compression = COMPRESSION_NONE
+
+        # Variable-size (compressed) sequences: per-frame offset index
+        self.compressed = False
+        self.frame_offsets = None  # offset of each frame's 4-byte size field
+        self.frame_sizes = None    # value of that size field (includes the field itself)
+
+        # Packed 10/12-bit mono: frames are unpacked to uint16 on access
+        self.pixel_format = pixel_format  # requested packing, None to pick it from the bit depth
+        self.packed_format = None
+
+        # Colour conversion applied by to_rgb(); see set_demosaic()
+        self.bayer_pattern = None
+        self.demosaic_method = 'bilinear'
+
+        # Dark/flat correction applied by correct() and to_rgb(); see set_correction()
+        self.correction = None
+
+        # Memory-mapped state, created lazily by open_mmap()
+        self._file = None
+        self._mmap = None
+        self._mmap_bytes = None  # uint8 array over the map; views built on it hold a buffer export
+        self._map_lock = threading.Lock()  # the map is opened lazily from the GUI and prefetch threads
+        self._frames = None
+        self._timestamps_us = None
+        self._timestamps_sorted = None
+        self._decode_executor = None
+
+    def __len__(self):
+        return self.frame_count
+
+    def __getitem__(self, key):
+        """
+        reader[i] -> (H, W[, 3]) and reader[a:b] -> (T, H, W[, 3]).
+        Both are zero-copy, read-only views into the memory-mapped file.
+        Compressed sequences are decoded on access instead, and packed
+        sequences are unpacked from a strided view of the raw blocks.
+        """
+        if self.packed_format:
+            return self._raw_blocks(self._map_file(), self.frame_count, self.header_size)[key]
+        if not self.compressed:
+            return self.open_mmap()[key]
+
+        if isinstance(key, slice):
+            start, stop, step = key.indices(self.frame_count)
+            if step == 1:
+                return self.read_frames(start, stop)
+            return np.stack([self._decode_compressed(i) for i in range(start, stop, step)])
+        if key < 0:
+            key += self.frame_count
+        if not 0 <= key < self.frame_count:
+            raise IndexError(f"frame {key} out of range")
+        return self._decode_compressed(key)
+
+    def __getstate__(self):
+        # The memory map and file handle cannot cross process boundaries
+        state = self.__dict__.copy()
+        state['_file'] = None
+        state['_mmap'] = None
+        state['_mmap_bytes'] = None
+        state['_frames'] = None
+        state['_decode_executor'] = None
+        state['_map_lock'] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._map_lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        self.close()
+
+    def _frame_dtype(self):
+        """NumPy dtype of one stored pixel sample, or None if the bit depth is unsupported."""
+        if self.bit_depth in (8, 24):
+            return np.dtype(np.uint8)
+        if self.bit_depth == 16:
+            return np.dtype('<u2')
+        return None
+
+    def _frame_shape(self):
+        """Shape of a single decoded frame."""
+        if self.bit_depth == 24:
+            return (self.height, self.width, 3)
+        return (self.height, self.width)
+
+    def _frame_strides(self):
+        """Strides of one C-contiguous frame inside a block."""
+        shape = self._frame_shape()
+        itemsize = self._frame_dtype().itemsize
+        return tuple(int(np.prod(shape[i + 1:])) * itemsize for i in range(len(shape)))
+
+    def _blocks_to_frames(self, buf, count):
+        """
+        Views `count` back-to-back frame blocks held in `buf` as a (T, H, W[, 3]) array.
+        The outer stride skips each block's timestamp and padding, so nothing is copied.
+        Packed frames are unpacked into a new uint16 array instead.
+        """
+        if self.packed_format:
+            return self._raw_blocks(buf, count)[:]
+        return np.ndarray(
+            shape=(count,) + self._frame_shape(),
+            dtype=self._frame_dtype(),
+            buffer=buf,
+            strides=(self.true_image_size,) + self._frame_strides(),
+        )
+
+    def _raw_blocks(self, buf, count, offset=0):
+        """
+        Indexable view over the packed pixel bytes of `count` frame blocks in `buf`:
+        indexing it with an int or a slice returns the unpacked uint16 frame(s),
+        so a batch is unpacked in one vectorized pass.
+        """
+        if count == 0:
+            raw = np.empty((0, self.image_size_bytes), dtype=np.uint8)
+        else:
+            raw = np.ndarray(shape=(count, self.image_size_bytes), dtype=np.uint8, buffer=buf,
+                             offset=offset, strides=(self.true_image_size, 1))
+        return _PackedFrames(raw, self.packed_format, self.height, self.width)
+
+    def _map_file(self):
+        """
+        Opens the read-only memory map of the whole file (once) and returns it as a
+        uint8 array, or None for an empty sequence. Arrays built on top of it keep
+        a buffer export on the map, so close() cannot unmap memory still in use.
+        """
+        with self._map_lock:
+            if self._mmap is None and self.frame_count > 0:
+                if self._file is None:
+                    self._file = open(self.seq_file_path, 'rb')
+                self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+                self._mmap_bytes = np.frombuffer(self._mmap, dtype=np.uint8)
+            return self._mmap_bytes
+
+    def open_mmap(self):
+        """
+        Maps the whole file read-only and returns a strided (T, H, W[, 3]) view.
+        Each record starts every true_image_size bytes after the header, so the
+        8-byte timestamp and the alignment padding are simply stepped over.
+        """
+        if self._frames is not None:
+            return self._frames
+
+        if self.compressed or self.packed_format:
+            raise ValueError("Compressed or packed sequences cannot be memory-mapped as frames; "
+                             "use reader[i] or iter_chunks()")
+
+        dtype = self._frame_dtype()
+        if dtype is None:
+            raise ValueError(f"Unsupported bit depth: {self.bit_depth}")
+
+        shape = self._frame_shape()
+        if self.frame_count == 0:
+            self._frames = np.empty((0,) + shape, dtype=dtype)
+            return self._frames
+
+        self._frames = np.ndarray(
+            shape=(self.frame_count,) + shape,
+            dtype=dtype,
+            buffer=self._map_file(),
+            offset=self.header_size,
+            strides=(self.true_image_size,) + self._frame_strides(),
+        )
+        return self._frames
+
+    def _frame_source(self):
+        """Random-access frame container for serial loops: the mmap view, or the reader itself when decoding."""
+        return self if self.compressed or self.packed_format else self.open_mmap()
+
+    def set_demosaic(self, bayer_pattern=None, method='bilinear'):
+        """
+        Selects how raw Bayer frames are turned into colour by to_rgb().
+
+        Args:
+            bayer_pattern: 'RGGB', 'BGGR', 'GRBG' or 'GBRG'. Headers with a Bayer image
+                format default to RGGB; giving a pattern also demosaics mono-tagged files.
+            method: 'bilinear' (fast) or 'edge' (edge-aware green, colour-difference red/blue)
+        """
+        if bayer_pattern is not None and bayer_pattern not in BAYER_PATTERNS:
+            raise ValueError(f"Unsupported Bayer pattern: {bayer_pattern}")
+        if method not in DEMOSAIC_METHODS:
+            raise ValueError(f"Unsupported demosaic method: {method}")
+        self.bayer_pattern = bayer_pattern
+        self.demosaic_method = method
+
+    def set_correction(self, correction=None):
+        """
+        Selects the dark/flat-field correction applied to frames by correct() and to_rgb(),
+        so every extract, export and video path sees corrected data.
+
+        Args:
+            correction: a FlatFieldCorrector (see load_flat_field), or None to disable
+        """
+        if correction is not None and correction.shape != self._frame_shape():
+            raise ValueError(f"Calibration frames {correction.shape} do not match frames {self._frame_shape()}")
+        self.correction = correction
+
+    def correct(self, frames):
+        """Applies the dark/flat-field correction, if any, to frames as returned by the reader."""
+        if self.correction is None:
+            return frames
+        return self.correction.apply(frames)
+
+    @property
+    def is_bayer(self):
+        """True if the 8/16-bit frames hold a raw Bayer mosaic."""
+        return self.bit_depth in (8, 16) and (self.bayer_pattern is not None or is_bayer_format(self.image_format))
+
+    @property
+    def stored_bgr(self):
+        """True if 24-bit frames come back from the reader in BGR order (as SeqWriter writes them)."""
+        # JPEG frames decode to RGB; zlib frames keep the uncompressed (BGR) layout
+        stored_raw = not self.compressed or self.compression == COMPRESSION_ZLIB
+        return self.bit_depth == 24 and stored_raw and self.image_format != IMAGE_FORMAT_RGB
+
+    @property
+    def color(self):
+        """True if to_rgb() yields (..., H, W, 3) frames."""
+        return self.bit_depth == 24 or self.is_bayer
+
+    def to_rgb(self, frames, corrected=False):
+        """
+        Converts frames (one or a batch) as returned by the reader to display order:
+        the dark/flat-field correction (if set) comes first, then Bayer mosaics are
+        demosaiced to RGB of the same dtype, BGR frames become a reversed-channel
+        view (no copy), and mono frames are returned unchanged.
+        Pass corrected=True for frames that already went through correct().
+        """
+        if not corrected:
+            frames = self.correct(frames)
+        if self.is_bayer:
+            return demosaic(frames, self.bayer_pattern or 'RGGB', self.demosaic_method)
+        if self.stored_bgr:
+            return frames[..., ::-1]
+        return frames
+
+    def timestamp_records(self):
+        """
+        Strided structured view over the 8-byte timestamp that follows every frame's
+        pixel data: 4-byte time_t, 2-byte milliseconds, 2-byte microseconds.
+        """
+        if self.frame_count == 0:
+            return np.empty(0, dtype=TIMESTAMP_DTYPE)
+
+        if self.compressed:
+            # Timestamps follow each variable-size frame: gather the 8 bytes at every position
+            positions = self.frame_offsets.astype(np.int64) + self.frame_sizes.astype(np.int64)
+            file_bytes = self._map_file()
+            gathered = file_bytes[positions[:, None] + np.arange(TIMESTAMP_DTYPE.itemsize)]
+            return gathered.view(TIMESTAMP_DTYPE).reshape(-1)
+
+        return np.ndarray(
+            shape=(self.frame_count,),
+            dtype=TIMESTAMP_DTYPE,
+            buffer=self._map_file(),
+            offset=self.header_size + self.image_size_bytes,
+            strides=(self.true_image_size,),
+        )
+
+    def timestamps(self, as_datetime=False):
+        """
+        Returns the timestamps of all frames, gathered in one strided pass.
+
+        Args:
+            as_datetime: False for float seconds since the epoch, True for datetime64[us]
+
+        The microsecond integers are cached on the reader, so repeated calls are free.
+        """
+        if self._timestamps_us is None:
+            records = self.timestamp_records()
+            self._timestamps_us = (records['time_t'].astype(np.int64) * 1000000
+                                   + records['ms'].astype(np.int64) * 1000
+                                   + records['us'].astype(np.int64))
+
+        if as_datetime:
+            return self._timestamps_us.astype('datetime64[us]')
+        return self._timestamps_us / 1e6
+
+    def timing_report(self, gap_tolerance=0.5):
+        """
+        Analyses the frame timestamps for dropped frames and frame-rate jitter.
+
+        Args:
+            gap_tolerance: an interval longer than (1 + gap_tolerance) times the
+                           nominal interval is reported as a gap with dropped frames
+
+        Returns:
+            dict with nominal/measured fps, interval statistics in seconds,
+            the frame indices after which frames are missing, the estimated
+            number of dropped frames and any frames whose timestamp goes backwards.
+        """
+        self.timestamps()
+        timestamps_us = self._timestamps_us
+        # Differences are taken on the integer microseconds to avoid float cancellation
+        intervals = np.diff(timestamps_us) / 1e6
+        report = {
+            'frame_count': len(timestamps_us),
+            'fps_nominal': self.frame_rate,
+            'fps_measured': 0.0,
+            'duration': float(intervals.sum()),
+            'interval_mean': 0.0,
+            'interval_std': 0.0,
+            'jitter_max': 0.0,
+            'gaps': np.empty(0, dtype=np.int64),
+            'dropped_frames': 0,
+            'non_monotonic': np.empty(0, dtype=np.int64),
+        }
+        if len(intervals) == 0:
+            return report
+
+        median_interval = float(np.median(intervals))
+        nominal_interval = 1.0 / self.frame_rate if self.frame_rate > 0 else median_interval
+
+        report['fps_measured'] = 1.0 / median_interval if median_interval > 0 else 0.0
+        report['interval_mean'] = float(intervals.mean())
+        report['interval_std'] = float(intervals.std())
+        report['jitter_max'] = float(np.abs(intervals - median_interval).max())
+        report['non_monotonic'] = np.flatnonzero(intervals < 0) + 1
+
+        if nominal_interval > 0:
+            gaps = np.flatnonzero(intervals > nominal_interval * (1.0 + gap_tolerance))
+            report['gaps'] = gaps
+            report['dropped_frames'] = int(np.sum(np.rint(intervals[gaps] / nominal_interval) - 1))
+
+        return report
+
+    def frame_range_for_time(self, from_time=None, to_time=None):
+        """
+        Maps a wall-clock window onto frame numbers with a binary search over the
+        timestamp index, so no frame data is scanned.
+
+        Args:
+            from_time: window start (see parse_time_spec), None for the first frame
+            to_time: window end, inclusive; a string starting with '+' is taken as
+                     seconds after from_time. None for the last frame.
+
+        Returns:
+            tuple: (start_frame, end_frame) with end_frame exclusive
+        """
+        self.timestamps()
+        timestamps_us = self._timestamps_us
+        if len(timestamps_us) == 0:
+            return 0, 0
+
+        reference_us = int(timestamps_us[0])
+        start_us = parse_time_spec(from_time, reference_us)
+        if isinstance(to_time, str) and to_time.strip().startswith('+'):
+            end_us = (start_us if start_us is not None else reference_us) + int(round(float(to_time) * 1e6))
+        else:
+            end_us = parse_time_spec(to_time, reference_us)
+
+        if self._timestamps_sorted is None:
+            self._timestamps_sorted = bool(np.all(timestamps_us[1:] >= timestamps_us[:-1]))
+
+        if not self._timestamps_sorted:
+            # Timestamps jump backwards somewhere: fall back to a linear mask
+            print("Warning: frame timestamps are not monotonic, using a linear scan.")
+            mask = np.ones(len(timestamps_us), dtype=bool)
+            if start_us is not None:
+                mask &= timestamps_us >= start_us
+            if end_us is not None:
+                mask &= timestamps_us <= end_us
+            selected = np.flatnonzero(mask)
+            if len(selected) == 0:
+                return 0, 0
+            return int(selected[0]), int(selected[-1]) + 1
+
+        start_frame = 0 if start_us is None else int(np.searchsorted(timestamps_us, start_us, side='left'))
+        end_frame = len(timestamps_us) if end_us is None else int(np.searchsorted(timestamps_us, end_us, side='right'))
+        return start_frame, max(start_frame, end_frame)
+
+    def _decode_compressed(self, frame_num, f=None):
+        """Reads and decodes one frame of a variable-size sequence."""
+        offset = int(self.frame_offsets[frame_num]) + FRAME_SIZE_FIELD
+        size = int(self.frame_sizes[frame_num]) - FRAME_SIZE_FIELD
+        if f is None:
+            data = self._map_file()[offset:offset + size]
+        else:
+            data = _pread(f, size, offset)
+        return decode_frame(data, self.compression, self.image_format, self._frame_shape(), self._frame_dtype())
+
+    def _read_frame(self, f, frame_num):
+        """
+        Reads one frame with a positional read at header_size + i * true_image_size.
+        Returns None if the frame is truncated.
+        """
+        if self.compressed:
+            return self._decode_compressed(frame_num, f)
+
+        offset = self.header_size + frame_num * self.true_image_size
+        frame_data = _pread(f, self.image_size_bytes, offset)
+        if len(frame_data) < self.image_size_bytes:
+            return None
+        if self.packed_format:
+            return self._blocks_to_frames(frame_data, 1)[0]
+        return np.frombuffer(frame_data, dtype=self._frame_dtype()).reshape(self._frame_shape())
+
+    def read_frames(self, start_frame, end_frame, f=None):
+        """
+        Reads frames [start_frame, end_frame) with a single positional read and
+        returns them as a (T, H, W[, 3]) array viewing the read buffer.
+        """
+        count = end_frame - start_frame
+        if count <= 0:
+            return np.empty((0,) + self._frame_shape(), dtype=self._frame_dtype())
+
+        if self.compressed:
+            return self._read_compressed_frames(start_frame, end_frame, f)
+
+        # The last block only needs its pixel data, not its timestamp and padding
+        size = (count - 1) * self.true_image_size + self.image_size_bytes
+        offset = self.header_size + start_frame * self.true_image_size
+        if f is None:
+            with open(self.seq_file_path, 'rb') as f:
+                buf = _pread(f, size, offset)
+        else:
+            buf = _pread(f, size, offset)
+
+        if len(buf) < size:
+            # Truncated file: keep only the complete frames
+            if len(buf) < self.image_size_bytes:
+                count = 0
+            else:
+                count = (len(buf) - self.image_size_bytes) // self.true_image_size + 1
+        return self._blocks_to_frames(buf, count)
+
+    def _read_compressed_frames(self, start_frame, end_frame, f=None):
+        """
+        One positional read spanning the compressed frames, then a decode per frame.
+        Batches are decoded by a small thread pool, since zlib and PIL release the GIL.
+        """
+        base = int(self.frame_offsets[start_frame])
+        last = end_frame - 1
+        size = int(self.frame_offsets[last]) + int(self.frame_sizes[last]) - base
+        if f is None:
+            with open(self.seq_file_path, 'rb') as f:
+                buf = _pread(f, size, base)
+        else:
+            buf = _pread(f, size, base)
+
+        count = end_frame - start_frame
+        frames = np.empty((count,) + self._frame_shape(), dtype=self._frame_dtype())
+        view = memoryview(buf)
+
+        def decode(k):
+            i = start_frame + k
+            data_start = int(self.frame_offsets[i]) - base + FRAME_SIZE_FIELD
+            data_end = int(self.frame_offsets[i]) - base + int(self.frame_sizes[i])
+            frames[k] = decode_frame(view[data_start:data_end], self.compression, self.image_format,
+                                     self._frame_shape(), self._frame_dtype())
+
+        if count > 1 and DECODE_WORKERS > 1:
+            if self._decode_executor is None:
+                self._decode_executor = ThreadPoolExecutor(max_workers=DECODE_WORKERS)
+            # list() re-raises the first decode error
+            list(self._decode_executor.map(decode, range(count)))
+        else:
+            for k in range(count):
+                decode(k)
+        return frames
+
+    def iter_chunks(self, chunk_frames=None, start=0, end=None, max_bytes=64 * 1024 * 1024):
+        """
+        Iterates over frames [start, end) in batches, yielding (frame_indices, ndarray[T, H, W[, 3]]).
+        Each batch comes from one large read instead of T separate seek/read pairs.
+
+        Args:
+            chunk_frames: frames per batch; if None it is derived from max_bytes
+            start: first frame
+            end: one past the last frame (None means frame_count)
+            max_bytes: memory budget for one batch when chunk_frames is None
+        """
+        if self._frame_dtype() is None:
+            raise ValueError(f"Unsupported bit depth: {self.bit_depth}")
+
+        if end is None or end > self.frame_count:
+            end = self.frame_count
+        if chunk_frames is None:
+            chunk_frames = max_bytes // (self.true_image_size or 1)
+        chunk_frames = max(1, int(chunk_frames))
+
+        with open(self.seq_file_path, 'rb') as f:
+            for chunk_start in range(start, end, chunk_frames):
+                chunk_end = min(chunk_start + chunk_frames, end)
+                frames = self.read_frames(chunk_start, chunk_end, f)
+                if len(frames) == 0:
+                    return
+                yield np.arange(chunk_start, chunk_start + len(frames)), frames
+                if len(frames) < chunk_end - chunk_start:
+                    return
+
+    def close(self):
+        """
+        Releases the memory map. Views handed out earlier keep the mapping
+        alive until they are garbage collected.
+        """
+        if self._decode_executor is not None:
+            self._decode_executor.shutdown(wait=True)
+            self._decode_executor = None
+        with self._map_lock:
+            self._frames = None
+            self._mmap_bytes = None
+            if self._mmap is not None:
+                try:
+                    self._mmap.close()
+                except BufferError:
+                    # Views are still referenced elsewhere; the map is freed with them
+                    pass
+                self._mmap = None
+            if self._file is not None:
+                self._file.close()
+                self._file = None
 
     def _calculate_true_image_size(self, image_size_bytes):
         """
@@ -63,9 +727,31 @@ class SeqReader:
                 self.bit_depth = struct.unpack('<I', header[560:564])[0]
                 self.image_size_bytes = struct.unpack('<I', header[564:568])[0]
                 self.image_format = struct.unpack('<I', header[568:572])[0]
+                self.compression = struct.unpack('<I', header[624:628])[0]
+                self.significant_bits = self.bit_depth
 
-                # This is the key part: calculate the TrueImageSize based on the C++ logic
-                self.true_image_size = self._calculate_true_image_size(self.image_size_bytes)
+                # 10/12-bit data, packed or in 16-bit containers, is presented as 16-bit frames
+                self.packed_format = None
+                if self.bit_depth not in (8, 16, 24) and not is_variable_size(self.compression, self.image_format):
+                    packed_format, bits = resolve_pixel_format(self.bit_depth, self.width, self.height,
+                                                               self.image_size_bytes, self.pixel_format)
+                    if bits:
+                        self.packed_format = packed_format
+                        self.significant_bits = bits
+                        self.bit_depth = 16
+
+                # Older versions use a 1024-byte header; the field at offset 32 tells
+                header_size_field = struct.unpack('<I', header[32:36])[0]
+                if header_size_field in (1024, 8192):
+                    self.header_size = header_size_field
+
+                # TrueImageSize is recorded at offset 580; files with a missing or
+                # implausible value fall back to the C++ logic (8192-byte alignment)
+                true_image_size_field = struct.unpack('<I', header[580:584])[0]
+                if true_image_size_field >= self.image_size_bytes + 8:
+                    self.true_image_size = true_image_size_field
+                else:
+                    self.true_image_size = self._calculate_true_image_size(self.image_size_bytes)
                 
                 # The frame count from the header might be correct, but we can also verify it
                 self.frame_count = struct.unpack('<I', header[572:576])[0]
@@ -77,7 +763,10 @@ class SeqReader:
                     return False
                 
                 file_size = os.path.getsize(self.seq_file_path)
-                if file_size > self.header_size and self.true_image_size > 0:
+                self.compressed = is_variable_size(self.compression, self.image_format)
+                if self.compressed:
+                    self._load_frame_index()
+                elif file_size > self.header_size and self.true_image_size > 0:
                     calculated_frame_count = (file_size - self.header_size) // self.true_image_size
                     # If the header frame count is 0 or seems wrong, use the calculated one
                     if self.frame_count == 0 or self.frame_count > calculated_frame_count:
@@ -88,10 +777,17 @@ class SeqReader:
                 print("Norpix SEQ file header parsed successfully (with C++ logic):")
                 print(f"  - Dimensions: {self.width}x{self.height}")
                 print(f"  - Bit Depth: {self.bit_depth} bits")
+                if self.significant_bits != self.bit_depth:
+                    print(f"  - Pixel Format: {self.packed_format or '16-bit container'}, "
+                          f"{self.significant_bits} significant bits")
                 print(f"  - Image Size (raw): {self.image_size_bytes} bytes")
                 print(f"  - True Image Size (calculated, padded): {self.true_image_size} bytes")
                 print(f"  - Frame Count: {self.frame_count}")
                 print(f"  - Frame Rate: {self.frame_rate} fps")
+                if self.compressed:
+                    print(f"  - Compression: {self.compression} (format {self.image_format}), variable frame size")
+                if self.is_bayer:
+                    print(f"  - Bayer mosaic: {self.bayer_pattern or 'RGGB'}, demosaic: {self.demosaic_method}")
 
                 return True
 
@@ -101,9 +797,39 @@ class SeqReader:
             traceback.print_exc()
             return False
 
-    def extract_frames(self, output_dir, start_frame=0, end_frame=None, prefix="frame", format="PNG"):
+    def _load_frame_index(self):
+        """
+        Loads the frame-offset index of a variable-size sequence from its .idx
+        sidecar, or builds it in one pass and persists it for the next open.
+        """
+        index = load_frame_index(self.seq_file_path)
+        if index is None:
+            print("Building frame index for variable-size sequence...")
+            index = build_frame_index(self.seq_file_path, self.header_size, self.image_format)
+            save_frame_index(self.seq_file_path, *index)
+        self.frame_offsets, self.frame_sizes = index
+
+        # The header count may be short of (or past) what the file actually holds
+        if self.frame_count == 0 or self.frame_count > len(self.frame_offsets):
+            self.frame_count = len(self.frame_offsets)
+        self.frame_offsets = self.frame_offsets[:self.frame_count]
+        self.frame_sizes = self.frame_sizes[:self.frame_count]
+
+    def extract_frames(self, output_dir, start_frame=0, end_frame=None, prefix="frame", format="PNG",
+                       workers=1, progress_callback=None, should_stop=None, tone_mapping=None,
+                       max_part_bytes=None):
         """
         Extracts frames using the corrected logic.
+
+        With workers > 1 the range is split into small chunks that are encoded by a
+        process pool; output file names are unchanged and progress_callback(current, total)
+        is still called in frame order. should_stop() is polled to allow cancelling.
+        tone_mapping ('shift', 'minmax', 'percentile' or a ToneMapper) selects how 16-bit
+        frames are reduced to 8 bits for PNG/BMP; window modes are fitted on sampled frames
+        of the extracted range. format 'BIGTIFF' writes one multi-page stack instead
+        (see export_tiff_stack), 'NPY' one .npy array (see export_npy) and 'HDF5' one
+        compressed HDF5 dataset (see export_hdf5).
+        Returns the number of frames that were saved.
         """
         if not os.path.exists(output_dir):
             os.makedirs(output_dir)
@@ -114,93 +840,574 @@ class SeqReader:
         format = format.upper()
         ext = 'tif' if format == 'TIFF' else format.lower()
 
-        print(f"Extracting frames {start_frame} to {end_frame - 1}...")
+        if self._frame_dtype() is None:
+            print(f"Unsupported bit depth: {self.bit_depth}")
+            return 0
 
-        with open(self.seq_file_path, 'rb') as f:
-            for i in range(start_frame, end_frame):
-                # The offset calculation is now correct
-                offset = self.header_size + i * self.true_image_size
-                f.seek(offset)
-                
-                frame_data = f.read(self.image_size_bytes)
+        if format == 'BIGTIFF':
+            return self.export_tiff_stack(os.path.join(output_dir, f"{prefix}.tif"), start_frame, end_frame,
+                                          max_part_bytes, progress_callback, should_stop)
+        if format == 'NPY':
+            return self.export_npy(os.path.join(output_dir, f"{prefix}.npy"), start_frame, end_frame,
+                                   progress_callback, should_stop)
+        if format == 'HDF5':
+            return self.export_hdf5(os.path.join(output_dir, f"{prefix}.h5"), start_frame, end_frame,
+                                    progress_callback=progress_callback, should_stop=should_stop)
 
-                if len(frame_data) < self.image_size_bytes:
-                    print(f"Warning: Frame {i} is incomplete. Skipping.")
-                    continue
+        total = max(0, end_frame - start_frame)
+        print(f"Extracting frames {start_frame} to {end_frame - 1}...")
 
-                try:
-                    if self.bit_depth == 8:
-                        img_array = np.frombuffer(frame_data, dtype=np.uint8).reshape((self.height, self.width))
-                        img = Image.fromarray(img_array, mode='L')
-                    elif self.bit_depth == 16:
-                        img_array = np.frombuffer(frame_data, dtype=np.uint16).reshape((self.height, self.width))
-                        if format == 'TIFF':
-                             img = Image.fromarray(img_array, mode='I;16')
-                        else:
-                            img_array_8bit = (img_array / 256).astype(np.uint8)
-                            img = Image.fromarray(img_array_8bit, mode='L')
-                    elif self.bit_depth == 24:
-                        img_array = np.frombuffer(frame_data, dtype=np.uint8).reshape((self.height, self.width, 3))
-                        img = Image.fromarray(img_array, mode='RGB')
-                    else:
-                        print(f"Unsupported bit depth: {self.bit_depth}")
-                        continue
+        tone_mapper = None
+        if self.bit_depth == 16 and (format != 'TIFF' or self.is_bayer):
+            tone_mapper = resolve_tone_mapper(tone_mapping, self, start_frame, end_frame)
+            print(f"16-bit to 8-bit mapping: {tone_mapper.describe()}")
 
+        if workers is not None and workers > 1 and total > 1:
+            saved = self._extract_frames_parallel(output_dir, start_frame, end_frame, prefix, format, ext,
+                                                  workers, progress_callback, should_stop, tone_mapper)
+        else:
+            saved = 0
+            frames = self._frame_source()
+            for i in range(start_frame, end_frame):
+                if should_stop and should_stop():
+                    break
+                try:
+                    img = _frame_to_image(self.to_rgb(frames[i]), self.bit_depth, format, tone_mapper)
                     output_filename = f"{prefix}_{i:06d}.{ext}"
                     output_path = os.path.join(output_dir, output_filename)
                     img.save(output_path, format=format)
-
+                    saved += 1
                 except Exception as e:
                     print(f"Error processing frame {i}: {e}")
-        
-        print(f"Extraction complete. {end_frame - start_frame} frames saved to {output_dir}")
+
+                if progress_callback:
+                    progress_callback(i - start_frame + 1, total)
+
+        print(f"Extraction complete. {saved} frames saved to {output_dir}")
+        return saved
+
+    def export_tiff_stack(self, output_path, start_frame=0, end_frame=None, max_part_bytes=None,
+                          progress_callback=None, should_stop=None):
+        """
+        Writes frames [start_frame, end_frame) as pages of one multi-page BigTIFF
+        file, streamed batch by batch. Samples keep their bit depth (16-bit stays
+        16-bit); colour frames are stored as RGB. Each page's ImageDescription holds
+        the frame number and its timestamp in seconds since the epoch.
+
+        With max_part_bytes the stack is split into <name>_partNNN.tif files of at
+        most that size. Returns the number of frames that were written.
+        """
+        if end_frame is None or end_frame > self.frame_count:
+            end_frame = self.frame_count
+        total = max(0, end_frame - start_frame)
+        if total == 0:
+            print("No frames to export.")
+            return 0
+
+        frame_shape = self._frame_shape() + ((3,) if self.is_bayer else ())
+        page_bytes = TiffStackWriter.page_bytes(frame_shape, self._frame_dtype())
+        frames_per_part = total
+        if max_part_bytes:
+            frames_per_part = max(1, min(total, max_part_bytes // page_bytes))
+        base, ext = os.path.splitext(output_path)
+        timestamps = self.timestamps()
+        print(f"Exporting frames {start_frame} to {end_frame - 1} as a BigTIFF stack...")
+
+        saved = 0
+        writer = None
+        try:
+            for indices, frames in self.iter_chunks(start=start_frame, end=end_frame):
+                frames = self.to_rgb(frames)
+                for i, frame in zip(indices, frames):
+                    if should_stop and should_stop():
+                        return saved
+                    if saved % frames_per_part == 0:
+                        if writer is not None:
+                            writer.close()
+                        path = output_path
+                        if frames_per_part < total:
+                            path = f"{base}_part{saved // frames_per_part:03d}{ext or '.tif'}"
+                        writer = TiffStackWriter(path).open()
+                    writer.write_frame(frame, f"frame={i} timestamp={timestamps[i]:.6f}")
+                    saved += 1
+                    if progress_callback:
+                        progress_callback(saved, total)
+        finally:
+            if writer is not None:
+                writer.close()
+
+        print(f"Export complete. {saved} frames saved.")
+        return saved
+
+    def export_npy(self, output_path, start_frame=0, end_frame=None, progress_callback=None, should_stop=None):
+        """
+        Writes frames [start_frame, end_frame) as one (T, H, W[, 3]) array in a
+        standard .npy file, appended batch by batch with large sequential writes,
+        so np.load(output_path, mmap_mode='r') gives zero-copy access later.
+        Samples are stored as read (raw Bayer mosaics are not demosaiced);
+        24-bit frames are stored in RGB order.
+
+        The frame timestamps (float seconds since the epoch) go to
+        <name>_timestamps.npy next to it. If the export stops early the header
+        is rewritten with the number of frames actually written.
+        Returns the number of frames that were written.
+        """
+        if end_frame is None or end_frame > self.frame_count:
+            end_frame = self.frame_count
+        total = max(0, end_frame - start_frame)
+
+        def write_header(f, count):
+            np.lib.format.write_array_header_1_0(f, {
+                'descr': np.lib.format.dtype_to_descr(self._frame_dtype()),
+                'fortran_order': False,
+                'shape': (count,) + self._frame_shape(),
+            })
+
+        print(f"Exporting frames {start_frame} to {end_frame - 1} to {output_path}...")
+        saved = 0
+        with open(output_path, 'wb') as f:
+            # The header pads the frame count field, so rewriting it later keeps its length
+            write_header(f, total)
+            for _, frames in self.iter_chunks(start=start_frame, end=end_frame):
+                if should_stop and should_stop():
+                    break
+                frames = self.correct(frames)
+                if self.stored_bgr:
+                    frames = frames[..., ::-1]
+                f.write(np.ascontiguousarray(frames).data)
+                saved += len(frames)
+                if progress_callback:
+                    progress_callback(saved, total)
+
+            if saved != total:
+                f.seek(0)
+                write_header(f, saved)
+
+        base, _ = os.path.splitext(output_path)
+        np.save(f"{base}_timestamps.npy", self.timestamps()[start_frame:start_frame + saved])
+        print(f"Export complete. {saved} frames saved.")
+        return saved
+
+    def export_hdf5(self, output_path, start_frame=0, end_frame=None, max_memory_bytes=HDF5_MAX_MEMORY_BYTES,
+                    compression='gzip', compression_level=4, progress_callback=None, should_stop=None):
+        """
+        Writes frames [start_frame, end_frame) to a chunked, losslessly compressed
+        HDF5 file (requires h5py):
+
+          /frames      (T, H, W[, 3]) dataset, chunks of HDF5_CHUNK_FRAMES frames x
+                       HDF5_CHUNK_TILE x HDF5_CHUNK_TILE pixels, so reading one frame
+                       and reading a small ROI over time both touch few chunks
+          /timestamps  float seconds since the epoch, one per frame
+
+        The parsed header fields (HDF5_HEADER_ATTRS, plus the source file, packed
+        format and first frame) are attributes of /frames. Frames are streamed in
+        batches that are whole multiples of the chunk depth and never exceed
+        max_memory_bytes, so every chunk is compressed exactly once.
+
+        Args:
+            compression: 'gzip', 'lzf' or None; the byte shuffle filter is always on
+            compression_level: gzip level 0-9
+        Returns the number of frames that were written.
+        """
+        try:
+            import h5py
+        except ImportError:
+            print("Error: h5py is not installed")
+            print("Run: pip install h5py")
+            return 0
+
+        if end_frame is None or end_frame > self.frame_count:
+            end_frame = self.frame_count
+        total = max(0, end_frame - start_frame)
+        if total == 0:
+            print("No frames to export.")
+            return 0
+
+        frame_shape = self._frame_shape()
+        dtype = self._frame_dtype()
+        frame_bytes = int(np.prod(frame_shape)) * dtype.itemsize
+        chunk_frames = min(HDF5_CHUNK_FRAMES, total)
+        chunks = (chunk_frames, min(HDF5_CHUNK_TILE, self.height), min(HDF5_CHUNK_TILE, self.width))
+        chunks += frame_shape[2:]
+        # Half the budget for the batch read from the SEQ, half for HDF5's chunk cache
+        batch_frames = max(chunk_frames, (max_memory_bytes // 2 // frame_bytes) // chunk_frames * chunk_frames)
+
+        print(f"Exporting frames {start_frame} to {end_frame - 1} to {output_path}...")
+        saved = 0
+        with h5py.File(output_path, 'w', rdcc_nbytes=max(max_memory_bytes // 2, 1024 * 1024)) as h5:
+            frames_ds = h5.create_dataset(
+                'frames', shape=(total,) + frame_shape, maxshape=(None,) + frame_shape, dtype=dtype,
+                chunks=chunks, compression=compression,
+                compression_opts=compression_level if compression == 'gzip' else None, shuffle=True)
+            for name in HDF5_HEADER_ATTRS:
+                frames_ds.attrs[name] = getattr(self, name)
+            frames_ds.attrs['packed_format'] = self.packed_format or ''
+            frames_ds.attrs['source_file'] = os.path.basename(self.seq_file_path)
+            frames_ds.attrs['start_frame'] = start_frame
+            frames_ds.attrs['channel_order'] = 'RGB' if self.bit_depth == 24 else 'mono'
+
+            for _, frames in self.iter_chunks(chunk_frames=batch_frames, start=start_frame, end=end_frame):
+                if should_stop and should_stop():
+                    break
+                frames = self.correct(frames)
+                if self.stored_bgr:
+                    frames = frames[..., ::-1]
+                frames_ds[saved:saved + len(frames)] = frames
+                saved += len(frames)
+                if progress_callback:
+                    progress_callback(saved, total)
+
+            if saved != total:
+                frames_ds.resize(saved, axis=0)
+            h5.create_dataset('timestamps', data=self.timestamps()[start_frame:start_frame + saved])
+
+        print(f"Export complete. {saved} frames saved.")
+        return saved
+
+    def _extract_frames_parallel(self, output_dir, start_frame, end_frame, prefix, format, ext,
+                                 workers, progress_callback, should_stop, tone_mapper=None):
+        """Process-pool backend of extract_frames()."""
+        total = end_frame - start_frame
+        # Small chunks keep the progress smooth and the pool balanced
+        chunk_frames = max(1, min(64, total // (workers * 4)))
+        ranges = [(i, min(i + chunk_frames, end_frame)) for i in range(start_frame, end_frame, chunk_frames)]
+
+        saved = 0
+        done = 0
+        executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_extract_worker,
+                                       initargs=(self, tone_mapper))
+        try:
+            futures = [executor.submit(_extract_frame_range, a, b, output_dir, prefix, format, ext)
+                       for a, b in ranges]
+            # Collect in submission order so progress is reported in frame order
+            for (a, b), future in zip(ranges, futures):
+                if should_stop and should_stop():
+                    break
+                errors = future.result()
+                for frame_num, message in errors:
+                    print(f"Error processing frame {frame_num}: {message}")
+                saved += (b - a) - len(errors)
+                done += b - a
+                if progress_callback:
+                    progress_callback(done, total)
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+        return saved
+
+
+class MultiSeqReader(SeqReader):
+    """
+    Presents several SEQ files with identical geometry (e.g. the parts StreamPix
+    writes for one long recording) as a single continuous sequence.
+
+    Frame i is looked up in the part that holds it; reads that span a part
+    boundary are stitched together. Everything built on read_frames(),
+    iter_chunks(), reader[i] and the timestamp index (extraction, cropping,
+    video encoding, time windows) works unchanged.
+    """
+
+    # Header fields that must agree between parts
+    GEOMETRY_FIELDS = ('width', 'height', 'bit_depth', 'image_size_bytes', 'true_image_size',
+                       'image_format', 'compression', 'packed_format')
+
+    def __init__(self, seq_file_paths, pixel_format=None):
+        super().__init__(seq_file_paths[0], pixel_format)
+        self.seq_file_paths = list(seq_file_paths)
+        self.parts = [SeqReader(path, pixel_format) for path in self.seq_file_paths]
+        self.part_starts = np.zeros(1, dtype=np.int64)  # first global frame of each part, plus the total
+
+    def read_header(self):
+        """Reads every part's header and checks that the geometry matches the first part."""
+        for part in self.parts:
+            if not part.read_header():
+                print(f"Error: could not read {part.seq_file_path}")
+                return False
+
+        first = self.parts[0]
+        for part in self.parts[1:]:
+            mismatched = [name for name in self.GEOMETRY_FIELDS if getattr(part, name) != getattr(first, name)]
+            if mismatched:
+                details = ", ".join(f"{name} {getattr(part, name)} != {getattr(first, name)}" for name in mismatched)
+                print(f"Error: {part.seq_file_path} does not match {first.seq_file_path}: {details}")
+                return False
+
+        for name in self.GEOMETRY_FIELDS + ('frame_rate', 'header_size', 'compressed', 'significant_bits'):
+            setattr(self, name, getattr(first, name))
+        self.part_starts = np.cumsum([0] + [part.frame_count for part in self.parts], dtype=np.int64)
+        self.frame_count = int(self.part_starts[-1])
+
+        print(f"Combined {len(self.parts)} files into one sequence of {self.frame_count} frames")
+        return True
+
+    def _segments(self, start_frame, end_frame):
+        """Yields (part, local_start, local_end) covering global frames [start_frame, end_frame)."""
+        index = int(np.searchsorted(self.part_starts, start_frame, side='right')) - 1
+        while start_frame < end_frame and index < len(self.parts):
+            part_start = int(self.part_starts[index])
+            part_end = int(self.part_starts[index + 1])
+            local_end = min(end_frame, part_end) - part_start
+            if local_end > start_frame - part_start:
+                yield self.parts[index], start_frame - part_start, local_end
+            start_frame = part_end
+            index += 1
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            start, stop, step = key.indices(self.frame_count)
+            if step == 1:
+                return self.read_frames(start, stop)
+            return np.stack([self[i] for i in range(start, stop, step)])
+        if key < 0:
+            key += self.frame_count
+        if not 0 <= key < self.frame_count:
+            raise IndexError(f"frame {key} out of range")
+        part, local, _ = next(self._segments(key, key + 1))
+        return part[local]
+
+    def __getstate__(self):
+        state = super().__getstate__()
+        state['parts'] = list(self.parts)  # each part drops its own memory map when pickled
+        return state
+
+    def _frame_source(self):
+        return self
+
+    def open_mmap(self):
+        raise ValueError("A multi-file sequence has no single memory map; use reader[i] or iter_chunks()")
+
+    def _read_frame(self, f, frame_num):
+        """Reads one frame from the part that holds it (f is ignored; each part uses its own file)."""
+        part, local, _ = next(self._segments(frame_num, frame_num + 1))
+        with open(part.seq_file_path, 'rb') as part_file:
+            return part._read_frame(part_file, local)
+
+    def read_frames(self, start_frame, end_frame, f=None):
+        """
+        Reads global frames [start_frame, end_frame). A range inside one part is
+        returned as that part's view; a range crossing parts is concatenated.
+        """
+        pieces = []
+        for part, local_start, local_end in self._segments(start_frame, end_frame):
+            frames = part.read_frames(local_start, local_end)
+            pieces.append(frames)
+            if len(frames) < local_end - local_start:
+                break  # Truncated part: stop at the first missing frame
+        if not pieces:
+            return np.empty((0,) + self._frame_shape(), dtype=self._frame_dtype())
+        if len(pieces) == 1:
+            return pieces[0]
+        return np.concatenate(pieces)
+
+    def timestamp_records(self):
+        if self.frame_count == 0:
+            return np.empty(0, dtype=TIMESTAMP_DTYPE)
+        return np.concatenate([part.timestamp_records() for part in self.parts])
+
+    def close(self):
+        for part in self.parts:
+            part.close()
+        super().close()
+
+
+def open_seq_reader(seq_files, pixel_format=None):
+    """
+    Returns a SeqReader for one path, or a MultiSeqReader when given several.
+    The header is not read yet. pixel_format selects the packing of 10/12-bit
+    data (see pixel_formats.PACKED_FORMATS); None picks it from the bit depth.
+    """
+    if isinstance(seq_files, (list, tuple)):
+        if len(seq_files) == 1:
+            return SeqReader(seq_files[0], pixel_format)
+        return MultiSeqReader(seq_files, pixel_format)
+    return SeqReader(seq_files, pixel_format)
+
+
+def load_flat_field(dark_files=None, flat_files=None, pixel_format=None):
+    """
+    Builds a FlatFieldCorrector from calibration sequences: the master dark and
+    flat frames are the averages of all frames in dark_files and flat_files.
+
+    Args:
+        dark_files / flat_files: one path or a list of paths (concatenated), or None
+        pixel_format: packed 10/12-bit format, as for open_seq_reader
+
+    Returns:
+        FlatFieldCorrector, or None if neither is given or a file cannot be read
+    """
+    if not dark_files and not flat_files:
+        return None
+
+    readers = {}
+    try:
+        for name, files in (('dark', dark_files), ('flat', flat_files)):
+            if not files:
+                continue
+            missing = seq_files_exist(files)
+            if missing:
+                print(f"错误: 校准文件 '{missing}' 不存在")
+                return None
+            reader = open_seq_reader(files, pixel_format)
+            readers[name] = reader
+            if not reader.read_header():
+                print(f"无法解析校准文件头: {files}")
+                return None
+
+        print("正在计算暗场/平场主帧...")
+        correction = FlatFieldCorrector.from_readers(readers.get('dark'), readers.get('flat'))
+        print(f"暗场/平场校正: {correction.describe()}")
+        return correction
+    except ValueError as e:
+        print(f"错误: {e}")
+        return None
+    finally:
+        for reader in readers.values():
+            reader.close()
+
+
+def seq_files_exist(seq_files):
+    """Returns the first missing path of one path or a list of paths, or None if all exist."""
+    for path in (seq_files if isinstance(seq_files, (list, tuple)) else [seq_files]):
+        if not os.path.exists(path):
+            return path
+    return None
 
 
 def seq_to_png(seq_file, output_dir=None, start_frame=0, end_frame=None,
-               prefix='frame', width=None, height=None, bitdepth=8, format='PNG'):
-    if not os.path.exists(seq_file):
-        print(f"错误: 文件 '{seq_file}' 不存在")
+               prefix='frame', width=None, height=None, bitdepth=8, format='PNG', workers=1,
+               from_time=None, to_time=None, tone_mapping=None, pixel_format=None,
+               bayer_pattern=None, demosaic_method='bilinear', max_part_bytes=None, correction=None):
+    missing = seq_files_exist(seq_file)
+    if missing:
+        print(f"错误: 文件 '{missing}' 不存在")
         return False
 
+    # 多个文件时按顺序拼接为一个连续序列，输出目录以第一个文件命名
+    first_file = seq_file[0] if isinstance(seq_file, (list, tuple)) else seq_file
     if output_dir is None:
-        seq_basename = os.path.splitext(os.path.basename(seq_file))[0]
-        output_dir = os.path.join(os.path.dirname(seq_file), f"{seq_basename}_frames")
+        seq_basename = os.path.splitext(os.path.basename(first_file))[0]
+        output_dir = os.path.join(os.path.dirname(first_file), f"{seq_basename}_frames")
 
-    reader = SeqReader(seq_file)
+    reader = open_seq_reader(seq_file, pixel_format)
+    reader.set_demosaic(bayer_pattern, demosaic_method)
     if not reader.read_header():
         print("无法解析 SEQ 文件头，转换失败。")
         return False
+    if correction is not None:
+        try:
+            reader.set_correction(correction)
+        except ValueError as e:
+            print(f"错误: {e}")
+            reader.close()
+            return False
+
+    # 按时间窗口选帧（二分查找时间戳索引）
+    if from_time is not None or to_time is not None:
+        start_frame, end_frame = reader.frame_range_for_time(from_time, to_time)
+        print(f"时间窗口对应帧范围: {start_frame} 到 {end_frame - 1}")
+        if start_frame >= end_frame:
+            print("时间窗口内没有帧。")
+            reader.close()
+            return False
 
     reader.extract_frames(
         output_dir=output_dir,
         start_frame=start_frame,
         end_frame=end_frame,
         prefix=prefix,
-        format=format
+        format=format,
+        workers=workers,
+        tone_mapping=tone_mapping,
+        max_part_bytes=max_part_bytes
     )
+    reader.close()
+    return True
+
+
+def print_timing_report(seq_file):
+    """打印 SEQ 文件的帧时间戳分析（丢帧、帧间隔抖动）"""
+    reader = open_seq_reader(seq_file)
+    if not reader.read_header():
+        print("无法解析 SEQ 文件头。")
+        return False
+
+    report = reader.timing_report()
+    print("帧时间戳分析:")
+    print(f"  - 帧数: {report['frame_count']}")
+    print(f"  - 时长: {report['duration']:.6f} s")
+    print(f"  - 标称帧率: {report['fps_nominal']} fps")
+    print(f"  - 实测帧率 (中位间隔): {report['fps_measured']:.3f} fps")
+    print(f"  - 帧间隔均值/标准差: {report['interval_mean'] * 1e3:.4f} ms / {report['interval_std'] * 1e3:.4f} ms")
+    print(f"  - 最大抖动: {report['jitter_max'] * 1e3:.4f} ms")
+    print(f"  - 丢帧: 约 {report['dropped_frames']} 帧，出现在 {len(report['gaps'])} 处")
+    for gap in report['gaps'][:20]:
+        print(f"      帧 {gap} -> {gap + 1}")
+    if len(report['non_monotonic']):
+        print(f"  - 时间戳倒退的帧: {len(report['non_monotonic'])} 个")
+    reader.close()
     return True
 
 
 def main():
     parser = argparse.ArgumentParser(description='将 SEQ 文件转换为图像序列')
-    parser.add_argument('seq_file', help='输入的 SEQ 文件路径')
+    parser.add_argument('seq_file', nargs='+', help='输入的 SEQ 文件路径（多个文件按顺序拼接为一个序列）')
     parser.add_argument('-o', '--output', default=None, help='输出目录 (默认: seq文件同名目录)')
     parser.add_argument('-s', '--start', type=int, default=0, help='起始帧号 (默认: 0)')
     parser.add_argument('-e', '--end', type=int, default=None, help='结束帧号 (默认: 全部)')
     parser.add_argument('-p', '--prefix', default='frame', help='输出文件名前缀 (默认: frame)')
-    parser.add_argument('-f', '--format', default='PNG', choices=['PNG', 'TIFF', 'BMP'], help='输出图像格式 (默认: PNG)')
+    parser.add_argument('-f', '--format', default='PNG', choices=['PNG', 'TIFF', 'BMP', 'BIGTIFF', 'NPY', 'HDF5'],
+                        help='输出格式，BIGTIFF 为所有帧写入一个多页 BigTIFF 堆栈，'
+                             'NPY 为一个 (T, H, W) 的 .npy 数组及时间戳，HDF5 为分块压缩的 .h5 文件 (默认: PNG)')
+    parser.add_argument('--part-size', type=float, default=None,
+                        help='BIGTIFF 堆栈每个分段的最大大小 (GB)，超过时写为 <前缀>_partNNN.tif (默认: 不分段)')
+    parser.add_argument('-j', '--workers', type=int, default=1, help='并行编码进程数 (默认: 1)')
+    parser.add_argument('--from-time', default=None,
+                        help='起始时间: HH:MM:SS.fff (录制当天本地时间)、完整日期时间或相对首帧的秒数')
+    parser.add_argument('--to-time', default=None,
+                        help='结束时间 (含)，格式同 --from-time；以 + 开头表示相对起始时间的秒数，如 +2')
+    parser.add_argument('--tone', default='shift', choices=TONE_MODES,
+                        help='16 位转 8 位 (PNG/BMP) 的映射: shift 取高 8 位, minmax/percentile 按抽样帧自动设定窗口 (默认: shift)')
+    parser.add_argument('--pixel-format', default=None, choices=list(PACKED_FORMATS),
+                        help='10/12 位打包数据的格式 (默认: 按位深度取 Mono12Packed / Mono10Packed)')
+    parser.add_argument('--bayer', default=None, choices=BAYER_PATTERNS,
+                        help='按指定排列对原始 Bayer 数据去马赛克 (默认: 头部为 Bayer 格式时按 RGGB)')
+    parser.add_argument('--demosaic', default='bilinear', choices=DEMOSAIC_METHODS,
+                        help='去马赛克方法: bilinear 双线性, edge 边缘自适应 (默认: bilinear)')
+    parser.add_argument('--dark', nargs='+', default=None,
+                        help='暗场校准 SEQ 文件，全部帧的平均值作为暗场主帧')
+    parser.add_argument('--flat', nargs='+', default=None,
+                        help='平场校准 SEQ 文件；给出时按 (raw - dark) / (flat - dark) 校正')
+    parser.add_argument('--timing', action='store_true', help='只分析帧时间戳（丢帧、抖动），不导出图像')
     # Manual override arguments are no longer necessary if the header is parsed correctly
     # but can be kept for edge cases if needed.
     
     args = parser.parse_args()
 
+    if args.timing:
+        print_timing_report(args.seq_file)
+        return
+
+    correction = None
+    if args.dark or args.flat:
+        correction = load_flat_field(args.dark, args.flat, args.pixel_format)
+        if correction is None:
+            return
+
     seq_to_png(
         seq_file=args.seq_file,
         output_dir=args.output,
         start_frame=args.start,
         end_frame=args.end,
         prefix=args.prefix,
-        format=args.format
+        format=args.format,
+        workers=args.workers,
+        from_time=args.from_time,
+        to_time=args.to_time,
+        tone_mapping=args.tone,
+        pixel_format=args.pixel_format,
+        bayer_pattern=args.bayer,
+        demosaic_method=args.demosaic,
+        max_part_bytes=int(args.part_size * 1024 ** 3) if args.part_size else None,
+        correction=correction
     )
 
 
@@ -4,46 +4,145 @@ SEQ 文件 ROI 裁剪工具
 """
 
 import os
+import sys
+import errno
 import struct
+import argparse
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import numpy as np
 from PIL import Image
-from seq_to_png import SeqReader
+from seq_to_png import SeqReader, MultiSeqReader, open_seq_reader, seq_files_exist, load_flat_field, _pread
+from seq_compression import TIMESTAMP_SIZE, save_frame_index
+from images_to_seq import SeqWriter, _pwrite, DEFAULT_FRAME_ALIGNMENT, COMPACT_FRAME_ALIGNMENT
+from seq_tone_mapping import resolve_tone_mapper
+from pixel_formats import PACKED_FORMATS
+from background import BackgroundSubtractor, BACKGROUND_MODES, POLARITIES, DEFAULT_WINDOW
+
+
+# 多线程裁剪时每个任务处理的帧段大小上限
+PARALLEL_CROP_CHUNK_FRAMES = 256
+PARALLEL_CROP_CHUNK_BYTES = 16 * 1024 * 1024
+
+# 原样复制帧块时每次系统调用的字节数上限（也是进度汇报的粒度）
+COPY_CHUNK_BYTES = 64 * 1024 * 1024
+
+# 按大小分割时每个分段文件的默认上限
+DEFAULT_PART_BYTES = 4 * 1024 ** 3
+
+
+class FrameCache:
+    """
+    按字节数限制容量的 LRU 解码帧缓存
+
+    每次取帧后，后台线程沿浏览方向预取后续若干帧，
+    前后来回切换帧时可直接命中缓存。
+    """
+
+    def __init__(self, loader, frame_count, max_bytes=256 * 1024 * 1024, prefetch=4):
+        """
+        Args:
+            loader: 解码函数 loader(frame_num) -> ndarray
+            frame_count: 总帧数，用于限制预取范围
+            max_bytes: 缓存容量上限（字节）
+            prefetch: 每次沿浏览方向预取的帧数
+        """
+        self.loader = loader
+        self.frame_count = frame_count
+        self.max_bytes = max_bytes
+        self.prefetch = prefetch
+        self._frames = OrderedDict()
+        self._bytes = 0
+        self._pending = set()
+        self._last_frame = None
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1)
+
+    def get(self, frame_num):
+        """取一帧（命中缓存直接返回），并安排后台预取"""
+        with self._lock:
+            frame = self._frames.get(frame_num)
+            if frame is not None:
+                self._frames.move_to_end(frame_num)
+
+        if frame is None:
+            frame = self.loader(frame_num)
+            self._put(frame_num, frame)
+
+        self._schedule_prefetch(frame_num)
+        return frame
+
+    def clear(self):
+        with self._lock:
+            self._frames.clear()
+            self._bytes = 0
+
+    def shutdown(self):
+        """停止预取线程（等待正在进行的预取结束，之后才能关闭读取器）并清空缓存"""
+        self._executor.shutdown(wait=True, cancel_futures=True)
+        self.clear()
+
+    def _put(self, frame_num, frame):
+        with self._lock:
+            if frame_num in self._frames:
+                return
+            self._frames[frame_num] = frame
+            self._bytes += frame.nbytes
+            # 淘汰最久未使用的帧，至少保留刚放入的一帧
+            while self._bytes > self.max_bytes and len(self._frames) > 1:
+                _, evicted = self._frames.popitem(last=False)
+                self._bytes -= evicted.nbytes
+
+    def _schedule_prefetch(self, frame_num):
+        # 浏览方向：与上一次请求的帧号比较
+        direction = -1 if self._last_frame is not None and frame_num < self._last_frame else 1
+        self._last_frame = frame_num
+
+        with self._lock:
+            targets = []
+            for k in range(1, self.prefetch + 1):
+                n = frame_num + direction * k
+                if 0 <= n < self.frame_count and n not in self._frames and n not in self._pending:
+                    self._pending.add(n)
+                    targets.append(n)
+
+        for n in targets:
+            self._executor.submit(self._prefetch_one, n)
+
+    def _prefetch_one(self, frame_num):
+        try:
+            # 方向已改变时，过期的预取请求直接丢弃
+            if self._last_frame is None or abs(frame_num - self._last_frame) <= self.prefetch:
+                self._put(frame_num, self.loader(frame_num))
+        except Exception as e:
+            print(f"预取帧 {frame_num} 失败: {e}")
+        finally:
+            with self._lock:
+                self._pending.discard(frame_num)
 
 
 class SeqCropper:
     """SEQ 文件 ROI 裁剪器"""
 
-    def __init__(self, seq_file_path):
+    def __init__(self, seq_file_path, cache_bytes=256 * 1024 * 1024, tone_mapping='percentile', pixel_format=None):
         """
         初始化裁剪器
 
         Args:
-            seq_file_path: 输入 SEQ 文件路径
+            seq_file_path: 输入 SEQ 文件路径（或按顺序拼接的多个文件路径列表）
+            cache_bytes: 预览帧缓存容量（字节）
+            tone_mapping: 16 位预览转 8 位的映射方式（见 seq_tone_mapping）
+            pixel_format: 10/12 位打包数据的格式（None 为按位深度自动选择）；
+                打包数据解包后按 16 位写出
         """
         self.seq_file_path = seq_file_path
-        self.reader = SeqReader(seq_file_path)
+        self.reader = open_seq_reader(seq_file_path, pixel_format)
         self.header_loaded = False
-
-    def _calculate_true_image_size(self, image_size_bytes):
-        """
-        计算 TrueImageSize，按照 NorPix C++ 实现的逻辑
-        TrueImageSize = ImageSizeBytes + 8 字节时间戳，然后对齐到 8192 的倍数
-
-        Args:
-            image_size_bytes: 原始图像数据大小
-
-        Returns:
-            int: 对齐后的 TrueImageSize
-        """
-        # 添加 8 字节时间戳
-        size_with_timestamp = image_size_bytes + 8
-
-        # 对齐到 8192 的倍数
-        alignment = 8192
-        if size_with_timestamp % alignment == 0:
-            return size_with_timestamp
-        else:
-            return ((size_with_timestamp // alignment) + 1) * alignment
+        self.cache_bytes = cache_bytes
+        self.frame_cache = None
+        self.tone_mapping = tone_mapping
+        self.tone_mapper = None
 
     def load_header(self):
         """加载 SEQ 文件头信息"""
@@ -54,15 +153,29 @@ class SeqCropper:
             return success
         return True
 
-    def get_frame_image(self, frame_num):
+    def _decode_preview_frame(self, frame_num):
+        """解码一帧为用于显示的 uint8 数组（8 位灰度或 RGB）"""
+        img_array = self.reader.to_rgb(self.reader[frame_num])
+
+        if self.reader.bit_depth == 16:
+            return self.tone_mapper.apply(img_array)
+
+        # 去马赛克、校正等已得到独立的连续数组，直接缓存
+        if img_array.flags.owndata and img_array.flags.c_contiguous:
+            return img_array
+        # 其余（内存映射视图本身，或 BGR 的反序视图）拷贝为独立数组，使后台预取真正把数据读入内存，
+        # 缓存的字节数也与实际占用的内存一致
+        return np.array(img_array, order='C')
+
+    def get_frame_array(self, frame_num):
         """
-        读取单帧图像并返回 PIL Image 对象
+        读取单帧用于显示的 uint8 数组（经过 LRU 缓存）
 
         Args:
             frame_num: 帧号 (从0开始)
 
         Returns:
-            PIL Image 对象，失败返回 None
+            ndarray (H, W) 或 (H, W, 3)，失败返回 None
         """
         if not self.header_loaded:
             if not self.load_header():
@@ -72,54 +185,61 @@ class SeqCropper:
             print(f"错误: 帧号 {frame_num} 超出范围 (0-{self.reader.frame_count-1})")
             return None
 
-        # 计算每帧的字节数
-        bytes_per_pixel = self.reader.bit_depth // 8
-        if self.reader.bit_depth % 8 != 0:
-            bytes_per_pixel += 1
+        if self.reader.bit_depth not in (8, 16, 24):
+            print(f"不支持的位深度: {self.reader.bit_depth}")
+            return None
 
-        expected_image_size = self.reader.width * self.reader.height * bytes_per_pixel
-        frame_size = self.reader.true_image_size if self.reader.true_image_size > 0 else expected_image_size
+        if self.tone_mapper is None and self.reader.bit_depth == 16:
+            # 窗口统计量只在首次预览时由抽样帧计算一次
+            self.tone_mapper = resolve_tone_mapper(self.tone_mapping, self.reader)
 
-        try:
-            with open(self.seq_file_path, 'rb') as f:
-                # 跳转到指定帧
-                offset = self.reader.header_size + frame_num * frame_size
-                f.seek(offset)
+        if self.frame_cache is None:
+            self.frame_cache = FrameCache(self._decode_preview_frame, self.reader.frame_count, self.cache_bytes)
 
-                # 只读取图像数据部分，不包括时间戳和填充（参考 seq_to_png.py 的实现）
-                frame_data = f.read(self.reader.image_size_bytes)
+        try:
+            return self.frame_cache.get(frame_num)
 
-                if len(frame_data) < self.reader.image_size_bytes:
-                    print(f"警告: 帧 {frame_num} 数据不完整")
-                    return None
+        except Exception as e:
+            print(f"读取帧失败: {e}")
+            import traceback
+            traceback.print_exc()
+            return None
 
-                # 解析图像数据
-                if self.reader.bit_depth == 8:
-                    img_array = np.frombuffer(frame_data, dtype=np.uint8).reshape((self.reader.height, self.reader.width))
-                    img = Image.fromarray(img_array, mode='L')
+    def get_frame_image(self, frame_num):
+        """
+        读取单帧图像并返回 PIL Image 对象
 
-                elif self.reader.bit_depth == 16:
-                    img_array = np.frombuffer(frame_data, dtype=np.uint16).reshape((self.reader.height, self.reader.width))
-                    img_array_8bit = (img_array / 256).astype(np.uint8)
-                    img = Image.fromarray(img_array_8bit, mode='L')
+        Args:
+            frame_num: 帧号 (从0开始)
 
-                elif self.reader.bit_depth == 24:
-                    img_array = np.frombuffer(frame_data, dtype=np.uint8).reshape((self.reader.height, self.reader.width, 3))
-                    img = Image.fromarray(img_array, mode='RGB')
+        Returns:
+            PIL Image 对象，失败返回 None
+        """
+        img_array = self.get_frame_array(frame_num)
+        if img_array is None:
+            return None
 
-                else:
-                    print(f"不支持的位深度: {self.reader.bit_depth}")
-                    return None
+        if img_array.ndim == 3:
+            return Image.fromarray(img_array, mode='RGB')
+        return Image.fromarray(img_array, mode='L')
 
-                return img
+    def set_tone_mapping(self, tone_mapping):
+        """更换 16 位预览的映射方式，已缓存的预览帧作废"""
+        self.tone_mapping = tone_mapping
+        self.tone_mapper = None
+        if self.frame_cache is not None:
+            self.frame_cache.clear()
 
-        except Exception as e:
-            print(f"读取帧失败: {e}")
-            import traceback
-            traceback.print_exc()
-            return None
+    def close(self):
+        """释放预览缓存和内存映射"""
+        if self.frame_cache is not None:
+            self.frame_cache.shutdown()
+            self.frame_cache = None
+        self.reader.close()
 
-    def crop_to_new_seq(self, output_seq_path, roi_center_x, roi_center_y, roi_width, roi_height, progress_callback=None):
+    def crop_to_new_seq(self, output_seq_path, roi_center_x, roi_center_y, roi_width, roi_height, progress_callback=None,
+                        start_frame=0, end_frame=None, from_time=None, to_time=None, workers=1,
+                        alignment=DEFAULT_FRAME_ALIGNMENT, compression=None, background=None):
         """
         根据 ROI 裁剪 SEQ 文件并创建新的 SEQ 文件
 
@@ -130,15 +250,51 @@ class SeqCropper:
             roi_width: ROI 宽度
             roi_height: ROI 高度
             progress_callback: 进度回调函数 callback(current, total)
+            start_frame: 起始帧号（含）
+            end_frame: 结束帧号（不含，None 为到末尾）
+            from_time / to_time: 时间窗口，格式见 seq_to_png.parse_time_spec；
+                给出时按时间戳二分查找帧范围，优先于 start_frame/end_frame
+            workers: 并行裁剪线程数；> 1 时各线程独立读取、切片并定位写入不同的帧段
+            alignment: 输出帧块的对齐字节数；小 ROI 用 COMPACT_FRAME_ALIGNMENT 可省去大部分填充
+            compression: None 为不压缩；'zlib' 为逐帧无损压缩（见 SeqWriter），
+                此时按顺序读取，workers 个线程用于压缩
+            background: BackgroundSubtractor，给出时每个 ROI 用一个独立的副本扣除滑动背景
+                （只在 ROI 内计算，按顺序读取）
 
         Returns:
             tuple: (success: bool, roi_top_left_x: int, roi_top_left_y: int, message: str)
         """
+        return self.crop_to_multiple_seqs(
+            [(output_seq_path, roi_center_x, roi_center_y, roi_width, roi_height)],
+            progress_callback, start_frame, end_frame, from_time, to_time, workers, alignment, compression,
+            background
+        )[0]
+
+    def crop_to_multiple_seqs(self, rois, progress_callback=None, start_frame=0, end_frame=None,
+                              from_time=None, to_time=None, workers=1, alignment=DEFAULT_FRAME_ALIGNMENT,
+                              compression=None, background=None):
+        """
+        一次读取源文件，同时裁剪出多个 ROI，每个 ROI 写入一个新的 SEQ 文件
+
+        源文件的每一帧只读取一次，再分别切片写入各输出文件，
+        N 个 ROI 的 I/O 量与裁剪一个 ROI 相同。某个 ROI 出错不影响其余 ROI。
+
+        Args:
+            rois: [(output_seq_path, roi_center_x, roi_center_y, roi_width, roi_height), ...]
+            其余参数同 crop_to_new_seq
+
+        Returns:
+            list: 与 rois 一一对应的 (success, roi_top_left_x, roi_top_left_y, message)
+        """
+        results = [(False, 0, 0, "未处理")] * len(rois)
+
         if not self.header_loaded:
             if not self.load_header():
-                return False, 0, 0, "无法加载 SEQ 文件头"
+                return [(False, 0, 0, "无法加载 SEQ 文件头")] * len(rois)
 
-        try:
+        # 检查每个 ROI 是否在图像范围内
+        targets = []
+        for index, (output_seq_path, roi_center_x, roi_center_y, roi_width, roi_height) in enumerate(rois):
             # 计算 ROI 的左上角坐标
             roi_x = roi_center_x - roi_width // 2
             roi_y = roi_center_y - roi_height // 2
@@ -148,122 +304,207 @@ class SeqCropper:
                 error_msg = f"ROI 超出图像范围\n"
                 error_msg += f"图像尺寸: {self.reader.width} x {self.reader.height}\n"
                 error_msg += f"ROI 范围: ({roi_x}, {roi_y}) 到 ({roi_x + roi_width}, {roi_y + roi_height})"
-                return False, roi_x, roi_y, error_msg
+                results[index] = (False, roi_x, roi_y, error_msg)
+                continue
+
+            roi = (slice(roi_y, roi_y + roi_height), slice(roi_x, roi_x + roi_width))
+            if self.reader.bit_depth == 24 and not self.reader.stored_bgr:
+                # 解码得到的 RGB 帧（如 JPEG）按输出 SEQ 的 BGR 顺序写入
+                roi += (slice(None, None, -1),)
+            if self.reader.is_bayer and (roi_x % 2 or roi_y % 2):
+                print(f"警告: ROI 左上角 ({roi_x}, {roi_y}) 不是偶数，裁剪后的 Bayer 排列会改变")
+
+            targets.append({
+                'index': index,
+                'output': output_seq_path,
+                'x': roi_x,
+                'y': roi_y,
+                'width': roi_width,
+                'height': roi_height,
+                'roi': roi,
+                'background': background.clone() if background is not None else None,
+                'writer': None,
+                'error': None,
+            })
+
+        if not targets:
+            return results
+
+        try:
+            # 确定帧范围
+            if from_time is not None or to_time is not None:
+                start_frame, end_frame = self.reader.frame_range_for_time(from_time, to_time)
+            if end_frame is None or end_frame > self.reader.frame_count:
+                end_frame = self.reader.frame_count
+            start_frame = max(0, start_frame)
+            if start_frame >= end_frame:
+                for target in targets:
+                    results[target['index']] = (False, target['x'], target['y'], "所选帧范围/时间窗口内没有帧")
+                return results
+            total_frames = end_frame - start_frame
 
             print(f"开始裁剪 SEQ 文件...")
+            print(f"  帧范围: {start_frame} 到 {end_frame - 1} (共 {total_frames} 帧)")
             print(f"  原始图像尺寸: {self.reader.width} x {self.reader.height}")
-            print(f"  ROI 中心: ({roi_center_x}, {roi_center_y})")
-            print(f"  ROI 尺寸: {roi_width} x {roi_height}")
-            print(f"  ROI 左上角: ({roi_x}, {roi_y})")
-
-            # 计算每帧的字节数
-            bytes_per_pixel = self.reader.bit_depth // 8
-            if self.reader.bit_depth % 8 != 0:
-                bytes_per_pixel += 1
-
-            expected_image_size = self.reader.width * self.reader.height * bytes_per_pixel
-            frame_size = self.reader.true_image_size if self.reader.true_image_size > 0 else expected_image_size
-
-            # 计算新的图像大小
-            new_image_size = roi_width * roi_height * bytes_per_pixel
-            # 使用正确的 TrueImageSize 计算方法（包括时间戳和对齐）
-            new_true_image_size = self._calculate_true_image_size(new_image_size)
-
-            print(f"  新图像数据大小: {new_image_size} 字节")
-            print(f"  新 TrueImageSize (对齐后): {new_true_image_size} 字节")
-
-            # 准备新的文件头
-            with open(self.seq_file_path, 'rb') as f_in:
-                # 读取原始文件头
-                original_header = bytearray(f_in.read(self.reader.header_size))
-
-                # 修改头部信息
-                struct.pack_into('<I', original_header, 548, roi_width)  # 新宽度
-                struct.pack_into('<I', original_header, 552, roi_height)  # 新高度
-                struct.pack_into('<I', original_header, 564, new_image_size)  # ImageSizeBytes
-                struct.pack_into('<I', original_header, 580, new_true_image_size)  # TrueImageSize
-
-                # 创建输出文件
-                with open(output_seq_path, 'wb') as f_out:
-                    # 写入修改后的头部
-                    f_out.write(original_header)
-
-                    # 逐帧处理
-                    for frame_num in range(self.reader.frame_count):
-                        # 跳转到原始帧位置
-                        offset = self.reader.header_size + frame_num * frame_size
-                        f_in.seek(offset)
-
-                        # 只读取图像数据部分，不包括时间戳和填充（参考 seq_to_png.py 的实现）
-                        frame_data = f_in.read(self.reader.image_size_bytes)
-
-                        if len(frame_data) < self.reader.image_size_bytes:
-                            print(f"警告: 帧 {frame_num} 数据不完整，跳过")
-                            continue
-
-                        # 解析图像数据并裁剪
-                        if self.reader.bit_depth == 8:
-                            img_array = np.frombuffer(frame_data, dtype=np.uint8).reshape((self.reader.height, self.reader.width))
-                            # 裁剪 ROI 区域
-                            roi_array = img_array[roi_y:roi_y+roi_height, roi_x:roi_x+roi_width]
-
-                        elif self.reader.bit_depth == 16:
-                            img_array = np.frombuffer(frame_data, dtype=np.uint16).reshape((self.reader.height, self.reader.width))
-                            # 裁剪 ROI 区域
-                            roi_array = img_array[roi_y:roi_y+roi_height, roi_x:roi_x+roi_width]
-
-                        elif self.reader.bit_depth == 24:
-                            img_array = np.frombuffer(frame_data, dtype=np.uint8).reshape((self.reader.height, self.reader.width, 3))
-                            # 裁剪 ROI 区域
-                            roi_array = img_array[roi_y:roi_y+roi_height, roi_x:roi_x+roi_width, :]
-
-                        else:
-                            return False, roi_x, roi_y, f"不支持的位深度: {self.reader.bit_depth}"
-
-                        # 写入裁剪后的帧数据
-                        img_bytes = roi_array.tobytes()
-                        f_out.write(img_bytes)
-
-                        # 写入 8 字节时间戳（按照 NorPix 格式）
-                        # 时间戳格式：4字节时间 + 2字节毫秒 + 2字节微秒
-                        import time
-                        timestamp_time_t = int(time.time())
-                        timestamp_ms = int((time.time() - timestamp_time_t) * 1000)
-                        timestamp_us = 0  # 微秒部分设为 0
-
-                        f_out.write(struct.pack('<I', timestamp_time_t))  # 4 字节时间
-                        f_out.write(struct.pack('<H', timestamp_ms))      # 2 字节毫秒
-                        f_out.write(struct.pack('<H', timestamp_us))      # 2 字节微秒
-
-                        # 填充到 TrueImageSize
-                        bytes_written = len(img_bytes) + 8  # 图像数据 + 时间戳
-                        padding_size = new_true_image_size - bytes_written
-                        if padding_size > 0:
-                            f_out.write(b'\x00' * padding_size)
+            for target in targets:
+                print(f"  ROI: 左上角 ({target['x']}, {target['y']}), 尺寸 {target['width']} x {target['height']}"
+                      f" -> {target['output']}")
 
-                        # 进度回调
-                        if progress_callback:
-                            progress_callback(frame_num + 1, self.reader.frame_count)
+            # 读取原始文件头作为模板（只改写尺寸、帧大小等字段）
+            with open(self.reader.seq_file_path, 'rb') as f_in:
+                original_header = f_in.read(self.reader.header_size)
 
-            success_msg = f"成功裁剪 {self.reader.frame_count} 帧\n"
-            success_msg += f"新图像尺寸: {roi_width} x {roi_height}\n"
-            success_msg += f"ROI 左上角: ({roi_x}, {roi_y})"
+            # 原始帧时间戳（每帧 8 字节），随裁剪后的帧一起保留
+            source_timestamps = self.reader.timestamp_records()
 
-            print(f"裁剪完成! 新文件: {output_seq_path}")
-            print(f"  新图像尺寸: {roi_width} x {roi_height}")
-            print(f"  总帧数: {self.reader.frame_count}")
+            for target in targets:
+                writer = SeqWriter(target['output'], target['width'], target['height'],
+                                   self.reader.bit_depth, self.reader.frame_rate, alignment,
+                                   compression=compression, workers=workers)
+                try:
+                    target['writer'] = writer.open(frame_count=total_frames, header=original_header)
+                except Exception as e:
+                    target['error'] = e
 
-            return True, roi_x, roi_y, success_msg
+            if background is not None:
+                print(f"  背景扣除: {background.describe()}")
+
+            if workers > 1 and not compression and background is None:
+                # 压缩输出的帧偏移取决于前面各帧的压缩大小，只能按顺序写入（压缩在写入器的线程池中进行）；
+                # 背景模型随帧顺序推进，同样只能按顺序处理
+                complete_end = self._crop_frames_parallel(targets, source_timestamps, start_frame, end_frame,
+                                                          workers, progress_callback)
+            else:
+                complete_end = start_frame
+                # 按块批量读取：每批帧一次大块读取，再对整批分别做各 ROI 的切片
+                for frame_indices, frames in self.reader.iter_chunks(start=start_frame, end=end_frame):
+                    roi_batches = [self._roi_batch(target, frames) for target in targets]
+                    for k, frame_num in enumerate(frame_indices):
+                        # 裁剪后的帧与原始帧的 8 字节时间戳一次写入
+                        for target, roi_frames in zip(targets, roi_batches):
+                            self._write_roi_frame(target, roi_frames[k], source_timestamps[frame_num])
+
+                        # 进度回调
+                        if progress_callback:
+                            progress_callback(int(frame_num) - start_frame + 1, total_frames)
+                    complete_end = int(frame_indices[-1]) + 1
 
         except Exception as e:
             error_msg = f"裁剪失败: {str(e)}"
             print(error_msg)
             import traceback
             traceback.print_exc()
-            return False, 0, 0, error_msg
+            for target in targets:
+                if target['error'] is None:
+                    target['error'] = e
+            complete_end = start_frame
+
+        # 结束各输出文件，汇总每个 ROI 的结果
+        for target in targets:
+            writer = target['writer']
+            if writer is not None:
+                writer.frame_count = complete_end - start_frame
+                try:
+                    writer.close()
+                except Exception as e:
+                    if target['error'] is None:
+                        target['error'] = e
+
+            if target['error'] is not None:
+                error_msg = f"裁剪失败: {target['error']}"
+                print(f"{target['output']}: {error_msg}")
+                results[target['index']] = (False, target['x'], target['y'], error_msg)
+                continue
+
+            written = complete_end - start_frame
+            success_msg = f"成功裁剪 {written} 帧\n"
+            success_msg += f"新图像尺寸: {target['width']} x {target['height']}\n"
+            success_msg += f"ROI 左上角: ({target['x']}, {target['y']})"
+
+            print(f"裁剪完成! 新文件: {target['output']}")
+            print(f"  新图像尺寸: {target['width']} x {target['height']}")
+            print(f"  总帧数: {written}")
+
+            results[target['index']] = (True, target['x'], target['y'], success_msg)
 
+        return results
 
-def crop_seq_file(input_seq, output_seq, roi_center_x, roi_center_y, roi_width, roi_height):
+    @staticmethod
+    def _roi_batch(target, frames):
+        """一批帧的 ROI 切片（视图）；有背景模型时返回扣除背景后的帧，出错时只记录并停用该 ROI"""
+        roi_frames = frames[(slice(None),) + target['roi']]
+        if target['background'] is None or target['error'] is not None:
+            return roi_frames
+        try:
+            return target['background'].apply(roi_frames)
+        except Exception as e:
+            target['error'] = e
+            return roi_frames
+
+    @staticmethod
+    def _write_roi_frame(target, roi_frame, timestamp, frame_index=None, buffer=None):
+        """把一帧的 ROI 写入 target 的输出文件；出错时只记录并停用该 ROI"""
+        if target['error'] is not None:
+            return
+        try:
+            if frame_index is None:
+                target['writer'].append(roi_frame, timestamp)
+            else:
+                target['writer'].write_frame_at(frame_index, roi_frame, timestamp, buffer=buffer)
+        except Exception as e:
+            target['error'] = e
+
+    def _crop_frames_parallel(self, targets, source_timestamps, start_frame, end_frame,
+                              workers, progress_callback=None):
+        """
+        多线程裁剪: 帧范围切成若干段，每段由一个线程定位读取一次，切出各 ROI，
+        再定位写入各输出文件中对应的帧块（偏移 header_size + i * TrueImageSize）。
+        读写都不共享文件指针，各段可并发；进度按完成的帧数在调用线程中汇报。
+
+        Returns:
+            int: 连续写完的最后一帧之后的帧号（源文件被截断时小于 end_frame）
+        """
+        total_frames = end_frame - start_frame
+        chunk_frames = max(1, min(PARALLEL_CROP_CHUNK_FRAMES,
+                                  PARALLEL_CROP_CHUNK_BYTES // (self.reader.true_image_size or 1)))
+        local = threading.local()
+
+        def crop_range(chunk_start, chunk_end):
+            if not hasattr(local, 'buffers'):
+                # 每个线程、每个输出文件各一个帧块缓冲区
+                local.buffers = [target['writer'].new_frame_buffer() if target['writer'] is not None else None
+                                 for target in targets]
+            frames = self.reader.read_frames(chunk_start, chunk_end)
+            for k, frame in enumerate(frames):
+                frame_num = chunk_start + k
+                for target, buffer in zip(targets, local.buffers):
+                    self._write_roi_frame(target, frame[target['roi']], source_timestamps[frame_num],
+                                          frame_num - start_frame, buffer)
+            return chunk_start, len(frames), chunk_end - chunk_start
+
+        # 源文件被截断时只保留连续完整的帧
+        complete_end = end_frame
+        done = 0
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(crop_range, chunk_start, min(chunk_start + chunk_frames, end_frame))
+                       for chunk_start in range(start_frame, end_frame, chunk_frames)]
+            try:
+                for future in as_completed(futures):
+                    chunk_start, written, requested = future.result()
+                    if written < requested:
+                        complete_end = min(complete_end, chunk_start + written)
+                    done += written
+                    if progress_callback:
+                        progress_callback(done, total_frames)
+            except BaseException:
+                executor.shutdown(wait=True, cancel_futures=True)
+                raise
+
+        return complete_end
+
+
+def crop_seq_file(input_seq, output_seq, roi_center_x, roi_center_y, roi_width, roi_height,
+                  from_time=None, to_time=None, workers=1, alignment=DEFAULT_FRAME_ALIGNMENT, compression=None):
     """
     裁剪 SEQ 文件的便捷函数
 
@@ -274,17 +515,23 @@ def crop_seq_file(input_seq, output_seq, roi_center_x, roi_center_y, roi_width,
         roi_center_y: ROI 中心 Y 坐标
         roi_width: ROI 宽度
         roi_height: ROI 高度
+        from_time / to_time: 可选的时间窗口（见 seq_to_png.parse_time_spec）
+        workers: 并行裁剪线程数
+        alignment: 输出帧块的对齐字节数
+        compression: None 为不压缩，'zlib' 为逐帧无损压缩
 
     Returns:
         bool: 成功返回 True，失败返回 False
     """
-    if not os.path.exists(input_seq):
-        print(f"错误: 输入文件不存在: {input_seq}")
+    missing = seq_files_exist(input_seq)
+    if missing:
+        print(f"错误: 输入文件不存在: {missing}")
         return False
 
     cropper = SeqCropper(input_seq)
     success, roi_x, roi_y, message = cropper.crop_to_new_seq(
-        output_seq, roi_center_x, roi_center_y, roi_width, roi_height
+        output_seq, roi_center_x, roi_center_y, roi_width, roi_height,
+        from_time=from_time, to_time=to_time, workers=workers, alignment=alignment, compression=compression
     )
 
     if success:
@@ -297,12 +544,630 @@ def crop_seq_file(input_seq, output_seq, roi_center_x, roi_center_y, roi_width,
     return success
 
 
+def _write_processed_seq(reader, output_seq, start_frame, end_frame, process, progress_callback=None,
+                         should_stop=None, alignment=DEFAULT_FRAME_ALIGNMENT, compression=None, workers=1):
+    """
+    按批读取 [start_frame, end_frame)，每批经 process(frames) 处理后写入新的 SEQ 文件；
+    原始文件头（描述等字段）与每帧的时间戳原样保留
+
+    Args:
+        reader: 已读取文件头的 SeqReader
+        process: 处理函数，输入输出都是 (T, H, W[, 3]) 的帧数组，数据类型不变
+        alignment / compression / workers: 输出帧块的对齐、压缩方式与压缩线程数（见 SeqWriter）
+
+    Returns:
+        int: 写入的帧数
+    """
+    with open(reader.seq_file_path, 'rb') as f_in:
+        original_header = f_in.read(reader.header_size)
+    source_timestamps = reader.timestamp_records()
+    total_frames = end_frame - start_frame
+
+    writer = SeqWriter(output_seq, reader.width, reader.height, reader.bit_depth, reader.frame_rate,
+                       alignment, compression=compression, workers=workers)
+    writer.open(frame_count=total_frames, header=original_header)
+    try:
+        for frame_indices, frames in reader.iter_chunks(start=start_frame, end=end_frame):
+            if should_stop and should_stop():
+                print("处理已取消")
+                break
+            frames = process(frames)
+            if reader.bit_depth == 24 and not reader.stored_bgr:
+                # 解码得到的 RGB 帧（如 JPEG）按输出 SEQ 的 BGR 顺序写入
+                frames = frames[..., ::-1]
+            for frame_num, frame in zip(frame_indices, frames):
+                writer.append(frame, source_timestamps[frame_num])
+            if progress_callback:
+                progress_callback(writer.frame_count, total_frames)
+    finally:
+        writer.close()
+    return writer.frame_count
+
+
+def correct_seq_file(input_seq, output_seq, dark_files=None, flat_files=None, start_frame=0, end_frame=None,
+                     from_time=None, to_time=None, progress_callback=None, should_stop=None,
+                     alignment=DEFAULT_FRAME_ALIGNMENT, compression=None, workers=1, pixel_format=None):
+    """
+    暗场/平场校正整个 SEQ 文件（或其中一段），结果写入新的 SEQ 文件
+
+    暗场、平场主帧为校准文件全部帧的平均值，校正按 (raw - dark) / (flat - dark)
+    逐批向量化进行（见 flat_field.FlatFieldCorrector）。
+
+    Args:
+        input_seq: 输入 SEQ 文件路径（或按顺序拼接的多个文件路径列表）
+        output_seq: 输出 SEQ 文件路径
+        dark_files / flat_files: 暗场、平场校准 SEQ 文件（一个路径或路径列表），至少给出一个
+        start_frame: 起始帧号（含）
+        end_frame: 结束帧号（不含，None 为到末尾）
+        from_time / to_time: 时间窗口（见 seq_to_png.parse_time_spec），优先于帧号
+        progress_callback: 进度回调函数 callback(current, total)
+        should_stop: 返回 True 时中止
+        alignment / compression / workers: 输出帧块的对齐、压缩方式与压缩线程数（见 SeqWriter）
+        pixel_format: 10/12 位打包数据的格式（None 为按位深度自动选择）
+
+    Returns:
+        bool: 成功返回 True，失败返回 False
+    """
+    missing = seq_files_exist(input_seq)
+    if missing:
+        print(f"错误: 输入文件不存在: {missing}")
+        return False
+
+    correction = load_flat_field(dark_files, flat_files, pixel_format)
+    if correction is None:
+        print("错误: 没有可用的暗场/平场主帧")
+        return False
+
+    reader = open_seq_reader(input_seq, pixel_format)
+    if not reader.read_header():
+        print("无法解析 SEQ 文件头")
+        return False
+
+    try:
+        reader.set_correction(correction)
+        if from_time is not None or to_time is not None:
+            start_frame, end_frame = reader.frame_range_for_time(from_time, to_time)
+        if end_frame is None or end_frame > reader.frame_count:
+            end_frame = reader.frame_count
+        start_frame = max(0, start_frame)
+        if start_frame >= end_frame:
+            print("错误: 所选帧范围/时间窗口内没有帧")
+            return False
+
+        print(f"校正帧 {start_frame} 到 {end_frame - 1} (共 {end_frame - start_frame} 帧) -> {output_seq}")
+        written = _write_processed_seq(reader, output_seq, start_frame, end_frame, reader.correct,
+                                       progress_callback, should_stop, alignment, compression, workers)
+        print(f"校正完成! 共 {written} 帧")
+        return written == end_frame - start_frame
+
+    except Exception as e:
+        print(f"校正失败: {e}")
+        return False
+
+    finally:
+        reader.close()
+
+
+def subtract_background_seq(input_seq, output_seq, background=None, start_frame=0, end_frame=None,
+                            from_time=None, to_time=None, progress_callback=None, should_stop=None,
+                            alignment=DEFAULT_FRAME_ALIGNMENT, compression=None, workers=1, pixel_format=None):
+    """
+    扣除滑动背景（前 N 帧中值或指数滑动平均），前景帧写入新的 SEQ 文件
+
+    按帧顺序逐批处理，内存只取决于背景窗口（见 background.BackgroundSubtractor）。
+
+    Args:
+        input_seq: 输入 SEQ 文件路径（或按顺序拼接的多个文件路径列表）
+        output_seq: 输出 SEQ 文件路径
+        background: BackgroundSubtractor（None 为默认的前 50 帧中值）
+        其余参数同 correct_seq_file
+
+    Returns:
+        bool: 成功返回 True，失败返回 False
+    """
+    missing = seq_files_exist(input_seq)
+    if missing:
+        print(f"错误: 输入文件不存在: {missing}")
+        return False
+
+    reader = open_seq_reader(input_seq, pixel_format)
+    if not reader.read_header():
+        print("无法解析 SEQ 文件头")
+        return False
+
+    try:
+        if from_time is not None or to_time is not None:
+            start_frame, end_frame = reader.frame_range_for_time(from_time, to_time)
+        if end_frame is None or end_frame > reader.frame_count:
+            end_frame = reader.frame_count
+        start_frame = max(0, start_frame)
+        if start_frame >= end_frame:
+            print("错误: 所选帧范围/时间窗口内没有帧")
+            return False
+
+        background = background.clone() if background is not None else BackgroundSubtractor()
+        print(f"背景扣除: {background.describe()}")
+        print(f"处理帧 {start_frame} 到 {end_frame - 1} (共 {end_frame - start_frame} 帧) -> {output_seq}")
+        written = _write_processed_seq(reader, output_seq, start_frame, end_frame, background.apply,
+                                       progress_callback, should_stop, alignment, compression, workers)
+        print(f"背景扣除完成! 共 {written} 帧")
+        return written == end_frame - start_frame
+
+    except Exception as e:
+        print(f"背景扣除失败: {e}")
+        return False
+
+    finally:
+        reader.close()
+
+
+def _copy_range(src, dst, src_offset, dst_offset, size):
+    """
+    在两个文件之间复制字节，数据尽量不经过用户态:
+    copy_file_range（Linux，同一文件系统上还可能直接共享数据块）→ sendfile → pread/pwrite
+
+    Returns:
+        int: 实际复制的字节数（源文件提前结束时小于 size）
+    """
+    src_fd, dst_fd = src.fileno(), dst.fileno()
+    copied = 0
+
+    if hasattr(os, 'copy_file_range'):
+        try:
+            while copied < size:
+                n = os.copy_file_range(src_fd, dst_fd, size - copied, src_offset + copied, dst_offset + copied)
+                if n == 0:
+                    return copied
+                copied += n
+            return copied
+        except OSError as e:
+            # 跨文件系统 / 内核或文件系统不支持时改用下面的方式
+            if e.errno not in (errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP, errno.EPERM):
+                raise
+
+    if hasattr(os, 'sendfile') and sys.platform.startswith('linux'):
+        os.lseek(dst_fd, dst_offset + copied, os.SEEK_SET)
+        while copied < size:
+            n = os.sendfile(dst_fd, src_fd, src_offset + copied, size - copied)
+            if n == 0:
+                return copied
+            copied += n
+        return copied
+
+    while copied < size:
+        data = _pread(src, min(size - copied, COPY_CHUNK_BYTES), src_offset + copied)
+        if not data:
+            return copied
+        _pwrite(dst, data, dst_offset + copied)
+        copied += len(data)
+    return copied
+
+
+def _frame_block_bounds(reader):
+    """
+    每个帧块在源文件中的起点，外加最后一个帧块的终点
+
+    定长帧为 header_size + i * TrueImageSize；变长帧来自帧偏移索引，
+    最后一帧的长度字段 + 时间戳之后的额外字节数按前两帧的间距推算。
+
+    Returns:
+        ndarray: 长度为 frame_count + 1 的 int64 数组，帧 [s, e) 的字节范围为 bounds[s] 到 bounds[e]
+    """
+    count = reader.frame_count
+    if not reader.compressed:
+        return reader.header_size + np.arange(count + 1, dtype=np.int64) * reader.true_image_size
+
+    offsets = reader.frame_offsets.astype(np.int64)
+    if count == 0:
+        return np.array([reader.header_size], dtype=np.int64)
+    extra = 0
+    if count > 1:
+        extra = int(offsets[1] - offsets[0]) - int(reader.frame_sizes[0]) - TIMESTAMP_SIZE
+    last_end = int(offsets[-1]) + int(reader.frame_sizes[-1]) + TIMESTAMP_SIZE + max(0, extra)
+    return np.append(offsets, last_end)
+
+
+def _copy_blocks_into(src, dst, bounds, start_frame, end_frame, dst_offset,
+                      progress_callback=None, progress_base=0, progress_total=None):
+    """
+    把源文件中帧 [start_frame, end_frame) 的帧块原样复制到 dst 的 dst_offset 处
+
+    Returns:
+        int: 完整复制的帧数（源文件被截断时少于请求的帧数）
+    """
+    src_start = int(bounds[start_frame])
+    total_bytes = int(bounds[end_frame]) - src_start
+    frames_done = start_frame
+
+    copied = 0
+    while copied < total_bytes:
+        n = _copy_range(src, dst, src_start + copied, dst_offset + copied,
+                        min(COPY_CHUNK_BYTES, total_bytes - copied))
+        copied += n
+        # 已完整复制的帧数
+        frames_done = int(np.searchsorted(bounds, src_start + copied, side='right')) - 1
+        frames_done = min(frames_done, end_frame)
+        if progress_callback:
+            progress_callback(progress_base + frames_done - start_frame,
+                              progress_total or (end_frame - start_frame))
+        if n == 0:
+            break
+
+    return frames_done - start_frame
+
+
+def _copy_frame_blocks(reader, src, bounds, output_seq, start_frame, end_frame,
+                       progress_callback=None, progress_base=0, progress_total=None):
+    """
+    把帧 [start_frame, end_frame) 的帧块原样复制为一个新的 SEQ 文件，只改写文件头中的帧数
+
+    Returns:
+        int: 写入的帧数
+    """
+    header = bytearray(_pread(src, reader.header_size, 0))
+    struct.pack_into('<I', header, 572, end_frame - start_frame)  # 偏移 572: 帧数
+
+    with open(output_seq, 'wb') as dst:
+        _pwrite(dst, header, 0)
+        written = _copy_blocks_into(src, dst, bounds, start_frame, end_frame, reader.header_size,
+                                    progress_callback, progress_base, progress_total)
+
+        if written < end_frame - start_frame:
+            # 源文件被截断：只保留完整的帧
+            dst.truncate(reader.header_size + int(bounds[start_frame + written] - bounds[start_frame]))
+            _pwrite(dst, struct.pack('<I', written), 572)
+
+    if reader.compressed and written > 0:
+        # 变长帧: 直接由源索引平移得到新文件的帧偏移索引
+        end = start_frame + written
+        offsets = bounds[start_frame:end] - bounds[start_frame] + reader.header_size
+        save_frame_index(output_seq, offsets, reader.frame_sizes[start_frame:end])
+
+    return written
+
+
+def extract_seq_frames(input_seq, output_seq, start_frame=0, end_frame=None,
+                       from_time=None, to_time=None, progress_callback=None):
+    """
+    截取帧段为新的 SEQ 文件：帧块按字节原样复制，不解码，只改写文件头中的帧数
+
+    Args:
+        input_seq: 输入 SEQ 文件路径
+        output_seq: 输出 SEQ 文件路径
+        start_frame: 起始帧号（含）
+        end_frame: 结束帧号（不含，None 为到末尾）
+        from_time / to_time: 时间窗口（见 seq_to_png.parse_time_spec），优先于帧号
+        progress_callback: 进度回调函数 callback(current, total)
+
+    Returns:
+        bool: 成功返回 True，失败返回 False
+    """
+    if not os.path.exists(input_seq):
+        print(f"错误: 输入文件不存在: {input_seq}")
+        return False
+
+    reader = SeqReader(input_seq)
+    if not reader.read_header():
+        print("无法解析 SEQ 文件头")
+        return False
+
+    try:
+        if from_time is not None or to_time is not None:
+            start_frame, end_frame = reader.frame_range_for_time(from_time, to_time)
+        if end_frame is None or end_frame > reader.frame_count:
+            end_frame = reader.frame_count
+        start_frame = max(0, start_frame)
+        if start_frame >= end_frame:
+            print("错误: 所选帧范围/时间窗口内没有帧")
+            return False
+
+        print(f"截取帧 {start_frame} 到 {end_frame - 1} (共 {end_frame - start_frame} 帧) -> {output_seq}")
+        bounds = _frame_block_bounds(reader)
+        with open(input_seq, 'rb') as src:
+            written = _copy_frame_blocks(reader, src, bounds, output_seq, start_frame, end_frame,
+                                         progress_callback)
+
+        print(f"截取完成! 共 {written} 帧")
+        return written > 0
+
+    except Exception as e:
+        print(f"截取失败: {e}")
+        return False
+
+    finally:
+        reader.close()
+
+
+def split_seq_file(input_seq, output_dir=None, max_part_bytes=DEFAULT_PART_BYTES, frames_per_part=None,
+                   progress_callback=None):
+    """
+    把 SEQ 文件分割为若干个分段 SEQ（<原文件名>_partNNN.seq），帧块原样复制，不解码
+
+    Args:
+        input_seq: 输入 SEQ 文件路径
+        output_dir: 输出目录（None 为与输入文件相同）
+        max_part_bytes: 每个分段文件的大小上限（字节，含文件头）
+        frames_per_part: 每个分段的帧数，给出时优先于 max_part_bytes
+        progress_callback: 进度回调函数 callback(current, total)
+
+    Returns:
+        list: 生成的分段文件路径，失败返回空列表
+    """
+    if not os.path.exists(input_seq):
+        print(f"错误: 输入文件不存在: {input_seq}")
+        return []
+
+    reader = SeqReader(input_seq)
+    if not reader.read_header():
+        print("无法解析 SEQ 文件头")
+        return []
+
+    if output_dir is None:
+        output_dir = os.path.dirname(os.path.abspath(input_seq))
+    os.makedirs(output_dir, exist_ok=True)
+    base_name = os.path.splitext(os.path.basename(input_seq))[0]
+
+    parts = []
+    try:
+        total_frames = reader.frame_count
+        bounds = _frame_block_bounds(reader)
+
+        with open(input_seq, 'rb') as src:
+            start = 0
+            while start < total_frames:
+                if frames_per_part:
+                    end = min(start + frames_per_part, total_frames)
+                else:
+                    # 在大小上限内尽量多放帧，至少一帧
+                    budget = max_part_bytes - reader.header_size
+                    end = int(np.searchsorted(bounds, bounds[start] + budget, side='right')) - 1
+                    end = min(max(end, start + 1), total_frames)
+
+                part_path = os.path.join(output_dir, f"{base_name}_part{len(parts) + 1:03d}.seq")
+                print(f"分段 {len(parts) + 1}: 帧 {start} 到 {end - 1} -> {part_path}")
+                written = _copy_frame_blocks(reader, src, bounds, part_path, start, end,
+                                             progress_callback, start, total_frames)
+                parts.append(part_path)
+                if written < end - start:
+                    break
+                start = end
+
+        print(f"分割完成! 共 {len(parts)} 个分段")
+        return parts
+
+    except Exception as e:
+        print(f"分割失败: {e}")
+        return []
+
+    finally:
+        reader.close()
+
+
+def concat_seq_files(input_seqs, output_seq, progress_callback=None):
+    """
+    把几何参数相同的多个 SEQ 文件按顺序拼接为一个 SEQ 文件：帧块原样复制，不解码
+
+    宽度、高度、位深度、TrueImageSize 等必须一致（由 MultiSeqReader 检查），
+    输出文件使用第一个文件的文件头，只改写帧数。
+
+    Args:
+        input_seqs: 输入 SEQ 文件路径列表（按拼接顺序）
+        output_seq: 输出 SEQ 文件路径
+        progress_callback: 进度回调函数 callback(current, total)
+
+    Returns:
+        bool: 成功返回 True，失败返回 False
+    """
+    missing = seq_files_exist(input_seqs)
+    if missing:
+        print(f"错误: 输入文件不存在: {missing}")
+        return False
+
+    reader = MultiSeqReader(input_seqs)
+    if not reader.read_header():
+        print("无法拼接: 文件头无法解析或几何参数不一致")
+        return False
+
+    try:
+        total_frames = reader.frame_count
+        print(f"拼接 {len(reader.parts)} 个文件，共 {total_frames} 帧 -> {output_seq}")
+
+        with open(reader.parts[0].seq_file_path, 'rb') as first:
+            header = bytearray(_pread(first, reader.header_size, 0))
+
+        written = 0
+        index_parts = []
+        with open(output_seq, 'wb') as dst:
+            _pwrite(dst, header, 0)
+            dst_offset = reader.header_size
+            for part in reader.parts:
+                bounds = _frame_block_bounds(part)
+                # 各文件的帧块从各自文件头之后开始，在输出中首尾相接
+                with open(part.seq_file_path, 'rb') as src:
+                    count = _copy_blocks_into(src, dst, bounds, 0, part.frame_count, dst_offset,
+                                              progress_callback, written, total_frames)
+                index_parts.append((part, bounds, count, dst_offset))
+                written += count
+                dst_offset += int(bounds[count] - bounds[0])
+                if count < part.frame_count:
+                    print(f"警告: {part.seq_file_path} 不完整，拼接在第 {written} 帧处结束")
+                    break
+
+            dst.truncate(dst_offset)
+            _pwrite(dst, struct.pack('<I', written), 572)  # 偏移 572: 帧数
+
+        if reader.compressed:
+            offsets = [bounds[:count] - bounds[0] + offset for _, bounds, count, offset in index_parts]
+            sizes = [part.frame_sizes[:count] for part, _, count, _ in index_parts]
+            save_frame_index(output_seq, np.concatenate(offsets), np.concatenate(sizes))
+
+        print(f"拼接完成! 共 {written} 帧")
+        return written > 0
+
+    except Exception as e:
+        print(f"拼接失败: {e}")
+        return False
+
+    finally:
+        reader.close()
+
+
+def main():
+    """命令行入口"""
+    parser = argparse.ArgumentParser(
+        description='SEQ → SEQ 工具: ROI 裁剪、帧段截取、分割、拼接',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog='''
+示例:
+  %(prog)s crop input.seq -o roi.seq --roi 640 480 200 100
+  %(prog)s crop input.seq -o roi.seq --roi 640 480 200 100 --roi 300 200 64 64 -j 8
+  %(prog)s extract input.seq -o part.seq -s 10000 -e 20000
+  %(prog)s split input.seq --max-size 4
+  %(prog)s concat part1.seq part2.seq part3.seq -o merged.seq
+  %(prog)s correct input.seq -o corrected.seq --dark dark.seq --flat flat.seq
+  %(prog)s background input.seq -o droplets.seq --bg-mode median --bg-window 50 --polarity dark
+        '''
+    )
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    crop_parser = subparsers.add_parser('crop', help='按 ROI 裁剪（多个 ROI 一次读取完成）')
+    crop_parser.add_argument('seq_file', nargs='+', help='输入的 SEQ 文件路径（多个文件按顺序拼接）')
+    crop_parser.add_argument('-o', '--output', required=True,
+                             help='输出 SEQ 文件路径（多个 ROI 时自动添加 _ROI_x_y 后缀）')
+    crop_parser.add_argument('--roi', nargs=4, type=int, action='append', required=True,
+                             metavar=('CX', 'CY', 'W', 'H'), help='ROI 中心坐标和尺寸，可重复')
+    crop_parser.add_argument('-j', '--workers', type=int, default=os.cpu_count() or 1,
+                             help='并行线程数 (默认: CPU 核数)')
+    crop_parser.add_argument('--compact', action='store_true',
+                             help=f'紧凑输出: 帧块按 {COMPACT_FRAME_ALIGNMENT} 字节而不是 {DEFAULT_FRAME_ALIGNMENT} 字节对齐，'
+                                  f'小 ROI 文件可小约一半')
+
+    extract_parser = subparsers.add_parser('extract', help='截取帧段（原样复制帧块，不解码）')
+    extract_parser.add_argument('seq_file', help='输入的 SEQ 文件路径')
+    extract_parser.add_argument('-o', '--output', required=True, help='输出 SEQ 文件路径')
+
+    correct_parser = subparsers.add_parser('correct', help='暗场/平场校正: (raw - dark) / (flat - dark)')
+    correct_parser.add_argument('seq_file', nargs='+', help='输入的 SEQ 文件路径（多个文件按顺序拼接）')
+    correct_parser.add_argument('-o', '--output', required=True, help='输出 SEQ 文件路径')
+    correct_parser.add_argument('--dark', nargs='+', default=None,
+                                help='暗场校准 SEQ 文件，全部帧的平均值作为暗场主帧')
+    correct_parser.add_argument('--flat', nargs='+', default=None,
+                                help='平场校准 SEQ 文件，全部帧的平均值作为平场主帧')
+
+    background_parser = subparsers.add_parser('background', help='扣除滑动背景（中值或指数滑动平均）')
+    background_parser.add_argument('seq_file', nargs='+', help='输入的 SEQ 文件路径（多个文件按顺序拼接）')
+    background_parser.add_argument('-o', '--output', required=True, help='输出 SEQ 文件路径')
+
+    for sub in (crop_parser, background_parser):
+        sub.add_argument('--bg-mode', default=None, choices=BACKGROUND_MODES,
+                         help='滑动背景模型: median 前 N 帧中值, ema 指数滑动平均'
+                              + (' (默认: median)' if sub is background_parser else ' (默认: 不扣除背景)'))
+        sub.add_argument('--bg-window', type=int, default=DEFAULT_WINDOW,
+                         help=f'背景窗口帧数 N (默认: {DEFAULT_WINDOW})')
+        sub.add_argument('--bg-refresh', type=int, default=1,
+                         help='median 模型每隔多少帧重新计算中值 (默认: 1，即每帧)')
+        sub.add_argument('--polarity', default='abs', choices=POLARITIES,
+                         help='保留的差值: abs 绝对值, dark 比背景暗的部分, bright 比背景亮的部分 (默认: abs)')
+
+    for sub in (crop_parser, correct_parser, background_parser):
+        sub.add_argument('--pixel-format', default=None, choices=list(PACKED_FORMATS),
+                         help='10/12 位打包数据的格式 (默认: 按位深度自动选择)')
+        sub.add_argument('--compress', action='store_true',
+                         help='逐帧 zlib 无损压缩，并写出 .idx 帧索引（仅本工具可读取）')
+    for sub in (correct_parser, background_parser):
+        sub.add_argument('-j', '--workers', type=int, default=os.cpu_count() or 1,
+                         help='压缩线程数 (默认: CPU 核数)')
+        sub.add_argument('--compact', action='store_true',
+                         help=f'紧凑输出: 帧块按 {COMPACT_FRAME_ALIGNMENT} 字节对齐')
+
+    for sub in (crop_parser, extract_parser, correct_parser, background_parser):
+        sub.add_argument('-s', '--start', type=int, default=0, help='起始帧号 (默认: 0)')
+        sub.add_argument('-e', '--end', type=int, default=None, help='结束帧号，不含 (默认: 全部)')
+        sub.add_argument('--from-time', default=None, help='起始时间，格式同 seq_to_png.py')
+        sub.add_argument('--to-time', default=None, help='结束时间 (含)，以 + 开头表示相对起始时间的秒数')
+
+    split_parser = subparsers.add_parser('split', help='按大小或帧数分割（原样复制帧块，不解码）')
+    split_parser.add_argument('seq_file', help='输入的 SEQ 文件路径')
+    split_parser.add_argument('-d', '--output-dir', default=None, help='输出目录 (默认: 与输入相同)')
+    split_parser.add_argument('--max-size', type=float, default=DEFAULT_PART_BYTES / 1024 ** 3,
+                              help='每个分段的大小上限，单位 GB (默认: 4)')
+    split_parser.add_argument('--frames', type=int, default=None, help='每个分段的帧数，优先于 --max-size')
+
+    concat_parser = subparsers.add_parser('concat', help='拼接多个 SEQ 文件（原样复制帧块，不解码）')
+    concat_parser.add_argument('seq_files', nargs='+', help='输入的 SEQ 文件路径（按拼接顺序）')
+    concat_parser.add_argument('-o', '--output', required=True, help='输出 SEQ 文件路径')
+
+    args = parser.parse_args()
+
+    def progress_callback(current, total):
+        percent = (current / total) * 100
+        print(f"\r进度: {current}/{total} ({percent:.1f}%)", end='', flush=True)
+
+    if args.command == 'crop':
+        missing = seq_files_exist(args.seq_file)
+        if missing:
+            print(f"错误: 输入文件不存在: {missing}")
+            return 1
+        output_base, output_ext = os.path.splitext(args.output)
+        rois = []
+        for cx, cy, w, h in args.roi:
+            if len(args.roi) == 1:
+                output = args.output
+            else:
+                output = f"{output_base}_ROI_{cx - w // 2}_{cy - h // 2}{output_ext or '.seq'}"
+            rois.append((output, cx, cy, w, h))
+
+        background = None
+        if args.bg_mode:
+            background = BackgroundSubtractor(args.bg_mode, args.bg_window, args.polarity, args.bg_refresh)
+        cropper = SeqCropper(args.seq_file, pixel_format=args.pixel_format)
+        results = cropper.crop_to_multiple_seqs(rois, progress_callback, args.start, args.end,
+                                                args.from_time, args.to_time, args.workers,
+                                                COMPACT_FRAME_ALIGNMENT if args.compact else DEFAULT_FRAME_ALIGNMENT,
+                                                'zlib' if args.compress else None, background)
+        cropper.close()
+        print()
+        for (output, *_), (success, roi_x, roi_y, message) in zip(rois, results):
+            print(f"{output}: {'成功' if success else '失败'} - {message}")
+        success = all(result[0] for result in results)
+
+    elif args.command == 'correct':
+        if not args.dark and not args.flat:
+            print("错误: 至少需要 --dark 或 --flat 之一")
+            return 1
+        success = correct_seq_file(args.seq_file, args.output, args.dark, args.flat, args.start, args.end,
+                                   args.from_time, args.to_time, progress_callback,
+                                   alignment=COMPACT_FRAME_ALIGNMENT if args.compact else DEFAULT_FRAME_ALIGNMENT,
+                                   compression='zlib' if args.compress else None,
+                                   workers=args.workers, pixel_format=args.pixel_format)
+        print()
+
+    elif args.command == 'background':
+        background = BackgroundSubtractor(args.bg_mode or 'median', args.bg_window, args.polarity, args.bg_refresh)
+        success = subtract_background_seq(args.seq_file, args.output, background, args.start, args.end,
+                                          args.from_time, args.to_time, progress_callback,
+                                          alignment=COMPACT_FRAME_ALIGNMENT if args.compact else DEFAULT_FRAME_ALIGNMENT,
+                                          compression='zlib' if args.compress else None,
+                                          workers=args.workers, pixel_format=args.pixel_format)
+        print()
+
+    elif args.command == 'extract':
+        success = extract_seq_frames(args.seq_file, args.output, args.start, args.end,
+                                     args.from_time, args.to_time, progress_callback)
+        print()
+
+    elif args.command == 'concat':
+        success = concat_seq_files(args.seq_files, args.output, progress_callback)
+        print()
+
+    else:
+        parts = split_seq_file(args.seq_file, args.output_dir, int(args.max_size * 1024 ** 3),
+                               args.frames, progress_callback)
+        print()
+        success = bool(parts)
+
+    return 0 if success else 1
+
+
 if __name__ == "__main__":
-    # 测试示例
-    print("=" * 60)
-    print("SEQ 文件 ROI 裁剪工具")
-    print("=" * 60)
-    print("\n使用方法:")
-    print("  from seq_to_seq import crop_seq_file")
-    print("  crop_seq_file('input.seq', 'output.seq', center_x, center_y, width, height)")
-    print("\n" + "=" * 60)
+    exit(main())
@@ -0,0 +1,293 @@
+"""
+SEQ 直接转视频
+将 SeqReader 读出的帧以 rawvideo 形式写入 ffmpeg 的 stdin，
+16 位数据在内存中映射为 8 位，不产生任何中间图像文件
+"""
+
+import argparse
+import itertools
+import numpy as np
+from seq_to_png import open_seq_reader, seq_files_exist, load_flat_field
+from pixel_formats import PACKED_FORMATS
+from demosaic import BAYER_PATTERNS, DEMOSAIC_METHODS
+from images_to_video import resolve_video_codec, video_output_options
+from seq_tone_mapping import TONE_MODES, ToneMapper, resolve_tone_mapper
+from background import BackgroundSubtractor, BACKGROUND_MODES, POLARITIES, DEFAULT_WINDOW
+
+
+def frames_to_video(frame_batches, width, height, output_video_file, frame_rate=30.0,
+                    video_codec='auto', quality='high', color=False, total_frames=None,
+                    progress_callback=None, should_stop=None, bgr=False):
+    """
+    将一批批 uint8 帧通过管道编码为视频
+
+    Args:
+        frame_batches: 可迭代对象，每项为 (T, H, W) 或 (T, H, W, 3) 的 uint8 数组
+        width, height: 帧尺寸
+        output_video_file: 输出视频文件路径
+        frame_rate: 视频帧率
+        video_codec: 视频编码器（'auto' 根据扩展名选择）
+        quality: 视频质量 ('low', 'medium', 'high', 'best')
+        color: True 表示输入为 RGB 三通道
+        bgr: 三通道按 BGR 顺序排列（如 SEQ 中存储的 24 位帧），由 ffmpeg 直接读取，无需翻转
+        total_frames: 总帧数（仅用于进度回调）
+        progress_callback: 进度回调函数 callback(current, total)
+        should_stop: 返回 True 时中止编码
+
+    Returns:
+        bool: 是否成功
+    """
+    try:
+        import ffmpeg
+    except ImportError:
+        print("错误: 未安装 ffmpeg-python 库")
+        print("请运行: pip install ffmpeg-python")
+        return False
+
+    video_codec = resolve_video_codec(video_codec, output_video_file)
+    print(f"使用编码器: {video_codec}")
+
+    pix_fmt = ('bgr24' if bgr else 'rgb24') if color else 'gray'
+    stream = ffmpeg.input('pipe:', format='rawvideo', pix_fmt=pix_fmt,
+                          s=f'{width}x{height}', framerate=frame_rate)
+    # yuv420p 要求宽高为偶数
+    stream = ffmpeg.filter(stream, 'pad', 'ceil(iw/2)*2', 'ceil(ih/2)*2')
+    stream = ffmpeg.output(stream, output_video_file, **video_output_options(video_codec, quality))
+    stream = ffmpeg.overwrite_output(stream).global_args('-loglevel', 'error')
+
+    try:
+        process = ffmpeg.run_async(stream, pipe_stdin=True, pipe_stderr=True)
+    except FileNotFoundError:
+        print(f"错误: FFmpeg 可执行文件未找到")
+        print(f"请确保 FFmpeg 已正确安装并添加到系统 PATH")
+        return False
+
+    written = 0
+    try:
+        for batch in frame_batches:
+            if should_stop and should_stop():
+                process.kill()
+                process.wait()
+                print("编码已取消")
+                return False
+
+            process.stdin.write(np.ascontiguousarray(batch, dtype=np.uint8).data)
+            written += len(batch)
+            if progress_callback:
+                progress_callback(written, total_frames or written)
+
+    except BrokenPipeError:
+        # ffmpeg 提前退出，错误信息在 stderr 中
+        pass
+
+    finally:
+        try:
+            process.stdin.close()
+        except BrokenPipeError:
+            pass
+
+    stderr = process.stderr.read().decode('utf8', errors='ignore')
+    if process.wait() != 0:
+        print(f"FFmpeg 转换错误:")
+        print(f"  STDERR: {stderr}")
+        return False
+
+    print(f"成功创建视频文件: {output_video_file}")
+    print(f"总帧数: {written}")
+    print(f"分辨率: {width} x {height}")
+    print(f"帧率: {frame_rate} fps")
+    return True
+
+
+def seq_to_video(seq_file, output_video_file, frame_rate=30.0, video_codec='auto', quality='high',
+                 start_frame=0, end_frame=None, from_time=None, to_time=None,
+                 progress_callback=None, should_stop=None, tone_mapping=None, pixel_format=None,
+                 bayer_pattern=None, demosaic_method='bilinear', correction=None, background=None):
+    """
+    将 SEQ 文件直接编码为视频（不写中间图像文件）
+
+    Args:
+        seq_file: 输入 SEQ 文件路径（或按顺序拼接的多个文件路径列表）
+        output_video_file: 输出视频文件路径
+        frame_rate: 视频帧率
+        video_codec: 视频编码器
+        quality: 视频质量
+        start_frame: 起始帧号（含）
+        end_frame: 结束帧号（不含，None 为到末尾）
+        from_time / to_time: 时间窗口（见 seq_to_png.parse_time_spec），优先于帧号
+        progress_callback: 进度回调函数 callback(current, total)
+        should_stop: 返回 True 时中止
+        tone_mapping: 16 位转 8 位的映射方式（'shift'、'minmax'、'percentile' 或 ToneMapper）
+        pixel_format: 10/12 位打包数据的格式（None 为按位深度自动选择）
+        bayer_pattern / demosaic_method: 原始 Bayer 数据的排列与去马赛克方法（见 SeqReader.set_demosaic）
+        correction: 暗场/平场校正器（见 seq_to_png.load_flat_field），None 为不校正
+        background: BackgroundSubtractor，给出时按帧顺序扣除滑动背景后再编码（在校正之后、去马赛克之前）
+
+    Returns:
+        bool: 是否成功
+    """
+    missing = seq_files_exist(seq_file)
+    if missing:
+        print(f"错误: 文件 '{missing}' 不存在")
+        return False
+
+    reader = open_seq_reader(seq_file, pixel_format)
+    reader.set_demosaic(bayer_pattern, demosaic_method)
+    if not reader.read_header():
+        print("无法解析 SEQ 文件头，转换失败。")
+        return False
+
+    if reader.bit_depth not in (8, 16, 24):
+        print(f"错误: 不支持的位深度 {reader.bit_depth}")
+        return False
+    if correction is not None:
+        try:
+            reader.set_correction(correction)
+        except ValueError as e:
+            print(f"错误: {e}")
+            return False
+
+    if from_time is not None or to_time is not None:
+        start_frame, end_frame = reader.frame_range_for_time(from_time, to_time)
+    if end_frame is None or end_frame > reader.frame_count:
+        end_frame = reader.frame_count
+    if start_frame >= end_frame:
+        print("错误: 所选范围内没有帧")
+        return False
+
+    total_frames = end_frame - start_frame
+    print(f"开始转换为视频: 帧 {start_frame} 到 {end_frame - 1} (共 {total_frames} 帧, 帧率: {frame_rate} fps, 质量: {quality})")
+
+    # 16 位数据经 65536 项查找表转为 8 位；Bayer 数据整批去马赛克
+    tone_mapper = resolve_tone_mapper(tone_mapping, reader, start_frame, end_frame)
+
+    chunks = reader.iter_chunks(start=start_frame, end=end_frame)
+    if background is not None:
+        background = background.clone()
+        print(f"背景扣除: {background.describe()}")
+        frame_batches = (background.apply(reader.correct(frames)) for _, frames in chunks)
+        if reader.bit_depth == 16 and tone_mapper.mode != 'shift' and not isinstance(tone_mapping, ToneMapper):
+            # 自动窗口按扣除背景后的前景统计（抽样的原始帧亮度范围与前景不同）
+            first = next(frame_batches, None)
+            if first is not None:
+                tone_mapper.fit(first)
+                frame_batches = itertools.chain([first], frame_batches)
+    else:
+        frame_batches = (reader.correct(frames) for _, frames in chunks)
+
+    if reader.bit_depth == 16:
+        print(f"16 位转 8 位: {tone_mapper.describe()}")
+    if reader.is_bayer:
+        print(f"Bayer 去马赛克: {reader.bayer_pattern or 'RGGB'} ({reader.demosaic_method})")
+
+    if reader.stored_bgr:
+        # BGR 帧（校正后）原样送入 ffmpeg (pix_fmt bgr24)
+        batches = frame_batches
+    else:
+        # correct() 已在上面完成，这里只做去马赛克 / 通道转换
+        batches = (tone_mapper.apply(reader.to_rgb(frames, corrected=True)) for frames in frame_batches)
+
+    success = frames_to_video(batches, reader.width, reader.height, output_video_file,
+                              frame_rate=frame_rate, video_codec=video_codec, quality=quality,
+                              color=reader.color, total_frames=total_frames,
+                              progress_callback=progress_callback, should_stop=should_stop,
+                              bgr=reader.stored_bgr)
+    reader.close()
+    return success
+
+
+def main():
+    """命令行入口"""
+    parser = argparse.ArgumentParser(
+        description='将 SEQ 文件直接转换为视频文件',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog='''
+示例:
+  %(prog)s input.seq -o output.mp4
+  %(prog)s input.seq -o output.avi -r 60 -s 1000 -e 5000
+  %(prog)s input.seq -o output.mp4 --from-time 15:48:20.511 --to-time +2
+        '''
+    )
+
+    parser.add_argument('seq_file', nargs='+', help='输入的 SEQ 文件路径（多个文件按顺序拼接）')
+    parser.add_argument('-o', '--output', required=True,
+                       help='输出视频文件路径')
+    parser.add_argument('-r', '--framerate', type=float, default=30.0,
+                       help='视频帧率 (默认: 30)')
+    parser.add_argument('-c', '--codec', default='auto',
+                       choices=['auto', 'libxvid', 'libx264', 'libx265'],
+                       help='视频编码器 (默认: auto)')
+    parser.add_argument('-q', '--quality', default='high',
+                       choices=['low', 'medium', 'high', 'best'],
+                       help='视频质量 (默认: high)')
+    parser.add_argument('-s', '--start', type=int, default=0,
+                       help='起始帧号 (默认: 0)')
+    parser.add_argument('-e', '--end', type=int, default=None,
+                       help='结束帧号 (默认: 全部)')
+    parser.add_argument('--from-time', default=None,
+                       help='起始时间，格式同 seq_to_png.py')
+    parser.add_argument('--to-time', default=None,
+                       help='结束时间 (含)，以 + 开头表示相对起始时间的秒数')
+    parser.add_argument('--tone', default='shift', choices=TONE_MODES,
+                       help='16 位转 8 位的映射方式 (默认: shift)')
+    parser.add_argument('--pixel-format', default=None, choices=list(PACKED_FORMATS),
+                       help='10/12 位打包数据的格式 (默认: 按位深度自动选择)')
+    parser.add_argument('--bayer', default=None, choices=BAYER_PATTERNS,
+                       help='原始 Bayer 数据的排列 (默认: 头部为 Bayer 格式时按 RGGB)')
+    parser.add_argument('--demosaic', default='bilinear', choices=DEMOSAIC_METHODS,
+                       help='去马赛克方法 (默认: bilinear)')
+    parser.add_argument('--dark', nargs='+', default=None,
+                       help='暗场校准 SEQ 文件，全部帧的平均值作为暗场主帧')
+    parser.add_argument('--flat', nargs='+', default=None,
+                       help='平场校准 SEQ 文件；给出时按 (raw - dark) / (flat - dark) 校正')
+
+    parser.add_argument('--bg-mode', default=None, choices=BACKGROUND_MODES,
+                       help='扣除滑动背景: median 前 N 帧中值, ema 指数滑动平均 (默认: 不扣除)')
+    parser.add_argument('--bg-window', type=int, default=DEFAULT_WINDOW,
+                       help=f'背景窗口帧数 N (默认: {DEFAULT_WINDOW})')
+    parser.add_argument('--bg-refresh', type=int, default=1,
+                       help='median 模型每隔多少帧重新计算中值 (默认: 1)')
+    parser.add_argument('--polarity', default='abs', choices=POLARITIES,
+                       help='保留的差值: abs 绝对值, dark 比背景暗的部分, bright 比背景亮的部分 (默认: abs)')
+
+    args = parser.parse_args()
+
+    background = None
+    if args.bg_mode:
+        background = BackgroundSubtractor(args.bg_mode, args.bg_window, args.polarity, args.bg_refresh)
+
+    correction = None
+    if args.dark or args.flat:
+        correction = load_flat_field(args.dark, args.flat, args.pixel_format)
+        if correction is None:
+            return 1
+
+    def progress_callback(current, total):
+        percent = (current / total) * 100
+        print(f"\r进度: {current}/{total} ({percent:.1f}%)", end='', flush=True)
+
+    success = seq_to_video(
+        args.seq_file,
+        args.output,
+        args.framerate,
+        args.codec,
+        args.quality,
+        args.start,
+        args.end,
+        args.from_time,
+        args.to_time,
+        progress_callback,
+        tone_mapping=args.tone,
+        pixel_format=args.pixel_format,
+        bayer_pattern=args.bayer,
+        demosaic_method=args.demosaic,
+        correction=correction,
+        background=background
+    )
+    print()
+
+    return 0 if success else 1
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,153 @@
+"""
+16 位 → 8 位灰度映射
+- 三种方式: 移位 (shift)、最小/最大值窗口 (minmax)、百分位窗口 (percentile)
+- 预先计算 65536 项的 uint8 查找表，逐帧转换只做一次查表，不产生浮点临时数组
+- 窗口统计量由抽样帧的直方图得到
+"""
+
+import numpy as np
+
+
+TONE_MODES = ('shift', 'minmax', 'percentile')
+
+# 统计窗口时默认抽样的帧数
+DEFAULT_SAMPLE_FRAMES = 16
+
+# 百分位窗口的默认上下限
+DEFAULT_PERCENTILES = (0.1, 99.9)
+
+LUT_SIZE = 65536
+
+
+class ToneMapper:
+    """
+    16 位到 8 位的查表映射
+
+        mapper = ToneMapper.from_reader(reader, 'percentile')
+        frame_8bit = mapper.apply(frame_16bit)
+    """
+
+    def __init__(self, mode='shift', shift=8, low=None, high=None, percentiles=DEFAULT_PERCENTILES):
+        """
+        Args:
+            mode: 'shift'、'minmax' 或 'percentile'
+            shift: 移位方式下右移的位数（8 即取高 8 位）
+            low, high: 窗口上下限（minmax / percentile），映射到 0 和 255；
+                为 None 时需先调用 fit() 由抽样帧统计
+            percentiles: percentile 方式的上下百分位
+        """
+        if mode not in TONE_MODES:
+            raise ValueError(f"不支持的映射方式: {mode}，可选 {', '.join(TONE_MODES)}")
+        self.mode = mode
+        self.shift = shift
+        self.low = low
+        self.high = high
+        self.percentiles = percentiles
+        self._lut = None
+
+    @classmethod
+    def from_reader(cls, reader, mode='shift', sample_frames=DEFAULT_SAMPLE_FRAMES, start_frame=0, end_frame=None,
+                    **kwargs):
+        """
+        创建映射器；minmax / percentile 方式从 [start_frame, end_frame) 中均匀抽样若干帧统计窗口
+
+        Args:
+            reader: 已读取文件头的 SeqReader
+            mode: 映射方式
+            sample_frames: 抽样帧数
+        """
+        if reader.bit_depth == 16 and 'shift' not in kwargs:
+            # 10/12 位数据取其有效位中的高 8 位
+            kwargs['shift'] = max(0, getattr(reader, 'significant_bits', 16) - 8)
+        mapper = cls(mode, **kwargs)
+        if mode == 'shift' or reader.bit_depth != 16:
+            return mapper
+
+        if end_frame is None or end_frame > reader.frame_count:
+            end_frame = reader.frame_count
+        if start_frame >= end_frame:
+            return mapper
+
+        indices = np.unique(np.linspace(start_frame, end_frame - 1, min(sample_frames, end_frame - start_frame))
+                            .astype(np.int64))
+        # 有暗场/平场校正时按校正后的数据统计窗口
+        mapper.fit(reader.correct(reader[int(i)]) for i in indices)
+        return mapper
+
+    def fit(self, frames):
+        """
+        由抽样帧的直方图计算窗口上下限
+
+        Args:
+            frames: 可迭代的 uint16 帧
+        """
+        histogram = np.zeros(LUT_SIZE, dtype=np.int64)
+        for frame in frames:
+            histogram += np.bincount(np.asarray(frame, dtype=np.uint16).ravel(), minlength=LUT_SIZE)
+        self.fit_histogram(histogram)
+        return self
+
+    def fit_histogram(self, histogram):
+        """由 65536 级直方图计算窗口上下限"""
+        total = int(histogram.sum())
+        if total == 0:
+            return self
+
+        if self.mode == 'percentile':
+            cdf = np.cumsum(histogram)
+            low_pct, high_pct = self.percentiles
+            low = int(np.searchsorted(cdf, total * low_pct / 100.0, side='left'))
+            high = int(np.searchsorted(cdf, total * high_pct / 100.0, side='left'))
+        else:
+            used = np.flatnonzero(histogram)
+            low, high = int(used[0]), int(used[-1])
+
+        self.low = low
+        self.high = max(high, low + 1)
+        self._lut = None
+        return self
+
+    @property
+    def lut(self):
+        """65536 项 uint8 查找表（首次使用时计算）"""
+        if self._lut is None:
+            self._lut = self._build_lut()
+        return self._lut
+
+    def _build_lut(self):
+        values = np.arange(LUT_SIZE, dtype=np.int64)
+        if self.mode == 'shift' or self.low is None or self.high is None:
+            return np.minimum(values >> self.shift, 255).astype(np.uint8)
+
+        # 查找表只算一次，这里的浮点运算与帧大小无关
+        scaled = (values - self.low) * 255.0 / (self.high - self.low)
+        return np.clip(np.rint(scaled), 0, 255).astype(np.uint8)
+
+    def apply(self, frames):
+        """
+        把 16 位帧（任意形状）映射为 uint8；8 位数据原样返回
+
+        Returns:
+            ndarray: 与输入形状相同的 uint8 数组
+        """
+        frames = np.asarray(frames)
+        if frames.dtype == np.uint8:
+            return frames
+        return np.take(self.lut, frames)
+
+    def describe(self):
+        """用于日志的简短说明"""
+        if self.mode == 'shift' or self.low is None:
+            return f"shift >> {self.shift}"
+        return f"{self.mode} [{self.low}, {self.high}]"
+
+
+def resolve_tone_mapper(tone_mapping, reader, start_frame=0, end_frame=None):
+    """
+    把 tone_mapping 参数（None、映射方式字符串或 ToneMapper）统一为 ToneMapper
+
+    None 表示默认的移位方式（与原先的除以 256 结果相同）。
+    """
+    if isinstance(tone_mapping, ToneMapper):
+        return tone_mapping
+    return ToneMapper.from_reader(reader, tone_mapping or 'shift', start_frame=start_frame, end_frame=end_frame)
@@ -0,0 +1,91 @@
+"""打包 10/12 位单色格式的解包测试"""
+
+import numpy as np
+import pytest
+
+from pixel_formats import PACKED_FORMATS, packed_size, resolve_pixel_format, unpack_frames
+
+
+def _pack_lsb_stream(pixels, bits):
+    """GenICam PFNC (Mono10p / Mono12p): 低位在前的连续位流"""
+    value = 0
+    for k, p in enumerate(int(x) for x in pixels):
+        value |= p << (k * bits)
+    return value.to_bytes(-(-len(pixels) * bits // 8), 'little')
+
+
+def _pack_gige(pixels, bits):
+    """GigE Vision Mono12Packed / Mono10Packed: 每 2 像素 3 字节，低位在中间字节"""
+    low_mask = (1 << (bits - 8)) - 1
+    out = bytearray()
+    for p0, p1 in zip(pixels[0::2], pixels[1::2]):
+        p0, p1 = int(p0), int(p1)
+        out += bytes([p0 >> (bits - 8), (p0 & low_mask) | ((p1 & low_mask) << 4), p1 >> (bits - 8)])
+    return bytes(out)
+
+
+def _pack(pixels, pixel_format):
+    bits = PACKED_FORMATS[pixel_format][0]
+    if pixel_format.endswith('p'):
+        return _pack_lsb_stream(pixels, bits)
+    return _pack_gige(pixels, bits)
+
+
+@pytest.mark.parametrize('pixel_format, raw, expected', [
+    ('Mono12Packed', b'\xab\x3c\x12', [0xABC, 0x123]),
+    ('Mono12p', b'\xbc\x3a\x12', [0xABC, 0x123]),
+    ('Mono10Packed', b'\xaa\x13\x55', [0x2AB, 0x155]),
+    ('Mono10p', b'\xab\x56\x98\x3e\xf8', [0x2AB, 0x215, 0x3E9, 0x3E0]),
+])
+def test_known_byte_patterns(pixel_format, raw, expected):
+    frame = unpack_frames(np.frombuffer(raw, dtype=np.uint8), pixel_format, 1, len(expected))
+    assert frame.dtype == np.uint16
+    assert frame.tolist() == [expected]
+
+
+def test_reference_packers_match_known_patterns():
+    assert _pack([0xABC, 0x123], 'Mono12Packed') == b'\xab\x3c\x12'
+    assert _pack([0xABC, 0x123], 'Mono12p') == b'\xbc\x3a\x12'
+    assert _pack([0x2AB, 0x155], 'Mono10Packed') == b'\xaa\x13\x55'
+    assert _pack([0x2AB, 0x215, 0x3E9, 0x3E0], 'Mono10p') == b'\xab\x56\x98\x3e\xf8'
+
+
+@pytest.mark.parametrize('pixel_format', list(PACKED_FORMATS))
+def test_round_trip_batch_from_strided_blocks(pixel_format):
+    bits = PACKED_FORMATS[pixel_format][0]
+    height, width, count = 6, 8, 3
+    rng = np.random.default_rng(0)
+    frames = rng.integers(0, 1 << bits, (count, height, width), dtype=np.uint16)
+    frames[0, 0, :2] = [0, (1 << bits) - 1]
+
+    # 帧块: 打包数据 + 8 字节时间戳 + 填充，按跨步视图传入
+    size = packed_size(pixel_format, height * width)
+    block = size + 24
+    buf = np.zeros(count * block, dtype=np.uint8)
+    for t in range(count):
+        buf[t * block:t * block + size] = np.frombuffer(_pack(frames[t].ravel(), pixel_format), dtype=np.uint8)
+    raw = np.lib.stride_tricks.as_strided(buf, shape=(count, size), strides=(block, 1))
+
+    np.testing.assert_array_equal(unpack_frames(raw, pixel_format, height, width), frames)
+    np.testing.assert_array_equal(unpack_frames(raw[1], pixel_format, height, width), frames[1])
+
+
+def test_pixel_count_not_multiple_of_group():
+    # Mono10p 每组 4 像素: 3x3 = 9 像素占 3 组，末组多出的像素被丢弃
+    pixels = np.arange(9, dtype=np.uint16) * 100
+    raw = _pack_lsb_stream(list(pixels) + [0, 0, 0], 10)
+    assert packed_size('Mono10p', 9) == len(raw) == 15
+    frame = unpack_frames(np.frombuffer(raw, dtype=np.uint8), 'Mono10p', 3, 3)
+    np.testing.assert_array_equal(frame, pixels.reshape(3, 3))
+
+
+def test_resolve_pixel_format():
+    width, height = 64, 48
+    pixels = width * height
+    assert resolve_pixel_format(12, width, height, pixels * 2) == (None, 12)
+    assert resolve_pixel_format(12, width, height, pixels * 3 // 2) == ('Mono12Packed', 12)
+    assert resolve_pixel_format(12, width, height, pixels * 3 // 2, 'Mono12p') == ('Mono12p', 12)
+    assert resolve_pixel_format(10, width, height, pixels * 5 // 4, 'Mono10p') == ('Mono10p', 10)
+    # 位深度与格式不符，或字节数对不上
+    assert resolve_pixel_format(10, width, height, pixels * 3 // 2, 'Mono12p') == (None, None)
+    assert resolve_pixel_format(12, width, height, pixels, None) == (None, None)
@@ -0,0 +1,161 @@
+"""zlib 压缩 SEQ 与 .idx 帧索引的测试"""
+
+import os
+
+import numpy as np
+import pytest
+
+from images_to_seq import SeqWriter
+from seq_compression import (
+    COMPRESSION_NONE, COMPRESSION_ZLIB, FRAME_SIZE_FIELD, TIMESTAMP_SIZE, build_frame_index, decode_frame,
+    index_path_for, is_variable_size, load_frame_index,
+)
+from seq_to_png import SeqReader
+
+
+HEADER_SIZE = 8192
+IMAGE_FORMAT = 100
+FRAME_COUNT = 5
+HEIGHT, WIDTH = 24, 32
+TIMESTAMP_BASE = 1700000000
+
+
+def _make_frames(bit_depth):
+    rng = np.random.default_rng(bit_depth)
+    dtype = np.uint8 if bit_depth == 8 else np.uint16
+    # 平滑背景加噪声，各帧压缩后的大小不同
+    ramp = np.arange(WIDTH, dtype=np.uint16)[None, :] * 3 + np.arange(HEIGHT, dtype=np.uint16)[:, None]
+    noise = rng.integers(0, 1 << (4 * (1 + np.arange(FRAME_COUNT))), (HEIGHT, WIDTH, FRAME_COUNT))
+    frames = (ramp[None] + noise.transpose(2, 0, 1)) % np.iinfo(dtype).max
+    return frames.astype(dtype)
+
+
+def _write_seq(path, frames, bit_depth):
+    writer = SeqWriter(path, WIDTH, HEIGHT, bit_depth, 100.0, compression='zlib')
+    writer.open()
+    try:
+        for k, frame in enumerate(frames):
+            writer.append(frame, TIMESTAMP_BASE + k * 0.01)
+    finally:
+        writer.close()
+
+
+def _read_all(path):
+    with SeqReader(path) as reader:
+        assert reader.read_header()
+        assert reader.compressed
+        frames = reader.read_frames(0, reader.frame_count).copy()
+        seconds = reader.timestamp_records()['time_t'].copy()
+    return frames, seconds
+
+
+@pytest.fixture(params=[8, 16])
+def zlib_seq(request, tmp_path):
+    bit_depth = request.param
+    path = str(tmp_path / f'zlib_{bit_depth}.seq')
+    frames = _make_frames(bit_depth)
+    _write_seq(path, frames, bit_depth)
+    return path, frames
+
+
+def test_is_variable_size():
+    assert is_variable_size(COMPRESSION_ZLIB, IMAGE_FORMAT)
+    assert not is_variable_size(COMPRESSION_NONE, IMAGE_FORMAT)
+    assert is_variable_size(COMPRESSION_NONE, 102)
+
+
+def test_writer_saves_matching_index(zlib_seq):
+    path, frames = zlib_seq
+    assert os.path.exists(index_path_for(path))
+
+    index = load_frame_index(path)
+    assert index is not None
+    offsets, sizes = index
+    built_offsets, built_sizes = build_frame_index(path, HEADER_SIZE, IMAGE_FORMAT)
+    np.testing.assert_array_equal(offsets, built_offsets)
+    np.testing.assert_array_equal(sizes, built_sizes)
+    assert len(offsets) == FRAME_COUNT
+    assert offsets[0] == HEADER_SIZE
+    assert len(set(sizes.tolist())) > 1
+
+    with open(path, 'rb') as f:
+        data = f.read()
+    for k in range(FRAME_COUNT):
+        start = int(offsets[k]) + FRAME_SIZE_FIELD
+        end = int(offsets[k]) + int(sizes[k])
+        frame = decode_frame(data[start:end], COMPRESSION_ZLIB, IMAGE_FORMAT, frames[k].shape, frames.dtype)
+        np.testing.assert_array_equal(frame, frames[k])
+
+
+def test_reader_round_trip(zlib_seq):
+    path, frames = zlib_seq
+    read, seconds = _read_all(path)
+    np.testing.assert_array_equal(read, frames)
+    assert seconds.tolist() == [TIMESTAMP_BASE] * FRAME_COUNT
+
+
+def test_stale_index_after_truncation_is_rebuilt(zlib_seq):
+    path, frames = zlib_seq
+    offsets, _ = load_frame_index(path)
+    with open(path, 'r+b') as f:
+        f.truncate(int(offsets[-1]))
+    assert load_frame_index(path) is None
+
+    read, _ = _read_all(path)
+    np.testing.assert_array_equal(read, frames[:-1])
+
+    rebuilt = load_frame_index(path)
+    assert rebuilt is not None
+    np.testing.assert_array_equal(rebuilt[0], offsets[:-1])
+
+
+def test_stale_index_after_mtime_change_is_rebuilt(zlib_seq):
+    path, frames = zlib_seq
+    offsets, sizes = load_frame_index(path)
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 10 ** 9))
+    assert load_frame_index(path) is None
+
+    read, _ = _read_all(path)
+    np.testing.assert_array_equal(read, frames)
+
+    rebuilt = load_frame_index(path)
+    assert rebuilt is not None
+    np.testing.assert_array_equal(rebuilt[0], offsets)
+    np.testing.assert_array_equal(rebuilt[1], sizes)
+
+
+def test_corrupt_index_is_ignored(zlib_seq):
+    path, frames = zlib_seq
+    idx_path = index_path_for(path)
+    with open(idx_path, 'r+b') as f:
+        f.write(b'NOTANIDX')
+    assert load_frame_index(path) is None
+
+    with open(idx_path, 'wb') as f:
+        f.write(b'SEQ')
+    assert load_frame_index(path) is None
+
+    read, _ = _read_all(path)
+    np.testing.assert_array_equal(read, frames)
+
+
+def test_build_index_detects_padding_after_timestamp(zlib_seq, tmp_path):
+    # 部分版本在时间戳后多写 8 字节填充，扫描时应自动探测
+    path, _ = zlib_seq
+    offsets, sizes = load_frame_index(path)
+    with open(path, 'rb') as f:
+        data = f.read()
+
+    padded = bytearray(data[:HEADER_SIZE])
+    expected = []
+    for offset, size in zip(offsets.tolist(), sizes.tolist()):
+        expected.append(len(padded))
+        padded += data[offset:offset + size + TIMESTAMP_SIZE] + bytes(8)
+    padded_path = str(tmp_path / 'padded.seq')
+    with open(padded_path, 'wb') as f:
+        f.write(padded)
+
+    built_offsets, built_sizes = build_frame_index(padded_path, HEADER_SIZE, IMAGE_FORMAT)
+    assert built_offsets.tolist() == expected
+    np.testing.assert_array_equal(built_sizes, sizes)
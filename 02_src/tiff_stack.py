@@ -0,0 +1,138 @@
+"""
+多页 BigTIFF 堆栈写入
+- 所有帧写入一个（或按大小分为几个）多页 BigTIFF 文件，代替每帧一个图像文件
+- 逐帧流式写入，内存中只有当前一帧；保留 16 位数据，彩色帧按 RGB 存储
+- 每页布局: [IFD][图像描述][像素数据]，下一页紧接在本页之后，
+  因此 IFD 的“下一 IFD 偏移”写入时即可确定，关闭时只需把最后一页的改为 0
+"""
+
+import struct
+import numpy as np
+
+
+# BigTIFF 文件头: 字节序, 版本 43, 偏移字节数 8, 保留 0, 首个 IFD 偏移
+BIGTIFF_HEADER = struct.Struct('<2sHHHQ')
+IFD_ENTRY = struct.Struct('<HHQ8s')
+
+# TIFF 数据类型
+TYPE_ASCII = 2
+TYPE_SHORT = 3
+TYPE_LONG = 4
+TYPE_LONG8 = 16
+
+# 每页 IFD 项数（固定，便于预先计算偏移）
+IFD_ENTRY_COUNT = 12
+
+
+def _align(offset, alignment=8):
+    return -(-offset // alignment) * alignment
+
+
+def _ifd_entry(tag, value_type, values, data_offset=None):
+    """打包一个 IFD 项；values 放得下 8 字节时直接内嵌，否则 data_offset 为数据位置"""
+    if value_type == TYPE_ASCII and len(values) <= 8:
+        return IFD_ENTRY.pack(tag, value_type, len(values), bytes(values).ljust(8, b'\0'))
+    if data_offset is not None:
+        return IFD_ENTRY.pack(tag, value_type, len(values), struct.pack('<Q', data_offset))
+    fmt = {TYPE_SHORT: 'H', TYPE_LONG: 'I', TYPE_LONG8: 'Q'}[value_type]
+    packed = struct.pack(f'<{len(values)}{fmt}', *values)
+    return IFD_ENTRY.pack(tag, value_type, len(values), packed.ljust(8, b'\0'))
+
+
+class TiffStackWriter:
+    """
+    流式多页 BigTIFF 写入器
+
+        with TiffStackWriter('stack.tif') as writer:
+            for frame in frames:
+                writer.write_frame(frame, description='frame=0')
+    """
+
+    def __init__(self, output_path):
+        self.output_path = output_path
+        self.page_count = 0
+        self._file = None
+        self._offset = 0
+        self._last_next_field = None
+
+    def open(self):
+        self._file = open(self.output_path, 'wb')
+        self._file.write(BIGTIFF_HEADER.pack(b'II', 43, 8, 0, BIGTIFF_HEADER.size))
+        self._offset = BIGTIFF_HEADER.size
+        return self
+
+    def __enter__(self):
+        return self.open()
+
+    def __exit__(self, exc_type, exc_value, tb):
+        self.close()
+
+    @staticmethod
+    def page_bytes(frame_shape, dtype, description_bytes=64):
+        """估算一页占用的字节数（用于按大小分段）"""
+        ifd_size = 8 + IFD_ENTRY_COUNT * IFD_ENTRY.size + 8
+        return _align(ifd_size + description_bytes + int(np.prod(frame_shape)) * np.dtype(dtype).itemsize)
+
+    def write_frame(self, frame, description=''):
+        """
+        写入一页
+
+        Args:
+            frame: (H, W) 的 uint8/uint16 灰度帧或 (H, W, 3) 的 RGB 帧（可以是非连续视图）
+            description: 该页的 ImageDescription（ASCII）
+        """
+        frame = np.asarray(frame)
+        if frame.dtype not in (np.uint8, np.uint16):
+            raise ValueError(f"不支持的数据类型: {frame.dtype}")
+        pixels = np.ascontiguousarray(frame, dtype=frame.dtype.newbyteorder('<'))
+        height, width = frame.shape[:2]
+        samples = frame.shape[2] if frame.ndim == 3 else 1
+        bits = frame.dtype.itemsize * 8
+
+        desc = description.encode('ascii', errors='replace') + b'\0'
+        ifd_offset = self._offset
+        ifd_size = 8 + IFD_ENTRY_COUNT * IFD_ENTRY.size + 8
+        desc_offset = ifd_offset + ifd_size
+        data_offset = _align(desc_offset + len(desc))
+        data_size = pixels.nbytes
+        next_offset = _align(data_offset + data_size)
+
+        entries = [
+            _ifd_entry(254, TYPE_LONG, [0]),                        # NewSubfileType
+            _ifd_entry(256, TYPE_LONG, [width]),                    # ImageWidth
+            _ifd_entry(257, TYPE_LONG, [height]),                   # ImageLength
+            _ifd_entry(258, TYPE_SHORT, [bits] * samples),          # BitsPerSample
+            _ifd_entry(259, TYPE_SHORT, [1]),                       # Compression: 无
+            _ifd_entry(262, TYPE_SHORT, [2 if samples == 3 else 1]),  # Photometric: RGB / 黑为 0
+            _ifd_entry(270, TYPE_ASCII, desc, desc_offset),         # ImageDescription
+            _ifd_entry(273, TYPE_LONG8, [data_offset]),             # StripOffsets
+            _ifd_entry(277, TYPE_SHORT, [samples]),                 # SamplesPerPixel
+            _ifd_entry(278, TYPE_LONG, [height]),                   # RowsPerStrip
+            _ifd_entry(279, TYPE_LONG8, [data_size]),               # StripByteCounts
+            _ifd_entry(284, TYPE_SHORT, [1]),                       # PlanarConfiguration: 交错
+        ]
+        ifd = (struct.pack('<Q', len(entries)) + b''.join(entries) + struct.pack('<Q', next_offset))
+
+        self._file.write(ifd + desc + b'\0' * (data_offset - desc_offset - len(desc)))
+        self._file.write(pixels.data)
+        self._file.write(b'\0' * (next_offset - data_offset - data_size))
+
+        self._last_next_field = ifd_offset + ifd_size - 8
+        self._offset = next_offset
+        self.page_count += 1
+
+    def close(self):
+        """把最后一页的“下一 IFD 偏移”改为 0 并关闭文件"""
+        if self._file is None:
+            return
+        try:
+            if self._last_next_field is not None:
+                self._file.seek(self._last_next_field)
+                self._file.write(struct.pack('<Q', 0))
+            else:
+                # 没有写入任何页: 首个 IFD 偏移为 0
+                self._file.seek(8)
+                self._file.write(struct.pack('<Q', 0))
+        finally:
+            self._file.close()
+            self._file = None
@@ -55,6 +55,7 @@ a = Analysis(
         'PIL._imaging',
         'numpy',
         'numpy.core',
+        'h5py',
     ],
     hookspath=[],
     hooksconfig={},